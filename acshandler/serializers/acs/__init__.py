@@ -1,11 +1,28 @@
 # Azure Communication Services (ACS) serializer for Pipecat
 import dataclasses
 
+
 @dataclasses.dataclass
 class ACSFrameSerializerParams:
     """Parameters for ACS frame serializer."""
+
     audio_format: str = "PCM"  # PCM is used by ACS
-    sample_rate: int = 16000   # 16kHz as default
+    sample_rate: int = 16000  # 16kHz as default
     bits_per_sample: int = 16  # 16-bit PCM
-    channels: int = 1          # Mono audio
-    frame_size: int = 320      # Default frame size (20ms @ 16kHz)
+    channels: int = 1  # Mono audio
+    frame_size: int = 320  # Default frame size (20ms @ 16kHz)
+    jitter_buffer_ms: int = 60  # How far ahead of ACS playback outbound audio may run
+
+    def __post_init__(self):
+        if self.frame_size * 100 % self.sample_rate:
+            raise ValueError(
+                f"frame_size must be a multiple of 10 ms ({self.sample_rate // 100} samples)"
+            )
+
+    @property
+    def frame_duration_ms(self) -> int:
+        return self.frame_size * 1000 // self.sample_rate
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.frame_size * self.channels * self.bits_per_sample // 8
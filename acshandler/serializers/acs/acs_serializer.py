@@ -1,25 +1,73 @@
 import base64
+import binascii
 import json
+import re
+from typing import Callable, Optional
 
 from loguru import logger
 
-from pipecat.audio.utils import create_default_resampler, pcm_to_ulaw, ulaw_to_pcm
+try:
+    import orjson
+except ImportError:  # optional, only speeds up control messages
+    orjson = None
+
 from pipecat.frames.frames import (
     AudioRawFrame,
     EndFrame,
     Frame,
     InputAudioRawFrame,
     StartFrame,
+    StartInterruptionFrame,
     TransportMessageFrame,
 )
 from pipecat.serializers.base_serializer import FrameSerializer, FrameSerializerType
 
+_json_loads = orjson.loads if orjson else json.loads
+
+# Inbound AudioData messages arrive every 20 ms and look like
+# {"kind":"AudioData","audioData":{"timestamp":..,"data":"<base64>",..}}, so the
+# kind is checked near the start and the payload is sliced out directly
+# instead of building the whole dict.
+_KIND_SCAN_LIMIT = 64
+_AUDIO_KIND_STR = re.compile(r'"kind"\s*:\s*"AudioData"')
+_AUDIO_DATA_STR = re.compile(r'"data"\s*:\s*"([A-Za-z0-9+/=]*)"')
+_AUDIO_KIND_BYTES = re.compile(rb'"kind"\s*:\s*"AudioData"')
+_AUDIO_DATA_BYTES = re.compile(rb'"data"\s*:\s*"([A-Za-z0-9+/=]*)"')
+
+# Byte-for-byte what json.dumps produces for the outbound envelopes.
+_AUDIO_ENVELOPE_PREFIX = '{"Kind": "AudioData", "AudioData": {"Data": "'
+_AUDIO_ENVELOPE_SUFFIX = '"}}'
+_STOP_AUDIO_MESSAGE = json.dumps(
+    {"kind": "StopAudio", "AudioData": None, "StopAudio": {}}
+)
+
+
+def _scan_audio_payload(data: str | bytes):
+    """Returns the decoded audio of an AudioData message, b"" for an empty
+    payload, or None if the message needs the generic path."""
+    if isinstance(data, str):
+        if not _AUDIO_KIND_STR.search(data, 0, _KIND_SCAN_LIMIT):
+            return None
+        match = _AUDIO_DATA_STR.search(data)
+        if match is None:
+            return None
+        return binascii.a2b_base64(match.group(1))
+    if not _AUDIO_KIND_BYTES.search(data, 0, _KIND_SCAN_LIMIT):
+        return None
+    match = _AUDIO_DATA_BYTES.search(data)
+    if match is None:
+        return None
+    # slice the payload without copying it out of the message
+    return binascii.a2b_base64(memoryview(data)[match.start(1) : match.end(1)])
+
 
 class ACSFrameSerializer(FrameSerializer):
     """Serializer for Azure Communication Services (ACS) Media Streams WebSocket protocol.
 
     Handles conversion between Pipecat frames and ACS WebSocket audio protocol.
-    Supports bi-directional audio (PCM 16kHz mono, base64-encoded) and control messages.
+    Supports bi-directional audio (PCM 16 or 24 kHz mono, base64-encoded, at the
+    rate in ``helpers.audio_format``) and control messages. Interruptions and
+    the end of the call send ``StopAudio`` so ACS stops playing at once.
     """
 
     def __init__(
@@ -28,12 +76,23 @@ class ACSFrameSerializer(FrameSerializer):
         sample_rate: int = 16000,
         channels: int = 1,
         frame_size: int = 640,
+        on_audio_sent: Optional[Callable[[AudioRawFrame], None]] = None,
+        on_audio_received: Optional[Callable[[AudioRawFrame], None]] = None,
+        on_audio_stopped: Optional[Callable[[], None]] = None,
     ):
         self.connection_id = connection_id
         self.sample_rate = sample_rate
         self._metadata_sent = False
         self.channels = channels
         self.frame_size = frame_size
+        # called for every outbound audio frame, e.g. to time the first greeting audio
+        self._on_audio_sent = on_audio_sent
+        # called for every inbound audio frame, e.g. to measure receive lag
+        self._on_audio_received = on_audio_received
+        # called when a barge-in sends StopAudio, e.g. to time it
+        self._on_audio_stopped = on_audio_stopped
+        # whether ACS may still be playing audio we sent
+        self._audio_playing = False
 
     @property
     def type(self) -> FrameSerializerType:
@@ -47,37 +106,51 @@ class ACSFrameSerializer(FrameSerializer):
         """Serializes a Pipecat frame to ACS WebSocket format."""
         # Send metadata first if not sent
         if isinstance(frame, AudioRawFrame):
-            audio_b64 = base64.b64encode(frame.audio).decode("utf-8")
-            message = {
-                "Kind": "AudioData",
-                "AudioData": {
-                    "Data": audio_b64,
-                },
-            }
-            return json.dumps(message)
+            self._audio_playing = True
+            if self._on_audio_sent:
+                self._on_audio_sent(frame)
+            audio_b64 = binascii.b2a_base64(frame.audio, newline=False).decode("ascii")
+            return _AUDIO_ENVELOPE_PREFIX + audio_b64 + _AUDIO_ENVELOPE_SUFFIX
+        elif isinstance(frame, StartInterruptionFrame):
+            # The output transport has already dropped the audio it had queued;
+            # StopAudio also flushes what ACS buffered but has not played yet.
+            # Nothing to stop if no audio went out since the last StopAudio.
+            if not self._audio_playing:
+                return None
+            self._audio_playing = False
+            if self._on_audio_stopped:
+                self._on_audio_stopped()
+            return _STOP_AUDIO_MESSAGE
         elif isinstance(frame, EndFrame):
-            return json.dumps({"kind": "StopAudio", "AudioData":None,"StopAudio": {}})
+            self._audio_playing = False
+            return _STOP_AUDIO_MESSAGE
         elif isinstance(frame, TransportMessageFrame):
             return json.dumps({"kind": "Control", **frame.message})
         return None
 
     async def deserialize(self, data: str | bytes) -> Frame | None:
         """Deserializes ACS WebSocket data to Pipecat frames."""
-       
-        message = json.loads(data)
-        
+        audio_data = _scan_audio_payload(data)
+        if audio_data is not None:
+            if not audio_data:
+                return None
+            return self._audio_received(audio_data)
+
+        # control messages and anything unexpected take the generic path
+        message = _json_loads(data)
+
         kind = message.get("kind")
         if kind == "AudioData":
             audio_b64 = message.get("audioData", {}).get("data")
             if audio_b64:
-                audio_data = base64.b64decode(audio_b64)
-                return InputAudioRawFrame(
-                    audio=audio_data,
-                    num_channels=self.channels,
-                    sample_rate=self.sample_rate,
-                )
+                return self._audio_received(base64.b64decode(audio_b64))
         elif kind == "AudioMetadata":
             meta = message.get("audioMetadata", {})
+            if meta.get("sampleRate", self.sample_rate) != self.sample_rate:
+                # the pipeline runs at the negotiated rate and would need resampling
+                logger.warning(
+                    f"ACS streams at {meta['sampleRate']} Hz but the call was set up for {self.sample_rate} Hz"
+                )
             self.sample_rate = meta.get("sampleRate", self.sample_rate)
             self.channels = meta.get("channels", self.channels)
             return None
@@ -86,3 +159,13 @@ class ACSFrameSerializer(FrameSerializer):
         elif kind == "Control":
             return TransportMessageFrame(message=message)
         return None
+
+    def _audio_received(self, audio_data: bytes) -> InputAudioRawFrame:
+        frame = InputAudioRawFrame(
+            audio=audio_data,
+            num_channels=self.channels,
+            sample_rate=self.sample_rate,
+        )
+        if self._on_audio_received:
+            self._on_audio_received(frame)
+        return frame
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import WebSocket
+
+from pipecat.serializers.base_serializer import FrameSerializerType
+from pipecat.transports.base_transport import BaseTransport
+from pipecat.transports.network.fastapi_websocket import (
+    FastAPIWebsocketCallbacks,
+    FastAPIWebsocketClient,
+    FastAPIWebsocketInputTransport,
+    FastAPIWebsocketOutputTransport,
+    FastAPIWebsocketParams,
+    FastAPIWebsocketTransport,
+)
+
+from acshandler.serializers.acs import ACSFrameSerializerParams
+
+
+class ACSWebsocketOutputTransport(FastAPIWebsocketOutputTransport):
+    """Paces outbound audio to ACS at real time with a small jitter buffer.
+
+    The base transport sends at twice real time, so long TTS responses reach
+    ACS in bursts. Here audio may run at most ``jitter_buffer_ms`` ahead of
+    what ACS has played out. ``_next_send_time`` holds the playout end time;
+    the base class resets it to 0 on interruption, so the next response starts
+    at once instead of waiting for audio that was just discarded.
+    """
+
+    def __init__(self, *args, acs_params: ACSFrameSerializerParams, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._jitter_buffer = acs_params.jitter_buffer_ms / 1000
+
+    async def _write_audio_sleep(self):
+        now = time.monotonic()
+        if self._next_send_time < now:
+            # underrun (or first frame): ACS has played everything we sent
+            self._next_send_time = now
+        bytes_per_second = self.sample_rate * 2 * self._params.audio_out_channels
+        self._next_send_time += self.audio_chunk_size / bytes_per_second
+        lead = self._next_send_time - now
+        if lead > self._jitter_buffer:
+            await asyncio.sleep(lead - self._jitter_buffer)
+
+
+class ACSWebsocketTransport(FastAPIWebsocketTransport):
+    """FastAPI websocket transport that sends ACS audio in fixed-duration frames.
+
+    The output transport already re-chunks TTS audio into
+    ``audio_out_10ms_chunks`` pieces, so that is derived from
+    ``ACSFrameSerializerParams.frame_size``; every AudioData message then
+    carries exactly one frame regardless of how ElevenLabs chunked it.
+
+    The base constructor hard-codes its output transport, so this one sets
+    up the same client and transports itself with
+    :class:`ACSWebsocketOutputTransport` as the output.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        params: FastAPIWebsocketParams,
+        acs_params: Optional[ACSFrameSerializerParams] = None,
+        input_name: Optional[str] = None,
+        output_name: Optional[str] = None,
+    ):
+        acs_params = acs_params or ACSFrameSerializerParams()
+        params.audio_out_10ms_chunks = acs_params.frame_duration_ms // 10
+        BaseTransport.__init__(self, input_name=input_name, output_name=output_name)
+        self._params = params
+        self._callbacks = FastAPIWebsocketCallbacks(
+            on_client_connected=self._on_client_connected,
+            on_client_disconnected=self._on_client_disconnected,
+            on_session_timeout=self._on_session_timeout,
+        )
+        is_binary = bool(
+            params.serializer and params.serializer.type == FrameSerializerType.BINARY
+        )
+        self._client = FastAPIWebsocketClient(websocket, is_binary, self._callbacks)
+        self._input = FastAPIWebsocketInputTransport(
+            self, self._client, self._params, name=self._input_name
+        )
+        self._output = ACSWebsocketOutputTransport(
+            self,
+            self._client,
+            self._params,
+            acs_params=acs_params,
+            name=self._output_name,
+        )
+        self._register_event_handler("on_client_connected")
+        self._register_event_handler("on_client_disconnected")
+        self._register_event_handler("on_session_timeout")
@@ -0,0 +1,140 @@
+"""Load test for ACS call control against a local mock ACS endpoint.
+
+Answers N incoming calls concurrently while a 20 ms ticker stands in for the
+media websockets, and reports how late the ticker fires. The legacy mode runs
+the sync ``CallAutomationClient`` inline (as ``server.py`` used to), the async
+mode uses ``call_automation.CallAutomationService``.
+
+    python benchmarks/acs_call_control_load_test.py --calls 50 --latency-ms 150
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import threading
+import time
+
+from aiohttp import web
+from azure.communication.callautomation import (
+    CallAutomationClient,
+    MediaStreamingAudioChannelType,
+    MediaStreamingContentType,
+    MediaStreamingOptions,
+    MediaStreamingTransportType,
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from call_automation import CallAutomationService  # noqa: E402
+
+FRAME_INTERVAL = 0.02
+
+
+def start_mock_acs(port: int, latency: float):
+    """Runs a mock ACS endpoint in its own thread so a blocked client loop cannot stall it."""
+
+    async def answer(request: web.Request):
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response(
+            {
+                "callConnectionId": f"call-{time.monotonic_ns()}",
+                "serverCallId": "mock-server-call",
+                "targets": [],
+                "callConnectionState": "connected",
+                "callbackUri": "http://localhost/api/callbacks",
+                "correlationId": "mock-correlation",
+            }
+        )
+
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/calling/callConnections:answer", answer)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def media_streaming_options():
+    return MediaStreamingOptions(
+        transport_url="wss://localhost/ws",
+        transport_type=MediaStreamingTransportType.WEBSOCKET,
+        content_type=MediaStreamingContentType.AUDIO,
+        audio_channel_type=MediaStreamingAudioChannelType.MIXED,
+        start_media_streaming=True,
+        enable_bidirectional=True,
+    )
+
+
+async def media_ticker(stop: asyncio.Event, lags: list):
+    """Stands in for a live media pipeline that expects to run every 20 ms."""
+    next_tick = time.perf_counter() + FRAME_INTERVAL
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+        lags.append(max(0.0, time.perf_counter() - next_tick))
+        next_tick += FRAME_INTERVAL
+
+
+async def run(mode: str, connection_string: str, calls: int):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(media_ticker(stop, lags))
+
+    if mode == "sync":
+        client = CallAutomationClient.from_connection_string(connection_string)
+
+        async def answer(i):
+            # blocking call inside an async handler, as server.py used to do
+            client.answer_call(
+                incoming_call_context=f"ctx-{i}",
+                callback_url="http://localhost/api/callbacks",
+                media_streaming=media_streaming_options(),
+            )
+
+    else:
+        service = CallAutomationService(connection_string)
+
+        async def answer(i):
+            await service.answer_call(
+                incoming_call_context=f"ctx-{i}",
+                callback_url="http://localhost/api/callbacks",
+                media_streaming=media_streaming_options(),
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(answer(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    if mode != "sync":
+        await service.close()
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0.0
+    print(
+        f"{mode:>5}: answered {calls} calls in {elapsed * 1000:8.1f} ms | "
+        f"media tick lag p99 {p99 * 1000:7.1f} ms, max {max(lags, default=0.0) * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ACS call control load test")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    start_mock_acs(args.port, args.latency_ms / 1000)
+    access_key = base64.b64encode(b"mock-access-key").decode()
+    connection_string = f"endpoint=http://127.0.0.1:{args.port}/;accesskey={access_key}"
+
+    for mode in ("sync", "async"):
+        asyncio.run(run(mode, connection_string, args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmarks cache writes against a local redis-server.
+
+Compares the old read-modify-write ``GET`` + ``SET`` merge with the
+server-side merge in ``cache.AsyncRedisCache``. It reports write throughput,
+commands sent per write (from ``INFO commandstats``) and how many fields
+survive concurrent merges into the same key.
+
+    redis-server --port 6379 &
+    python benchmarks/cache_benchmark.py --url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cache import AsyncRedisCache  # noqa: E402
+
+
+async def legacy_set(client, key, value, ex=3600):
+    """The merge RedisCache.set used to do: two round trips, no atomicity."""
+    raw = await client.get(key)
+    existing_value = json.loads(raw) if raw else None
+    if isinstance(existing_value, dict) and isinstance(value, dict):
+        existing_value.update(value)
+        value = existing_value
+    elif isinstance(existing_value, list):
+        existing_value.append(value)
+        value = existing_value
+    await client.set(key, json.dumps(value), ex=ex)
+
+
+async def commands_processed(client):
+    stats = await client.info("stats")
+    return stats["total_commands_processed"]
+
+
+async def run(name, cache, write, writes, concurrency):
+    client = cache.client
+    await client.flushdb()
+    before = await commands_processed(client)
+
+    # each worker merges its own fields into a shared per-call record
+    async def worker(w):
+        for i in range(writes // concurrency):
+            await write(f"call-{i % 10}", {f"field-{w}-{i}": i})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    # INFO itself is one command
+    sent = await commands_processed(client) - before - 1
+    surviving = 0
+    for i in range(10):
+        surviving += len(await cache.get(f"call-{i}") or {})
+    total = (writes // concurrency) * concurrency
+    print(
+        f"{name:>8}: {total / elapsed:9.0f} writes/s | "
+        f"{sent / total:4.1f} commands/write | "
+        f"{surviving}/{total} fields survived"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Redis cache write benchmark")
+    parser.add_argument("--url", default="redis://localhost:6379/0")
+    parser.add_argument("--writes", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    cache = AsyncRedisCache(args.url, max_connections=args.concurrency)
+    # load the scripts up front so EVALSHA never falls back to EVAL mid-run
+    await cache.set("warmup", {"a": 1})
+    await cache.get("warmup")
+
+    await run(
+        "legacy",
+        cache,
+        lambda key, value: legacy_set(cache.client, key, value),
+        args.writes,
+        args.concurrency,
+    )
+    await run("pipelined", cache, cache.set, args.writes, args.concurrency)
+    await cache.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""Benchmarks LLM routing and hedging against local stub backends.
+
+Starts one OpenAI-compatible stub server per ``--backend`` on localhost.
+Each server streams a fixed reply after a time to first token drawn from
+its profile ``name:median_ms:tail_ms:tail_share``. For example,
+``slow:400:3000:0.1`` answers in about 400 ms, and one request in ten
+takes 3 s. The same requests are then sent in three ways: straight to the
+first backend only, through ``LLMRouter`` without hedging, and through it with
+hedging. For each it reports time to first token p50/p95/p99, how the
+requests were spread over the backends, and how many were hedged.
+
+    python benchmarks/llm_routing_benchmark.py
+    python benchmarks/llm_routing_benchmark.py --backend a:300:2500:0.1 --backend b:450:600:0.05 --requests 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+from aiohttp import web
+from openai import AsyncOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from helpers.metrics import get_metrics  # noqa: E402
+from services.llm_router import LLMBackend, LLMRouter  # noqa: E402
+
+REPLY = "We are open from nine until five on weekdays."
+
+
+def stub_app(name, median, tail, tail_share, served: Counter):
+    """An OpenAI-compatible /v1/chat/completions that streams ``REPLY``."""
+
+    async def completions(request):
+        body = await request.json()
+        served[name] += 1
+        ttft = (
+            tail
+            if random.random() < tail_share
+            else random.lognormvariate(np.log(median), 0.2)
+        )
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(ttft)
+        try:
+            for word in REPLY.split():
+                chunk = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": word + " "},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                await asyncio.sleep(0.005)
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            # the router closed the losing request of a hedge
+            pass
+        return response
+
+    async def models(request):
+        return web.json_response({"object": "list", "data": []})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    app.router.add_get("/v1/models", models)
+    return app
+
+
+async def start_backends(profiles, served):
+    runners, backends = [], []
+    for i, profile in enumerate(profiles):
+        name, median, tail, share = profile.split(":")
+        runner = web.AppRunner(
+            stub_app(name, int(median) / 1000, int(tail) / 1000, float(share), served)
+        )
+        await runner.setup()
+        port = 18100 + i
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        runners.append(runner)
+        backends.append((name, f"http://127.0.0.1:{port}/v1"))
+    return runners, backends
+
+
+async def ttft(client, model):
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model=model,
+        stream=True,
+        messages=[{"role": "user", "content": "What are your opening hours?"}],
+    )
+    first = None
+    async for _ in stream:
+        if first is None:
+            first = time.perf_counter() - started
+    return first * 1000
+
+
+async def run(label, client, requests, concurrency, served: Counter):
+    served.clear()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await ttft(client, "stub")
+
+    results = await asyncio.gather(*(one() for _ in range(requests)))
+    p50, p95, p99 = np.percentile(results, [50, 95, 99])
+    spread = ", ".join(f"{name} {count}" for name, count in sorted(served.items()))
+    print(
+        f"{label:>14}: ttft p50 {p50:6.0f} ms | p95 {p95:6.0f} ms | p99 {p99:6.0f} ms | served: {spread}"
+    )
+
+
+def hedges():
+    snapshot = get_metrics().snapshot()
+    return sum(
+        v
+        for k, v in snapshot.get("counters", {}).items()
+        if k.startswith("llm_hedges_total")
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="LLM routing and hedging benchmark")
+    parser.add_argument(
+        "--backend", action="append", help="name:median_ms:tail_ms:tail_share"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--hedge-min-ms", type=int, default=250)
+    args = parser.parse_args()
+    profiles = args.backend or ["primary:250:2500:0.08", "secondary:350:700:0.02"]
+
+    served = Counter()
+    runners, endpoints = await start_backends(profiles, served)
+
+    def clients():
+        return [
+            AsyncOpenAI(api_key="stub", base_url=url, max_retries=0)
+            for _, url in endpoints
+        ]
+
+    direct = LLMRouter([LLMBackend(endpoints[0][0], clients()[0], "stub")], hedge=False)
+    await run("direct", direct, args.requests, args.concurrency, served)
+    await direct.close()
+
+    router = LLMRouter(
+        [LLMBackend(name, c, "stub") for (name, _), c in zip(endpoints, clients())],
+        hedge=False,
+    )
+    await run("routed", router, args.requests, args.concurrency, served)
+    await router.close()
+
+    router = LLMRouter(
+        [LLMBackend(name, c, "stub") for (name, _), c in zip(endpoints, clients())],
+        min_hedge_delay=args.hedge_min_ms / 1000,
+    )
+    before = hedges()
+    await run("routed+hedged", router, args.requests, args.concurrency, served)
+    print(
+        f"{'':>14}  {hedges() - before:.0f} of {args.requests} requests hedged; {router.stats()}"
+    )
+    await router.close()
+
+    for runner in runners:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Microbenchmark for ACSFrameSerializer against the previous json-based codec.
+
+Reports frames/sec and peak transient bytes allocated per frame (tracemalloc)
+for inbound AudioData deserialization and outbound audio serialization.
+
+    python benchmarks/serializer_benchmark.py --frames 20000
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pipecat.frames.frames import InputAudioRawFrame, OutputAudioRawFrame  # noqa: E402
+
+from acshandler.serializers.acs.acs_serializer import ACSFrameSerializer  # noqa: E402
+
+FRAME_BYTES = 640  # 20 ms of PCM16 mono at 16 kHz
+
+
+class LegacyACSFrameSerializer:
+    """The audio paths of ACSFrameSerializer before the fast path."""
+
+    async def serialize(self, frame):
+        audio_b64 = base64.b64encode(frame.audio).decode("utf-8")
+        message = {"Kind": "AudioData", "AudioData": {"Data": audio_b64}}
+        return json.dumps(message)
+
+    async def deserialize(self, data):
+        message = json.loads(data)
+        if message.get("kind") == "AudioData":
+            audio_b64 = message.get("audioData", {}).get("data")
+            if audio_b64:
+                return InputAudioRawFrame(
+                    audio=base64.b64decode(audio_b64), num_channels=1, sample_rate=16000
+                )
+        return None
+
+
+def inbound_message():
+    return json.dumps(
+        {
+            "kind": "AudioData",
+            "audioData": {
+                "timestamp": "2025-01-01T00:00:00.000Z",
+                "participantRawID": "4:+10000000000",
+                "data": base64.b64encode(os.urandom(FRAME_BYTES)).decode(),
+                "silent": False,
+            },
+        },
+        separators=(",", ":"),
+    )
+
+
+async def measure(name, fn, arg, frames):
+    for _ in range(100):
+        await fn(arg)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        await fn(arg)
+    rate = frames / (time.perf_counter() - start)
+
+    samples = min(frames, 2000)
+    peak_total = 0
+    tracemalloc.start()
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = await fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - base
+        del result
+    tracemalloc.stop()
+
+    print(
+        f"{name:>22}: {rate:10.0f} frames/s | {peak_total / samples:7.0f} B allocated/frame"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="ACS serializer microbenchmark")
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    legacy = LegacyACSFrameSerializer()
+    current = ACSFrameSerializer(connection_id="bench")
+    message = inbound_message()
+    frame = OutputAudioRawFrame(
+        audio=os.urandom(FRAME_BYTES), sample_rate=16000, num_channels=1
+    )
+
+    assert (await current.deserialize(message)).audio == (
+        await legacy.deserialize(message)
+    ).audio
+    assert await current.serialize(frame) == await legacy.serialize(frame)
+
+    await measure("legacy deserialize", legacy.deserialize, message, args.frames)
+    await measure("fast-path deserialize", current.deserialize, message, args.frames)
+    await measure("legacy serialize", legacy.serialize, frame, args.frames)
+    await measure("fast-path serialize", current.serialize, frame, args.frames)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,380 @@
+"""Offline load test for the /ws ACS media endpoint.
+
+Opens N concurrent media websockets and streams PCM16 mono audio (at ``ACS_SAMPLE_RATE``) in
+ACS ``AudioData`` frames at real-time pace, for each N in ``--calls``. With
+``--spawn`` it starts its own worker with ``STUB_SERVICES=true``, so STT, LLM
+and TTS are local stubs (services/stubs.py) and no network is needed.
+
+Per level it reports
+  * inbound audio lag: how far the worker falls behind real time reading
+    media (from the worker's ``inbound_audio_lag_ms`` histogram),
+  * outbound jitter: spread of the gaps between audio frames the worker
+    sends, and the share of frames that arrive after a ``--jitter-buffer-ms``
+    playout buffer would have needed them,
+  * accept to first audio and voice-to-voice latency,
+  * worker CPU and RSS per call (read from /proc, so Linux only).
+
+    python benchmarks/ws_load_test.py --spawn --calls 1,10,25,50 --audio caller.wav
+    python benchmarks/ws_load_test.py --spawn --output capacity.jsonl --label v1.4
+
+Without ``--audio`` the callers send low-level noise, which VAD never treats
+as speech; only the greeting turn runs then. Use a recording with speech and
+pauses to exercise full turns.
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import random
+import re
+import struct
+import subprocess
+import sys
+import time
+import wave
+
+import aiohttp
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# same variable as the worker, so a spawned worker and the clients agree
+SAMPLE_RATE = int(os.getenv("ACS_SAMPLE_RATE", "16000"))
+FRAME_BYTES = SAMPLE_RATE * 2 // 50  # 20 ms of PCM16 mono
+FRAME_SECS = FRAME_BYTES / (SAMPLE_RATE * 2)
+
+_BUCKET = re.compile(r'^(\w+)_bucket\{le="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def load_audio(path):
+    if not path:
+        # quiet noise: keeps the inbound path busy without triggering VAD
+        samples = [random.randint(-200, 200) for _ in range(SAMPLE_RATE * 10)]
+        return struct.pack(f"<{len(samples)}h", *samples)
+    with wave.open(path, "rb") as wav:
+        if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (
+            SAMPLE_RATE,
+            1,
+            2,
+        ):
+            raise SystemExit(f"{path}: expected PCM16 mono at {SAMPLE_RATE} Hz")
+        return wav.readframes(wav.getnframes())
+
+
+def audio_messages(audio: bytes):
+    """Pre-encodes the recording as ACS AudioData messages, one per 20 ms frame."""
+    messages = []
+    for offset in range(0, len(audio) - FRAME_BYTES + 1, FRAME_BYTES):
+        messages.append(
+            json.dumps(
+                {
+                    "kind": "AudioData",
+                    "audioData": {
+                        "timestamp": "2025-01-01T00:00:00.000Z",
+                        "participantRawID": "4:+10000000000",
+                        "data": base64.b64encode(
+                            audio[offset : offset + FRAME_BYTES]
+                        ).decode(),
+                        "silent": False,
+                    },
+                }
+            )
+        )
+    return messages
+
+
+AUDIO_METADATA = json.dumps(
+    {
+        "kind": "AudioMetadata",
+        "audioMetadata": {
+            "subscriptionId": "load-test",
+            "encoding": "PCM",
+            "sampleRate": SAMPLE_RATE,
+            "channels": 1,
+            "length": FRAME_BYTES,
+        },
+    }
+)
+
+
+class CallResult:
+    def __init__(self):
+        self.first_audio_ms = None
+        self.gaps_ms = []
+        self.frames = 0
+        self.late_frames = 0
+
+
+async def run_call(
+    session, url, call_id, messages, duration, jitter_buffer, result: CallResult
+):
+    async with session.ws_connect(
+        f"{url}?uuid=load-{call_id}&acsPhoneNumber=%2B1555{call_id:07d}"
+    ) as ws:
+        connected = time.perf_counter()
+        stop = connected + duration
+
+        async def send():
+            await ws.send_str(AUDIO_METADATA)
+            next_send = time.perf_counter()
+            i = random.randrange(len(messages))
+            while next_send < stop:
+                await ws.send_str(messages[i % len(messages)])
+                i += 1
+                next_send += FRAME_SECS
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+            await ws.close()
+
+        sender = asyncio.create_task(send())
+        last_arrival = last_secs = playout_start = None
+        played = 0.0
+        async for message in ws:
+            if (
+                message.type != aiohttp.WSMsgType.TEXT
+                or '"AudioData"' not in message.data
+            ):
+                continue
+            now = time.perf_counter()
+            payload = json.loads(message.data)["AudioData"]["Data"]
+            secs = len(binascii.a2b_base64(payload)) / (SAMPLE_RATE * 2)
+            if result.first_audio_ms is None:
+                result.first_audio_ms = (now - connected) * 1000
+            if playout_start is None or now > playout_start + played + 0.25:
+                # a new utterance: playback starts once the jitter buffer fills
+                playout_start, played = now + jitter_buffer, 0.0
+            else:
+                result.gaps_ms.append((now - last_arrival - last_secs) * 1000)
+            if now > playout_start + played:
+                result.late_frames += 1
+            played += secs
+            result.frames += 1
+            last_arrival, last_secs = now, secs
+        await sender
+
+
+def read_proc(pid):
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    cpu_secs = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/status") as file:
+        rss_kb = int(re.search(r"VmRSS:\s+(\d+)", file.read()).group(1))
+    return cpu_secs, rss_kb / 1024
+
+
+async def scrape_buckets(session, metrics_url):
+    async with session.get(metrics_url) as response:
+        text = await response.text()
+    buckets = {}
+    for name, le, value in _BUCKET.findall(text):
+        buckets.setdefault(name, []).append((float(le), float(value)))
+    return buckets
+
+
+def bucket_percentile(before, after, name, q):
+    """Estimates a percentile from the bucket counts added between two scrapes."""
+    now = after.get(name, [])
+    old = dict(before.get(name, []))
+    counts = [(le, value - old.get(le, 0.0)) for le, value in now]
+    if not counts or counts[-1][1] <= 0:
+        return None
+    target = q * counts[-1][1]
+    lower_le, lower_count = 0.0, 0.0
+    for le, count in counts:
+        if count >= target:
+            if le == float("inf"):
+                return lower_le
+            fraction = (target - lower_count) / max(count - lower_count, 1e-9)
+            return lower_le + (le - lower_le) * fraction
+        lower_le, lower_count = le, count
+    return None
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q * 100)) if values else None
+
+
+async def run_level(args, calls, messages, pid):
+    http_url = args.url.replace("ws://", "http://").replace("wss://", "https://")
+    metrics_url = http_url.rsplit("/", 1)[0] + "/metrics"
+    results = [CallResult() for _ in range(calls)]
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        before = await scrape_buckets(session, metrics_url)
+        baseline = read_proc(pid) if pid else None
+
+        async def staggered(i):
+            # spread connects over a second instead of one thundering herd
+            await asyncio.sleep(i / calls)
+            await run_call(
+                session,
+                args.url,
+                i,
+                messages,
+                args.duration,
+                args.jitter_buffer_ms / 1000,
+                results[i],
+            )
+
+        calls_task = asyncio.gather(*(staggered(i) for i in range(calls)))
+        cpu = rss = None
+        if pid:
+            # measure CPU over the steady part of the run
+            await asyncio.sleep(min(3.0, args.duration / 3))
+            cpu_start, wall_start = read_proc(pid)[0], time.perf_counter()
+            await asyncio.sleep(args.duration / 2)
+            cpu_end, rss_end = read_proc(pid)
+            cpu = (cpu_end - cpu_start) / (time.perf_counter() - wall_start) * 100
+            rss = rss_end - baseline[1]
+        await calls_task
+        # let the worker tear the calls down before the next level
+        await asyncio.sleep(2)
+        after = await scrape_buckets(session, metrics_url)
+
+    gaps = [gap for result in results for gap in result.gaps_ms]
+    frames = sum(result.frames for result in results)
+    first_audio = [
+        result.first_audio_ms for result in results if result.first_audio_ms is not None
+    ]
+    return {
+        "calls": calls,
+        "inbound_lag_p50_ms": bucket_percentile(
+            before, after, "inbound_audio_lag_ms", 0.5
+        ),
+        "inbound_lag_p95_ms": bucket_percentile(
+            before, after, "inbound_audio_lag_ms", 0.95
+        ),
+        "inbound_lag_p99_ms": bucket_percentile(
+            before, after, "inbound_audio_lag_ms", 0.99
+        ),
+        "outbound_jitter_p95_ms": percentile([abs(gap) for gap in gaps], 0.95),
+        "outbound_late_pct": 100
+        * sum(result.late_frames for result in results)
+        / frames
+        if frames
+        else None,
+        "first_audio_p50_ms": percentile(first_audio, 0.5),
+        "voice_to_voice_p95_ms": bucket_percentile(
+            before, after, "turn_voice_to_voice_ms", 0.95
+        ),
+        "cpu_pct_per_call": cpu / calls if cpu is not None else None,
+        "rss_mb_per_call": rss / calls if rss is not None else None,
+    }
+
+
+def spawn_worker(port):
+    env = {**os.environ, "STUB_SERVICES": "true", "RAG_PREFETCH": "false"}
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "server:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return process
+
+
+async def wait_for_worker(url, process):
+    metrics_url = url.replace("ws://", "http://").rsplit("/", 1)[0] + "/metrics"
+    async with aiohttp.ClientSession() as session:
+        for _ in range(120):
+            if process is not None and process.poll() is not None:
+                raise SystemExit("worker exited during startup")
+            try:
+                async with session.get(metrics_url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"worker at {metrics_url} did not come up")
+
+
+def format_row(row):
+    def cell(value, fmt="{:9.1f}"):
+        return fmt.format(value) if value is not None else f"{'-':>9}"
+
+    return (
+        f"{row['calls']:>6} | {cell(row['inbound_lag_p50_ms'])} {cell(row['inbound_lag_p95_ms'])} "
+        f"{cell(row['inbound_lag_p99_ms'])} | {cell(row['outbound_jitter_p95_ms'])} "
+        f"{cell(row['outbound_late_pct'])} | {cell(row['first_audio_p50_ms'])} "
+        f"{cell(row['voice_to_voice_p95_ms'])} | {cell(row['cpu_pct_per_call'])} {cell(row['rss_mb_per_call'])}"
+    )
+
+
+async def main_async(args):
+    messages = audio_messages(load_audio(args.audio))
+    process = spawn_worker(args.port) if args.spawn else None
+    pid = process.pid if process else args.server_pid
+    try:
+        await wait_for_worker(args.url, process)
+        print(
+            f"{'calls':>6} | {'lag p50':>9} {'lag p95':>9} {'lag p99':>9} | {'jit p95':>9} {'late %':>9} | "
+            f"{'1st aud':>9} {'v2v p95':>9} | {'cpu%/call':>9} {'MB/call':>9}"
+        )
+        rows = []
+        for calls in args.calls:
+            row = await run_level(args, calls, messages, pid)
+            rows.append(row)
+            print(format_row(row), flush=True)
+        if args.output:
+            with open(args.output, "a") as file:
+                file.write(
+                    json.dumps(
+                        {"label": args.label, "time": time.time(), "levels": rows}
+                    )
+                    + "\n"
+                )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline load test for the /ws media endpoint"
+    )
+    parser.add_argument(
+        "--calls",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1, 5, 10, 25],
+    )
+    parser.add_argument(
+        "--duration", type=float, default=20.0, help="seconds per level"
+    )
+    parser.add_argument(
+        "--audio", help="PCM16 mono WAV at ACS_SAMPLE_RATE to stream, looped"
+    )
+    parser.add_argument("--jitter-buffer-ms", type=float, default=60.0)
+    parser.add_argument(
+        "--spawn", action="store_true", help="start a stub-service worker"
+    )
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument(
+        "--url", help="media websocket URL, default ws://127.0.0.1:<port>/ws"
+    )
+    parser.add_argument(
+        "--server-pid", type=int, help="worker pid for CPU/RSS when not spawned"
+    )
+    parser.add_argument("--output", help="append the capacity curve as a JSON line")
+    parser.add_argument(
+        "--label", default="", help="release label stored with --output"
+    )
+    args = parser.parse_args()
+    args.url = args.url or f"ws://127.0.0.1:{args.port}/ws"
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,29 @@
 import datetime
 import io
-import os
 import sys
+import time
 import wave
+from typing import Optional
 
 import aiofiles
 from dotenv import load_dotenv
 from fastapi import WebSocket
 from loguru import logger
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.frames.frames import EndFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
-from pipecat.processors.audio.audio_buffer_processor import AudioBufferProcessor
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 from acshandler.serializers.acs.acs_serializer import ACSFrameSerializer
+from acshandler.transports.acs.acs_transport import ACSWebsocketTransport
 
-from pipecat.transports.network.fastapi_websocket import (
-    FastAPIWebsocketParams,
-    FastAPIWebsocketTransport,
-)
+from pipecat.transports.network.fastapi_websocket import FastAPIWebsocketParams
 
-from services.tts_service import TTSService
-from services.llm_service import LLMService
-from services.stt_service import STTService
-from services.context_service import OpenAILLMContextService
+from call_bus import get_call_bus
+from helpers.metrics import get_metrics
+from services.metrics_observer import CallMetricsObserver
+from pipeline_factory import get_pipeline_factory
 
 load_dotenv(override=True)
 
@@ -34,11 +32,15 @@ logger.add(sys.stderr, level="DEBUG")
 logger.info("Starting Pipecat bot...")
 
 
+def recording_filename(server_name: str) -> str:
+    return f"{server_name}_recording_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+
+
 async def save_audio(
     server_name: str, audio: bytes, sample_rate: int, num_channels: int
 ):
     if len(audio) > 0:
-        filename = f"{server_name}_recording_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+        filename = recording_filename(server_name)
         with io.BytesIO() as buffer:
             with wave.open(buffer, "wb") as wf:
                 wf.setsampwidth(2)
@@ -52,63 +54,107 @@ async def save_audio(
         logger.info("No audio data to save")
 
 
-async def run_bot(websocket_client: WebSocket, stream_sid: str, call_sid: str):
+async def run_bot(
+    websocket_client: WebSocket,
+    stream_sid: str,
+    call_sid: str,
+    accepted_at: Optional[float] = None,
+):
+    factory = get_pipeline_factory()
+    accepted_at = accepted_at or time.perf_counter()
+    first_audio_sent = False
+
+    # Per-turn latency breakdowns, exported on /metrics
+    metrics_observer = CallMetricsObserver()
+
+    def on_audio_sent(frame):
+        nonlocal first_audio_sent
+        if not first_audio_sent:
+            first_audio_sent = True
+            greeting_ms = (time.perf_counter() - accepted_at) * 1000
+            get_metrics().observe("greeting_ms", greeting_ms)
+            logger.info(
+                f"Accept to first greeting audio: {greeting_ms:.0f} ms ({stream_sid})"
+            )
+        metrics_observer.on_audio_sent(frame)
+
     # Initialize the appropriate serializer based on the use_acs flag
-    serializer = ACSFrameSerializer(connection_id=call_sid, sample_rate=16000)
+    serializer = ACSFrameSerializer(
+        connection_id=call_sid,
+        sample_rate=factory.audio_format.acs_sample_rate,
+        on_audio_sent=on_audio_sent,
+        on_audio_received=metrics_observer.on_audio_received,
+        on_audio_stopped=metrics_observer.on_audio_stopped,
+    )
 
     # Configure transport parameters based on the serializer type
     transport_params = FastAPIWebsocketParams(
         audio_in_enabled=True,
         audio_out_enabled=True,
         add_wav_header=False,
-        vad_analyzer=SileroVADAnalyzer(),
+        vad_analyzer=factory.create_vad(),
         serializer=serializer,
     )
 
-    transport = FastAPIWebsocketTransport(
+    # Outbound audio goes out in fixed-duration frames paced to real time
+    transport = ACSWebsocketTransport(
         websocket=websocket_client,
         params=transport_params,
+        acs_params=factory.acs_params,
     )
 
-    # Use the new STTService class
-    stt_service = STTService(api_key=os.getenv("DEEPGRAM_API_KEY", ""))
-    stt = stt_service.get_stt()
-
-    # Use the new TTSService class
-    tts_service = TTSService(
-        api_key=os.getenv("ELEVENLABS_API_KEY", ""),
-        voice_id=os.getenv("ELEVENLABS_VOICE_ID", ""),
-        sample_rate=16000,
-    )
-    tts = tts_service.get_tts()
-
-    # Use the new LLMService class
-    llm_service = LLMService(
-        api_key=os.getenv("OPENAI_API_KEY", ""),
-        model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-    )
+    # Services are built from the config, tools and connection pools the
+    # factory prepared at startup
+    stt = factory.create_stt()
+    tts = factory.create_tts()
+    llm_service = factory.create_llm_service()
     llm = llm_service.get_llm()
-    llm_service.register_functions_from_tools()
-
-    context_service = OpenAILLMContextService().get_OpenAILLMcontext()
-
-    context_aggregator = llm.create_context_aggregator(context=context_service)
-
-    # NOTE: Watch out! This will save all the conversation in memory. You can
-    # pass `buffer_size` to get periodic callbacks.
-    audiobuffer = AudioBufferProcessor(user_continuous_stream=True)
-
-    pipeline = Pipeline(
-        [
-            transport.input(),  # Websocket input from client
-            stt,  # Speech-To-Text
-            context_aggregator.user(),  # User responses
-            llm,  # LLM
-            tts,  # Text-To-Speech
-            transport.output(),  # Websocket output to client
-            context_aggregator.assistant(),
-        ]
-    )
+    # Starts knowledge-base searches while the caller is still talking
+    rag_prefetch = factory.create_rag_prefetch(llm_service)
+
+    context_service = factory.create_context()
+    context = context_service.get_OpenAILLMcontext()
+
+    # With fast greeting the intro rendered at startup plays as soon as the
+    # caller connects, and the LLM sees it as its own first turn
+    greeting = factory.get_greeting(call_sid)
+    greeting_player = None
+    if greeting is not None:
+        greeting_text, greeting_audio = greeting
+        context_service.addAssistantMessage(greeting_text)
+        greeting_player = factory.create_greeting_player(
+            websocket_client, serializer, greeting_audio
+        )
+
+    context_aggregator = llm.create_context_aggregator(context=context)
+    # Starts the LLM on stable interim transcripts before the turn ends
+    speculation = factory.create_speculation(llm_service, context)
+    # Summarises older turns between turns so prompts stay within budget
+    context_window = factory.create_context_window(context_service)
+
+    server_name = f"server_unknown"
+    if websocket_client.client:
+        server_name = f"server_{websocket_client.client.port}"
+
+    # In streaming mode the buffer is flushed to the recorder every few
+    # seconds; otherwise the whole call is saved when it ends.
+    audiobuffer = factory.create_audio_buffer()
+    recorder = factory.create_recorder(recording_filename(server_name))
+
+    processors = [
+        transport.input(),  # Websocket input from client
+        stt,  # Speech-To-Text
+        rag_prefetch,  # Speculative knowledge-base search
+        speculation,  # Speculative LLM completion
+        context_aggregator.user(),  # User responses
+        llm,  # LLM
+        tts,  # Text-To-Speech
+        transport.output(),  # Websocket output to client
+        audiobuffer,  # Call recording
+        context_aggregator.assistant(),
+        context_window,  # Context compaction
+    ]
+    pipeline = Pipeline([p for p in processors if p is not None])
 
     # Configure pipeline based on serializer type
     audio_sample_rate = serializer.sample_rate
@@ -121,27 +167,38 @@ async def run_bot(websocket_client: WebSocket, stream_sid: str, call_sid: str):
             allow_interruptions=True,
             enable_metrics=True,
         ),
+        observers=[o for o in (metrics_observer, greeting_player) if o is not None],
     )
 
+    # end_call and transfer_call act on the call from inside its pipeline
+    call_control = factory.create_call_control(stream_sid, call_sid, task)
+    llm_service.call_control = call_control
+
     @transport.event_handler("on_client_connected")
     async def on_client_connected(transport, client):
+        if greeting_player is not None:
+            greeting_player.start()
         # Start recording.
         await audiobuffer.start_recording()
-        # Kick off the conversation.
-        system_message = OpenAILLMContextService()
-        system_message.updateContext("Please introduce yourself")
-        await task.queue_frames([context_aggregator.user().get_context_frame()])
+        if greeting_player is None:
+            # Kick off the conversation.
+            context_service.updateContext("Please introduce yourself")
+            await task.queue_frames([context_aggregator.user().get_context_frame()])
 
     @transport.event_handler("on_client_disconnected")
     async def on_client_disconnected(transport, client):
+        if recorder:
+            # flush the last window and patch the WAV header
+            await audiobuffer.stop_recording()
+            await recorder.close()
         await task.cancel()
 
     @audiobuffer.event_handler("on_audio_data")
     async def on_audio_data(buffer, audio, sample_rate, num_channels):
-        server_name = f"server_unknown"
-        if websocket_client.client:
-            server_name = f"server_{websocket_client.client.port}"
-        await save_audio(server_name, audio, sample_rate, num_channels)
+        if recorder:
+            await recorder.write(audio, sample_rate, num_channels)
+        else:
+            await save_audio(server_name, audio, sample_rate, num_channels)
 
     # We use `handle_sigint=False` because `uvicorn` is controlling keyboard
     # interruptions. We use `force_gc=True` to force garbage collection after
@@ -149,4 +206,24 @@ async def run_bot(websocket_client: WebSocket, stream_sid: str, call_sid: str):
     # applications with multiple clients connecting.
     runner = PipelineRunner(handle_sigint=False, force_gc=True)
 
-    await runner.run(task)
+    async def on_control(action, payload):
+        # Control actions published by whichever worker got the ACS callback
+        if action == "terminate":
+            await task.cancel()
+        elif action == "transfer":
+            # EndFrame sends StopAudio, so the caller is not talked over mid-transfer
+            await task.queue_frame(EndFrame())
+
+    call_bus = get_call_bus()
+    await call_bus.register(stream_sid, on_control)
+
+    try:
+        await runner.run(task)
+    finally:
+        if greeting_player is not None:
+            await greeting_player.stop()
+        await call_bus.unregister(stream_sid)
+        # hang up or transfer once the last sentence has played
+        await call_control.finish()
+        if recorder:
+            await recorder.close()
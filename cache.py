@@ -1,9 +1,125 @@
 import threading
 import redis
+import redis.asyncio as aioredis
 import json
 import os
 from urllib.parse import urlparse
 
+# Dicts are stored as hashes (one JSON-encoded value per field) and lists as
+# Redis lists, so merges and appends happen server-side in a single round trip.
+# Redis drops a list once it is empty, so an empty list is kept as the string
+# "[]", which becomes a Redis list on its first append. Keys written as JSON
+# strings by earlier versions are migrated the same way: a list turns into a
+# Redis list before the append, and a dict into a hash before the merge.
+# ARGV: kind (hash|list|value), ttl in seconds (0 keeps none), the whole value
+# as JSON, then the hash field/value pairs or the list items.
+_SET_SCRIPT = """
+local kind = ARGV[1]
+local current = redis.call('TYPE', KEYS[1]).ok
+if current == 'string' then
+    local raw = redis.call('GET', KEYS[1])
+    local ok, old = pcall(cjson.decode, raw)
+    if ok and type(old) == 'table' and string.sub(raw, 1, 1) == '[' then
+        redis.call('DEL', KEYS[1])
+        for _, item in ipairs(old) do
+            redis.call('RPUSH', KEYS[1], cjson.encode(item))
+        end
+        current = 'list'
+    elseif ok and type(old) == 'table' and kind == 'hash' and next(old) ~= nil then
+        redis.call('DEL', KEYS[1])
+        for field, item in pairs(old) do
+            redis.call('HSET', KEYS[1], field, cjson.encode(item))
+        end
+        current = 'hash'
+    end
+end
+if current == 'list' then
+    redis.call('RPUSH', KEYS[1], ARGV[3])
+elseif kind == 'hash' and #ARGV > 3 then
+    if current ~= 'hash' and current ~= 'none' then
+        redis.call('DEL', KEYS[1])
+    end
+    redis.call('HSET', KEYS[1], unpack(ARGV, 4))
+elseif kind == 'hash' and current == 'hash' then
+    -- merging an empty dict only refreshes the expiry
+elseif kind == 'list' and #ARGV > 3 then
+    redis.call('DEL', KEYS[1])
+    redis.call('RPUSH', KEYS[1], unpack(ARGV, 4))
+else
+    redis.call('SET', KEYS[1], ARGV[3])
+end
+if tonumber(ARGV[2]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return current
+"""
+
+_GET_SCRIPT = """
+local current = redis.call('TYPE', KEYS[1]).ok
+if current == 'hash' then
+    return {current, redis.call('HGETALL', KEYS[1])}
+elseif current == 'list' then
+    return {current, redis.call('LRANGE', KEYS[1], 0, -1)}
+elseif current == 'string' then
+    return {current, {redis.call('GET', KEYS[1])}}
+end
+return {current, {}}
+"""
+
+
+def _loads(value):
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def _encode(value, ex):
+    """Builds the ARGV for the set script."""
+    if isinstance(value, dict):
+        kind = "hash"
+        items = [x for k, v in value.items() for x in (str(k), json.dumps(v))]
+    elif isinstance(value, list):
+        kind = "list"
+        items = [json.dumps(v) for v in value]
+    else:
+        kind = "value"
+        items = []
+    return [kind, ex or 0, json.dumps(value), *items]
+
+
+def _decode(reply):
+    """Turns the get script reply back into the stored Python value."""
+    kind, items = reply
+    if kind == "hash":
+        return {items[i]: _loads(items[i + 1]) for i in range(0, len(items), 2)}
+    if kind == "list":
+        return [_loads(v) for v in items]
+    if kind == "string" and items[0]:
+        return _loads(items[0])
+    return None
+
+
+def _connection_kwargs(connection_string):
+    """Parses an Azure Redis connection string into client keyword arguments."""
+    parsed_url = urlparse(connection_string)
+    host, port, password = (
+        parsed_url[0],
+        parsed_url[2][:4],
+        parsed_url[2][14:].split(",")[0],
+    )
+    return {
+        "host": host,
+        "port": port,
+        "password": password,
+        "ssl": True,  # Azure Redis uses SSL/TLS
+        "decode_responses": True,
+    }
+
+
+def _is_redis_url(connection_string):
+    return connection_string.startswith(("redis://", "rediss://", "unix://"))
+
 
 class RedisCache:
     """Redis-based cache using Azure Redis connection string."""
@@ -12,46 +128,34 @@ class RedisCache:
         if not connection_string:
             raise ValueError("Redis connection string is required")
         self.client = self._connect_redis(connection_string)
+        self._set_script = self.client.register_script(_SET_SCRIPT)
+        self._get_script = self.client.register_script(_GET_SCRIPT)
 
     def _connect_redis(self, connection_string):
         """Parses the connection string and establishes a Redis connection."""
         try:
-            parsed_url = urlparse(connection_string)
-            host, port, password = (
-                parsed_url[0],
-                parsed_url[2][:4],
-                parsed_url[2][14:].split(",")[0],
-            )
-            return redis.StrictRedis(
-                host=host,
-                port=port,
-                password=password,
-                ssl=True,  # Azure Redis uses SSL/TLS
-                decode_responses=True,
-            )
+            if _is_redis_url(connection_string):
+                return redis.StrictRedis.from_url(
+                    connection_string, decode_responses=True
+                )
+            return redis.StrictRedis(**_connection_kwargs(connection_string))
         except Exception as e:
             raise ConnectionError(f"Failed to connect to Redis: {str(e)}")
 
     def get(self, key):
-        value = self.client.get(key)
-        try:
-            return json.loads(value) if value else None
-        except json.JSONDecodeError:
-            return value
+        return _decode(self._get_script(keys=[key]))
 
     def set(self, key, value, ex=3600):
-        """Set a value in Redis with an optional expiration time (in seconds)."""
-        existing_value = self.get(key)
-        value_to_store = None
-        if isinstance(existing_value, dict) and isinstance(value, dict):
-            existing_value.update(value)
-            value_to_store = json.dumps(existing_value)
-        elif isinstance(existing_value, list):
-            existing_value.append(value)
-            value_to_store = json.dumps(existing_value)
-        else:
-            value_to_store = json.dumps(value)
-        self.client.set(key, value_to_store, ex=ex)
+        """Set a value in Redis with an optional expiration time (in seconds).
+
+        Dicts are merged into an existing dict and anything is appended to an
+        existing list, atomically and in one round trip.
+        """
+        self._set_script(keys=[key], args=_encode(value, ex))
+
+    def add(self, key, value, ex=3600):
+        """Sets ``key`` only if it does not exist yet; returns whether it was set."""
+        return bool(self.client.set(key, json.dumps(value), nx=True, ex=ex))
 
     def delete(self, key):
         self.client.delete(key)
@@ -60,8 +164,56 @@ class RedisCache:
         return self.client.dbsize()
 
 
-# Global cache instance
+class AsyncRedisCache:
+    """asyncio-native counterpart of RedisCache backed by a connection pool."""
+
+    def __init__(self, connection_string, max_connections=50):
+        if not connection_string:
+            raise ValueError("Redis connection string is required")
+        self.client = self._connect_redis(connection_string, max_connections)
+        self._set_script = self.client.register_script(_SET_SCRIPT)
+        self._get_script = self.client.register_script(_GET_SCRIPT)
+
+    def _connect_redis(self, connection_string, max_connections):
+        """Parses the connection string and builds a pooled asyncio client."""
+        try:
+            if _is_redis_url(connection_string):
+                return aioredis.Redis.from_url(
+                    connection_string,
+                    decode_responses=True,
+                    max_connections=max_connections,
+                )
+            return aioredis.Redis(
+                max_connections=max_connections,
+                **_connection_kwargs(connection_string),
+            )
+        except Exception as e:
+            raise ConnectionError(f"Failed to connect to Redis: {str(e)}")
+
+    async def get(self, key):
+        return _decode(await self._get_script(keys=[key]))
+
+    async def set(self, key, value, ex=3600):
+        """Same merge semantics as RedisCache.set, without blocking the event loop."""
+        await self._set_script(keys=[key], args=_encode(value, ex))
+
+    async def add(self, key, value, ex=3600):
+        """Sets ``key`` only if it does not exist yet; returns whether it was set."""
+        return bool(await self.client.set(key, json.dumps(value), nx=True, ex=ex))
+
+    async def delete(self, key):
+        await self.client.delete(key)
+
+    async def size(self):
+        return await self.client.dbsize()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+# Global cache instances
 _cache = None
+_async_cache = None
 _lock = threading.Lock()
 
 
@@ -76,6 +228,28 @@ def get_cache():
     return _cache
 
 
+def get_async_cache():
+    """Returns a singleton asyncio Redis cache instance."""
+    global _async_cache
+    if _async_cache is None:
+        with _lock:
+            if _async_cache is None:
+                redis_connection_string = os.getenv("AZURE_REDIS_CONNECTION_STRING")
+                _async_cache = AsyncRedisCache(
+                    redis_connection_string,
+                    max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                )
+    return _async_cache
+
+
+async def close_async_cache():
+    """Closes the asyncio Redis cache pool if it was ever created."""
+    global _async_cache
+    if _async_cache is not None:
+        await _async_cache.close()
+        _async_cache = None
+
+
 # testing the cache
 if __name__ == "__main__":
     try:
@@ -87,5 +261,8 @@ if __name__ == "__main__":
         print(cache.get("key2"))  # Output: {'a': 1, 'b': 2}
         cache.set("key2", {"c": 1, "d": 2})
         print(cache.get("key2"))  # Output: {'a': 1, 'b': 2, 'c': 1}
+        cache.set("key3", [1])
+        cache.set("key3", 2)
+        print(cache.get("key3"))  # Output: [1, 2]
     except Exception as e:
         print(f"Error initializing Redis cache: {str(e)}")
@@ -0,0 +1,115 @@
+import os
+
+import aiohttp
+from azure.communication.callautomation.aio import CallAutomationClient
+from azure.core.pipeline.transport import AioHttpTransport
+
+
+class CallAutomationService:
+    """Async ACS Call Automation client backed by a pooled aiohttp session.
+
+    Every call-control request (answer, hang up, transfer, ...) is awaited on
+    the event loop instead of blocking it, so call-control latency never
+    stalls the media websockets of calls that are already connected.
+    """
+
+    def __init__(self, connection_string, pool_size=100):
+        if not connection_string:
+            raise ValueError("ACS connection string is required")
+        self._connection_string = connection_string
+        self._pool_size = pool_size
+        self._session = None
+        self._client = None
+
+    @property
+    def client(self) -> CallAutomationClient:
+        """Lazily creates the client; the aiohttp session must be bound to a running loop."""
+        if self._client is None:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._client = CallAutomationClient.from_connection_string(
+                self._connection_string,
+                transport=AioHttpTransport(session=self._session, session_owner=False),
+            )
+        return self._client
+
+    async def answer_call(
+        self,
+        incoming_call_context,
+        callback_url,
+        media_streaming,
+        operation_context="incomingCall",
+    ):
+        return await self.client.answer_call(
+            incoming_call_context=incoming_call_context,
+            operation_context=operation_context,
+            callback_url=callback_url,
+            media_streaming=media_streaming,
+        )
+
+    async def reject_call(self, incoming_call_context, call_reject_reason=None):
+        await self.client.reject_call(
+            incoming_call_context, call_reject_reason=call_reject_reason
+        )
+
+    async def redirect_call(self, incoming_call_context, target_participant):
+        await self.client.redirect_call(incoming_call_context, target_participant)
+
+    async def get_call_properties(self, call_connection_id):
+        return await self.client.get_call_connection(
+            call_connection_id
+        ).get_call_properties()
+
+    async def hang_up(self, call_connection_id, is_for_everyone=True):
+        await self.client.get_call_connection(call_connection_id).hang_up(
+            is_for_everyone=is_for_everyone
+        )
+
+    async def transfer_call_to_participant(
+        self,
+        call_connection_id,
+        target_participant,
+        source_caller_id_number,
+        operation_context,
+        operation_callback_url,
+    ):
+        return await self.client.get_call_connection(
+            call_connection_id
+        ).transfer_call_to_participant(
+            target_participant=target_participant,
+            source_caller_id_number=source_caller_id_number,
+            operation_context=operation_context,
+            operation_callback_url=operation_callback_url,
+        )
+
+    async def close(self):
+        """Closes the client and its pooled HTTP session."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# Global call automation instance
+_call_automation = None
+
+
+def get_call_automation():
+    """Returns a singleton async Call Automation service."""
+    global _call_automation
+    if _call_automation is None:
+        _call_automation = CallAutomationService(
+            os.getenv("ACS_CONNECTION_STRING", ""),
+            pool_size=int(os.getenv("ACS_HTTP_POOL_SIZE", "100")),
+        )
+    return _call_automation
+
+
+async def close_call_automation():
+    """Closes the Call Automation service if it was ever created."""
+    global _call_automation
+    if _call_automation is not None:
+        await _call_automation.close()
+        _call_automation = None
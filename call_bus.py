@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+
+from loguru import logger
+
+from cache import get_async_cache
+
+_CALL_CHANNEL = "call_bus:call:"
+_WORKER_CHANNEL = "call_bus:worker:"
+
+
+class CallBus:
+    """Routes control actions to the worker that owns a call's media pipeline.
+
+    With several workers (or hosts), the ``/api/callbacks/{contextId}`` request
+    for a call often lands on a different worker than its ``/ws`` socket. The
+    owning worker registers a handler per call and subscribes to that call's
+    Redis pub/sub channel; any worker can then ``publish`` an action and learn
+    from the subscriber count whether an owner received it.
+    """
+
+    def __init__(self, redis_client, worker_id=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._redis = redis_client
+        self._pubsub = None
+        self._listener = None
+        self._handlers = {}
+        self._tasks = set()
+
+    async def start(self):
+        if self._listener is not None or self._redis is None:
+            return
+        try:
+            pubsub = self._redis.pubsub()
+            # the worker channel keeps the connection subscribed while no calls are
+            await pubsub.subscribe(_WORKER_CHANNEL + self.worker_id)
+        except Exception as e:
+            # a single worker still works, it just cannot hear other workers
+            logger.error(f"Call bus unavailable, control actions stay local: {e}")
+            return
+        self._pubsub = pubsub
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"Call bus started for worker {self.worker_id}")
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def register(self, context_id: str, handler):
+        """Makes this worker the owner of ``context_id``.
+
+        ``handler(action, payload)`` is awaited for every action published to
+        the call, wherever it was published from.
+        """
+        self._handlers[context_id] = handler
+        if self._pubsub is not None:
+            await self._pubsub.subscribe(_CALL_CHANNEL + context_id)
+
+    async def unregister(self, context_id: str):
+        self._handlers.pop(context_id, None)
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(_CALL_CHANNEL + context_id)
+
+    async def publish(self, context_id: str, action: str, payload=None) -> bool:
+        """Delivers an action to the call's owner; returns False if no worker owns it."""
+        handler = self._handlers.get(context_id)
+        if handler is not None:
+            # owned here, skip the round trip through Redis
+            await self._run(handler, context_id, action, payload or {})
+            return True
+        if self._pubsub is None:
+            return False
+        message = json.dumps(
+            {"action": action, "payload": payload or {}, "from": self.worker_id}
+        )
+        return await self._redis.publish(_CALL_CHANNEL + context_id, message) > 0
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Call bus listener error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"]
+            if not channel.startswith(_CALL_CHANNEL):
+                continue
+            context_id = channel[len(_CALL_CHANNEL) :]
+            handler = self._handlers.get(context_id)
+            if handler is None:
+                continue
+            data = json.loads(message["data"])
+            # handlers may take a while; keep reading the channel meanwhile
+            task = asyncio.create_task(
+                self._run(handler, context_id, data["action"], data["payload"])
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, handler, context_id, action, payload):
+        try:
+            await handler(action, payload)
+        except Exception as e:
+            logger.error(f"Call bus handler for {context_id} failed on '{action}': {e}")
+
+
+# Global call bus instance
+_call_bus = None
+_lock = threading.Lock()
+
+
+def get_call_bus():
+    """Returns the process-wide call bus, sharing the async cache's Redis pool."""
+    global _call_bus
+    if _call_bus is None:
+        with _lock:
+            if _call_bus is None:
+                redis_client = None
+                if os.getenv("AZURE_REDIS_CONNECTION_STRING"):
+                    redis_client = get_async_cache().client
+                _call_bus = CallBus(redis_client)
+    return _call_bus
+
+
+async def close_call_bus():
+    """Stops the call bus listener if it was ever created."""
+    global _call_bus
+    if _call_bus is not None:
+        await _call_bus.close()
+        _call_bus = None
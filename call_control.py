@@ -0,0 +1,136 @@
+import asyncio
+
+from azure.communication.callautomation import PhoneNumberIdentifier
+from loguru import logger
+from pipecat.frames.frames import (
+    BotStoppedSpeakingFrame,
+    EndFrame,
+    StartInterruptionFrame,
+    TTSSpeakFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+from cache import get_async_cache
+from call_automation import get_call_automation
+
+GOODBYE = "Thank you for calling. Goodbye."
+TRANSFER_NOTICE = "Please hold while I transfer you to an agent."
+
+
+class CallControl(BaseObserver):
+    """Ends or transfers a call from inside its own pipeline.
+
+    The LLM's ``end_call`` and ``transfer_call`` tools run on the worker that
+    owns the call's media, so they act here directly instead of posting to
+    ``/api/callbacks`` and coming back through the call bus. Each action
+    speaks a last sentence and queues an EndFrame, which lets that audio
+    play out; :meth:`finish` then hangs up or transfers the call through
+    Call Automation once the pipeline has stopped.
+
+    A caller who talks over that sentence interrupts the pipeline, which
+    drops the queued EndFrame with it. As an observer of the pipeline it
+    queues the EndFrame again once the interrupted audio or the caller has
+    stopped, and if the call has still not ended ``end_timeout`` seconds
+    after the action it cancels the pipeline.
+    """
+
+    def __init__(
+        self,
+        context_id: str,
+        acs_phone_number: str,
+        task,
+        agent_phone_number: str | None = None,
+        end_timeout: float = 15.0,
+    ):
+        super().__init__()
+        self._context_id = context_id
+        self._acs_phone_number = acs_phone_number
+        self._task = task
+        self._agent_phone_number = agent_phone_number
+        self._end_timeout = end_timeout
+        # "hang_up" or "transfer" once the LLM has asked for it
+        self.action = None
+        self._interrupted = False
+        self._watchdog = None
+
+    async def end_call(self, reason: str = "") -> str:
+        if self.action is not None:
+            return "The call is already ending."
+        self.action = "hang_up"
+        logger.info(f"Ending call {self._context_id}: {reason}")
+        await self._end_after(GOODBYE)
+        return "The call is ending."
+
+    async def transfer_call(self) -> str:
+        if self.action is not None:
+            return "The call is already ending."
+        if not self._agent_phone_number:
+            return "No agent is available to take the call. Offer to help the caller yourself."
+        self.action = "transfer"
+        logger.info(
+            f"Transferring call {self._context_id} to {self._agent_phone_number}"
+        )
+        await self._end_after(TRANSFER_NOTICE)
+        return "The call is being transferred to an agent."
+
+    async def _end_after(self, notice: str):
+        await self._task.queue_frames([TTSSpeakFrame(notice), EndFrame()])
+        self._watchdog = asyncio.create_task(self._end_by_deadline())
+
+    async def on_push_frame(self, data: FramePushed):
+        if self.action is None:
+            return
+        frame = data.frame
+        if isinstance(frame, StartInterruptionFrame):
+            self._interrupted = True
+        elif self._interrupted and isinstance(
+            frame, (BotStoppedSpeakingFrame, UserStoppedSpeakingFrame)
+        ):
+            # the interruption has passed through the pipeline by now
+            self._interrupted = False
+            logger.debug(f"Call {self._context_id}: notice interrupted, ending now")
+            await self._task.queue_frame(EndFrame())
+
+    async def _end_by_deadline(self):
+        await asyncio.sleep(self._end_timeout)
+        # cancelling the pipeline leads to finish(), which must not cancel this
+        self._watchdog = None
+        if not self._task.has_finished():
+            logger.warning(
+                f"Call {self._context_id} did not end in {self._end_timeout}s, cancelling"
+            )
+            await self._task.cancel()
+
+    async def finish(self):
+        """Carries out the requested action; call once the pipeline has finished."""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        if self.action is None:
+            return
+        call = await get_async_cache().get(self._context_id) or {}
+        call_connection_id = call.get("callConnectionId")
+        if not call_connection_id:
+            logger.warning(
+                f"No call connection for {self._context_id}, cannot {self.action}"
+            )
+            return
+        try:
+            if self.action == "hang_up":
+                await get_call_automation().hang_up(
+                    call_connection_id, is_for_everyone=True
+                )
+                await get_async_cache().delete(self._context_id)
+            else:
+                await get_call_automation().transfer_call_to_participant(
+                    call_connection_id,
+                    target_participant=PhoneNumberIdentifier(self._agent_phone_number),
+                    source_caller_id_number=PhoneNumberIdentifier(
+                        self._acs_phone_number
+                    ),
+                    operation_context="TransferCallToAgent",
+                    operation_callback_url=None,
+                )
+            logger.info(f"Call {self._context_id}: {self.action} done")
+        except Exception as e:
+            logger.error(f"Call {self._context_id}: {self.action} failed: {e}")
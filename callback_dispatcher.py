@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from cachetools import TTLCache
+from loguru import logger
+
+from helpers.metrics import get_metrics
+
+
+class CallbackDispatcher:
+    """Registry-based dispatcher for ACS call callback events.
+
+    Handlers are registered once per event type with :meth:`on`. Each call
+    (``contextId``) gets its own queue drained by its own task, so a call's
+    events run in the order they arrived while different calls proceed
+    concurrently: a slow transfer on one call never holds up ``CallConnected``
+    on another. Events are deduplicated by their id and handler latency is
+    recorded per event type.
+    """
+
+    def __init__(self, dedupe_ttl=600, idle_timeout=30.0):
+        self._handlers = {}
+        self._queues = {}
+        self._workers = {}
+        self._seen = TTLCache(maxsize=10000, ttl=dedupe_ttl)
+        self._idle_timeout = idle_timeout
+
+    def on(self, event_type: str):
+        """Decorator registering ``handler(context_id, event_data)`` for an event type."""
+
+        def register(handler):
+            self._handlers[event_type] = handler
+            return handler
+
+        return register
+
+    def dispatch(self, context_id: str, events) -> int:
+        """Queues a batch of events for a call; returns how many were new."""
+        queued = 0
+        for event in events:
+            event_id = event.get("id")
+            if event_id:
+                if event_id in self._seen:
+                    logger.info(f"Skipping duplicate event {event_id} for {context_id}")
+                    continue
+                self._seen[event_id] = True
+            queue = self._queues.get(context_id)
+            if queue is None:
+                queue = self._queues[context_id] = asyncio.Queue()
+                self._workers[context_id] = asyncio.create_task(
+                    self._drain(context_id, queue)
+                )
+            queue.put_nowait((time.perf_counter(), event))
+            queued += 1
+        return queued
+
+    async def close(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+    async def _drain(self, context_id, queue):
+        metrics = get_metrics()
+        try:
+            while True:
+                try:
+                    received_at, event = await asyncio.wait_for(
+                        queue.get(), timeout=self._idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    # no await between here and the removal, so no event can slip in
+                    return
+                event_type = event["type"]
+                handler = self._handlers.get(event_type)
+                if handler is None:
+                    logger.info(
+                        f"Unhandled event type: {event_type}, contextId: {context_id}"
+                    )
+                    continue
+                event_data = event["data"]
+                # setting contextId to event data
+                event_data["contextId"] = context_id
+                started = time.perf_counter()
+                try:
+                    await handler(context_id, event_data)
+                except Exception as e:
+                    logger.error(
+                        f"Handler for {event_type} failed for {context_id}: {e}"
+                    )
+                    metrics.inc(
+                        "callback_errors_total", event=event_type.rsplit(".", 1)[-1]
+                    )
+                finished = time.perf_counter()
+                labels = {"event": event_type.rsplit(".", 1)[-1]}
+                metrics.observe(
+                    "callback_handler_ms", (finished - started) * 1000, **labels
+                )
+                metrics.observe(
+                    "callback_queue_ms", (started - received_at) * 1000, **labels
+                )
+        finally:
+            if self._queues.get(context_id) is queue:
+                del self._queues[context_id]
+                del self._workers[context_id]
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from loguru import logger
+
+from helpers.metrics import get_metrics
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep.
+
+    A worker that keeps up wakes within a millisecond or two; once it has
+    more live pipelines than it can run in real time the lag climbs, and with
+    it the audio jitter of every call on the worker.
+    """
+
+    def __init__(self, interval=0.1, window=10):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._task = None
+
+    @property
+    def lag_ms(self) -> float:
+        """Worst lag over the recent window, in milliseconds."""
+        return max(self._samples, default=0.0)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        metrics = get_metrics()
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self._samples.append(lag)
+            metrics.observe("event_loop_lag_ms", lag)
+
+
+class AdmissionController:
+    """Caps the live call pipelines a worker runs.
+
+    A call holds a reservation from the moment it is admitted until its media
+    websocket connects and :meth:`session` takes over, so a burst of incoming
+    calls cannot all be answered before any of them shows up as active.
+    Admitting returns a token for the reservation; the websocket hands it to
+    :meth:`session`, and a call that fails to be answered gives it back with
+    :meth:`release`.
+    The worker counts as saturated when active plus reserved calls reach
+    ``max_calls`` or the event-loop lag exceeds ``max_loop_lag_ms``.
+    """
+
+    def __init__(
+        self, max_calls=25, max_loop_lag_ms=50.0, reservation_ttl=30.0, worker_id=None
+    ):
+        self.max_calls = max_calls
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.reservation_ttl = reservation_ttl
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.monitor = LoopLagMonitor()
+        self.active = 0
+        self._reservations = OrderedDict()  # token -> reserved at
+        self._released = asyncio.Event()
+        self._heartbeat = None
+
+    @property
+    def reserved(self) -> int:
+        # reservations whose websocket never arrived (caller hung up) expire
+        cutoff = time.monotonic() - self.reservation_ttl
+        while self._reservations and next(iter(self._reservations.values())) < cutoff:
+            self._reservations.popitem(last=False)
+        return len(self._reservations)
+
+    def saturated(self) -> bool:
+        return (
+            self.active + self.reserved >= self.max_calls
+            or self.monitor.lag_ms > self.max_loop_lag_ms
+        )
+
+    def try_admit(self) -> str | None:
+        """Reserves a slot for a new call if the worker has room.
+
+        Returns the reservation's token, or None if the worker is saturated.
+        """
+        if self.saturated():
+            return None
+        token = uuid.uuid4().hex
+        self._reservations[token] = time.monotonic()
+        return token
+
+    async def admit(self, timeout: float) -> str | None:
+        """Waits up to ``timeout`` seconds for a slot to free up."""
+        deadline = time.monotonic() + timeout
+        while (token := self.try_admit()) is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._released.clear()
+            try:
+                # lag recovers without a release, so poll at least every second
+                await asyncio.wait_for(
+                    self._released.wait(), timeout=min(remaining, 1.0)
+                )
+            except asyncio.TimeoutError:
+                pass
+        return token
+
+    def release(self, token: str):
+        """Gives back the reservation of a call that will not connect."""
+        if self._reservations.pop(token, None) is not None:
+            self._released.set()
+
+    @asynccontextmanager
+    async def session(self, token: str | None = None):
+        """Counts a running call pipeline, consuming its reservation.
+
+        Without a token, or with one this worker did not hand out (the
+        websocket reached another worker), no reservation is consumed.
+        """
+        if token:
+            self._reservations.pop(token, None)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._released.set()
+
+    def load(self) -> dict:
+        return {
+            "worker": self.worker_id,
+            "active": self.active,
+            "reserved": self.reserved,
+            "capacity": self.max_calls,
+            "loop_lag_ms": round(self.monitor.lag_ms, 1),
+            "saturated": self.saturated(),
+        }
+
+    async def start(self, cache=None, heartbeat_interval=5.0):
+        """Starts the lag monitor and, given a cache, publishes load to it."""
+        self.monitor.start()
+        if cache is not None and self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(
+                self._publish_load(cache, heartbeat_interval)
+            )
+
+    async def stop(self):
+        await self.monitor.stop()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def _publish_load(self, cache, interval):
+        # expires unless refreshed, so dead workers drop out on their own
+        while True:
+            try:
+                await cache.set(
+                    f"worker_load:{self.worker_id}", self.load(), ex=int(interval * 3)
+                )
+            except Exception as e:
+                logger.warning(f"Failed to publish worker load: {e}")
+            await asyncio.sleep(interval)
+
+
+# Global admission controller
+_admission = None
+_lock = threading.Lock()
+
+
+def get_admission():
+    """Returns this worker's admission controller."""
+    global _admission
+    if _admission is None:
+        with _lock:
+            if _admission is None:
+                _admission = AdmissionController(
+                    max_calls=int(os.getenv("ADMISSION_MAX_CALLS", "25")),
+                    max_loop_lag_ms=float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "50")),
+                )
+    return _admission
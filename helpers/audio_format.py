@@ -0,0 +1,110 @@
+import dataclasses
+
+import numpy as np
+
+# PCM rates each end of the pipeline can produce or consume natively
+ACS_SAMPLE_RATES = (16000, 24000)
+ELEVENLABS_SAMPLE_RATES = (16000, 22050, 24000, 44100)
+SILERO_SAMPLE_RATES = (8000, 16000)
+
+
+@dataclasses.dataclass(frozen=True)
+class AudioFormatPlan:
+    """Sample rates for every stage of a call, decided in one place.
+
+    Deepgram takes linear16 at any rate and ElevenLabs renders PCM at every
+    rate ACS offers, so both run at the ACS rate and audio passes through
+    them untouched; pipecat only resamples when a frame's rate differs from
+    the transport's. Silero is the exception: at 24 kHz the VAD gets its
+    own 16 kHz copy through a :class:`StreamingResampler`.
+    """
+
+    acs_sample_rate: int
+    stt_sample_rate: int
+    stt_encoding: str
+    tts_sample_rate: int
+    vad_sample_rate: int
+
+    @property
+    def tts_output_format(self) -> str:
+        return f"pcm_{self.tts_sample_rate}"
+
+    @property
+    def resampled_stages(self) -> list:
+        stages = []
+        for stage in ("stt", "tts", "vad"):
+            if getattr(self, f"{stage}_sample_rate") != self.acs_sample_rate:
+                stages.append(stage)
+        return stages
+
+
+def negotiate_audio_format(acs_sample_rate: int = 16000) -> AudioFormatPlan:
+    """Picks the rate of each stage for an ACS stream at ``acs_sample_rate``."""
+    if acs_sample_rate not in ACS_SAMPLE_RATES:
+        raise ValueError(
+            f"ACS streams audio at {ACS_SAMPLE_RATES} Hz, not {acs_sample_rate}"
+        )
+
+    def closest(supported):
+        if acs_sample_rate in supported:
+            return acs_sample_rate
+        return min(supported, key=lambda rate: abs(rate - acs_sample_rate))
+
+    return AudioFormatPlan(
+        acs_sample_rate=acs_sample_rate,
+        stt_sample_rate=acs_sample_rate,
+        stt_encoding="linear16",
+        tts_sample_rate=closest(ELEVENLABS_SAMPLE_RATES),
+        vad_sample_rate=closest(SILERO_SAMPLE_RATES),
+    )
+
+
+class StreamingResampler:
+    """Resamples a continuous 16-bit mono stream chunk by chunk.
+
+    pipecat's default resampler runs soxr on every chunk independently,
+    which pays the filter set-up each time and clicks at chunk edges. This
+    one keeps the filter history and the fractional read position between
+    chunks, so a call's audio is resampled as one stream. Downsampling
+    goes through a windowed-sinc low-pass first, then linear interpolation;
+    all of it is vectorised with numpy.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps: int = 31):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self._step = in_rate / out_rate
+        self._fir = None
+        if out_rate < in_rate:
+            # cut just below the new Nyquist frequency
+            cutoff = 0.9 * out_rate / in_rate
+            n = np.arange(taps) - (taps - 1) / 2
+            fir = cutoff * np.sinc(cutoff * n) * np.hamming(taps)
+            self._fir = (fir / fir.sum()).astype(np.float32)
+            self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._tail = None
+        self._phase = 0.0
+
+    def process(self, audio: bytes) -> bytes:
+        if self.in_rate == self.out_rate or not audio:
+            return audio
+        x = np.frombuffer(audio, dtype=np.int16).astype(np.float32)
+        if self._fir is not None:
+            padded = np.concatenate((self._history, x))
+            self._history = padded[-(len(self._fir) - 1) :]
+            x = np.convolve(padded, self._fir, mode="valid")
+        if self._tail is not None:
+            x = np.concatenate(([self._tail], x))
+        last = len(x) - 1
+        if last < self._phase:
+            # too short to reach the next output sample
+            self._tail = x[-1]
+            self._phase -= last
+            return b""
+        positions = self._phase + self._step * np.arange(
+            int((last - self._phase) // self._step) + 1
+        )
+        y = np.interp(positions, np.arange(len(x)), x)
+        self._phase = positions[-1] + self._step - last
+        self._tail = x[-1]
+        return np.clip(np.round(y), -32768, 32767).astype(np.int16).tobytes()
@@ -0,0 +1,83 @@
+import re
+import zlib
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Function words carry little meaning for retrieval and would otherwise make
+# "deliver to berlin" look like "deliver to munich".
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can could do does for from have how i if in "
+    "is it me my of on or our please so that the their there this to was we "
+    "what when where which who why will with would you your".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases, drops punctuation and collapses whitespace."""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def _is_stopword(word: str) -> bool:
+    # single letters and tokens with digits name things ("plan a", "5g")
+    return len(word) > 1 and word.isalpha() and word in _STOPWORDS
+
+
+def content_words(text: str) -> frozenset:
+    """The words of ``text`` that carry its meaning, for exact comparison.
+
+    Embeddings only say two queries look alike; "plan a" and "plan b", or
+    "saturday" and "sunday", score close. Caches that hand one query's
+    answer to another also require these sets to be equal.
+    """
+    return frozenset(
+        word for word in normalize_text(text).split() if not _is_stopword(word)
+    )
+
+
+class HashingEmbedder:
+    """Local text embedding from hashed word and character trigram counts.
+
+    It needs no model or network call and puts rephrasings with the same
+    content words ("what are your opening hours" / "opening hours?") close
+    together, which is what caching and small local indexes need.
+    Vectors are L2-normalised, so a dot product is the cosine similarity.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _features(self, text: str):
+        words = normalize_text(text).split()
+        words = [word for word in words if not _is_stopword(word)] or words
+        for word in words:
+            yield word
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i : i + 3]
+        for first, second in zip(words, words[1:]):
+            yield f"{first} {second}"
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            # crc32 is stable across processes, unlike hash()
+            vector[zlib.crc32(feature.encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts) -> np.ndarray:
+        return np.stack([self.embed(text) for text in texts])
+
+
+_embedder = None
+
+
+def get_embedder():
+    """Returns the process-wide local embedder."""
+    global _embedder
+    if _embedder is None:
+        _embedder = HashingEmbedder()
+    return _embedder
@@ -0,0 +1,103 @@
+import json
+import math
+import sys
+from collections import Counter
+
+import numpy as np
+
+from helpers.embeddings import get_embedder, normalize_text
+
+
+class BM25:
+    """Okapi BM25 over chunk contents, scored for all chunks at once with NumPy."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self._postings = {}
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, document in enumerate(documents):
+            terms = Counter(normalize_text(document).split())
+            lengths[doc_id] = sum(terms.values())
+            for term, count in terms.items():
+                self._postings.setdefault(term, []).append((doc_id, count))
+
+        average_length = lengths.mean() if len(documents) else 0.0
+        self._norm = k1 * (1 - b + b * lengths / max(average_length, 1.0))
+        self._k1 = k1
+        self._size = len(documents)
+        self._index = {}
+        for term, postings in self._postings.items():
+            doc_ids = np.array([doc_id for doc_id, _ in postings], dtype=np.int64)
+            counts = np.array([count for _, count in postings], dtype=np.float32)
+            idf = math.log(
+                1 + (self._size - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            self._index[term] = (doc_ids, counts, idf)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self._size, dtype=np.float32)
+        for term in set(normalize_text(query).split()):
+            if term not in self._index:
+                continue
+            doc_ids, counts, idf = self._index[term]
+            scores[doc_ids] += (
+                idf * counts * (self._k1 + 1) / (counts + self._norm[doc_ids])
+            )
+        return scores
+
+
+class LocalVectorIndex:
+    """In-process knowledge-base index with top-k cosine search.
+
+    ``<path>.npy`` holds one L2-normalised float32 vector per chunk (loaded
+    memory-mapped, so the OS pages it in and shares it between workers) and
+    ``<path>.json`` the chunks themselves. With ``hybrid_weight`` > 0, BM25
+    over ``content_field`` is blended into the cosine scores.
+    """
+
+    def __init__(self, path, content_field="chunk", hybrid_weight=0.0, embedder=None):
+        self._embedder = embedder or get_embedder()
+        self.vectors = np.load(f"{path}.npy", mmap_mode="r")
+        with open(f"{path}.json", "r") as file:
+            self.chunks = json.load(file)
+        if len(self.chunks) != self.vectors.shape[0]:
+            raise ValueError(
+                f"{path}: {len(self.chunks)} chunks but {self.vectors.shape[0]} vectors"
+            )
+        self.hybrid_weight = hybrid_weight
+        self._bm25 = None
+        if hybrid_weight > 0:
+            self._bm25 = BM25([chunk.get(content_field, "") for chunk in self.chunks])
+
+    def search(self, query: str, top: int = 3):
+        if not self.chunks:
+            return []
+        scores = self.vectors @ self._embedder.embed(query)
+        if self._bm25 is not None:
+            keyword_scores = self._bm25.scores(query)
+            if keyword_scores.max() > 0:
+                keyword_scores /= keyword_scores.max()
+            scores = (
+                1 - self.hybrid_weight
+            ) * scores + self.hybrid_weight * keyword_scores
+        top = min(top, len(scores))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [self.chunks[i] for i in best]
+
+    @staticmethod
+    def build(chunks, path, content_field="chunk", embedder=None):
+        """Embeds the chunks and writes ``<path>.npy`` and ``<path>.json``."""
+        embedder = embedder or get_embedder()
+        vectors = embedder.embed_many([chunk[content_field] for chunk in chunks])
+        np.save(f"{path}.npy", vectors.astype(np.float32))
+        with open(f"{path}.json", "w") as file:
+            json.dump(chunks, file)
+
+
+# building an index: python -m helpers.local_index chunks.jsonl out/index
+if __name__ == "__main__":
+    source, destination = sys.argv[1], sys.argv[2]
+    with open(source, "r") as file:
+        chunks = [json.loads(line) for line in file if line.strip()]
+    LocalVectorIndex.build(chunks, destination)
+    print(f"Indexed {len(chunks)} chunks into {destination}.npy/.json")
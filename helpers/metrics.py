@@ -0,0 +1,140 @@
+import bisect
+import threading
+from collections import deque
+
+import numpy as np
+
+# Latency buckets in milliseconds
+DEFAULT_BUCKETS = (
+    5,
+    10,
+    25,
+    50,
+    100,
+    200,
+    300,
+    500,
+    750,
+    1000,
+    1500,
+    2000,
+    3000,
+    5000,
+    10000,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Cumulative-bucket histogram that also keeps the most recent samples.
+
+    Buckets, count and sum cover the whole process lifetime, as Prometheus
+    expects; percentiles are computed over the last ``window`` samples so
+    they follow the current load.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=2048):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def percentiles(self, quantiles=QUANTILES) -> dict:
+        if not self._recent:
+            return {q: 0.0 for q in quantiles}
+        values = np.percentile(
+            np.fromiter(self._recent, dtype=np.float64), [q * 100 for q in quantiles]
+        )
+        return dict(zip(quantiles, values.tolist()))
+
+
+class MetricsRegistry:
+    """Per-process histograms and counters, keyed by name and labels."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        """Returns count and p50/p95/p99 for every histogram, plus all counters."""
+        with self._lock:
+            histograms = {
+                _series(name, labels): {
+                    "count": histogram.count,
+                    **{
+                        f"p{int(q * 100)}": value
+                        for q, value in histogram.percentiles().items()
+                    },
+                }
+                for (name, labels), histogram in self._histograms.items()
+            }
+            counters = {
+                _series(name, labels): value
+                for (name, labels), value in self._counters.items()
+            }
+        return {"histograms": histograms, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """Renders everything in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(
+                    histogram.buckets + ("+Inf",), histogram.bucket_counts
+                ):
+                    cumulative += count
+                    lines.append(
+                        f"{_series(name + '_bucket', labels + (('le', bound),))} {cumulative}"
+                    )
+                lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+                lines.append(f"{_series(name + '_sum', labels)} {histogram.sum:.3f}")
+                for q, value in histogram.percentiles().items():
+                    lines.append(
+                        f"{_series(name, labels + (('quantile', q),))} {value:.3f}"
+                    )
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{_series(name, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name: str, labels) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+# Global metrics registry
+_metrics = None
+_lock = threading.Lock()
+
+
+def get_metrics():
+    """Returns the process-wide metrics registry."""
+    global _metrics
+    if _metrics is None:
+        with _lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
@@ -0,0 +1,85 @@
+import json
+import re
+
+from helpers.embeddings import normalize_text
+
+SEPARATOR = "-----"
+NO_RESULTS = "No matching results in the knowledge base."
+ALREADY_PROVIDED = "(already provided above)"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_SOURCE_PREFIX = re.compile(r"^\[[^\]]*\]:\s*", re.MULTILINE)
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def context_sentences(messages) -> set[str]:
+    """Normalised sentences of the tool results still present in an LLM context.
+
+    Read from the context itself rather than remembered per call, so results
+    that were trimmed or summarised away are sent again when needed.
+    """
+    seen = set()
+    for message in messages:
+        content = message.get("content")
+        if message.get("role") == "tool" and isinstance(content, str):
+            if content.startswith('"'):
+                # pipecat stores function results JSON-encoded
+                try:
+                    content = json.loads(content)
+                except ValueError:
+                    pass
+            seen.update(
+                normalize_text(s)
+                for s in split_sentences(_SOURCE_PREFIX.sub("", content))
+            )
+    return seen
+
+
+def format_search_results(results, seen=None, token_budget=300) -> tuple[str, int]:
+    """Formats search hits for a tool result within ``token_budget`` tokens.
+
+    ``results`` are ``{"id", "content"}`` dicts, best first. Each hit is cut
+    to whole sentences, and sentences in ``seen`` (see
+    :func:`context_sentences`) or in an earlier hit are dropped. A hit with
+    nothing new left is only referenced; one that doesn't fit at all is left
+    out. The budget is shared in rank order, with what a hit leaves unused
+    passed on to the next. Returns the text and the number of sentences
+    dropped as duplicates.
+    """
+    if not results:
+        return NO_RESULTS, 0
+    seen = set(seen or ())
+    # about four characters a token
+    remaining = token_budget * 4
+    duplicates = 0
+    lines = []
+    for rank, result in enumerate(results):
+        share = remaining // (len(results) - rank)
+        kept, used, repeated = [], 0, 0
+        for sentence in split_sentences(result["content"]):
+            key = normalize_text(sentence)
+            if key in seen:
+                repeated += 1
+                continue
+            if used + len(sentence) > share and (
+                kept or used + len(sentence) > remaining
+            ):
+                break
+            seen.add(key)
+            kept.append(sentence)
+            used += len(sentence) + 1
+        remaining -= used
+        duplicates += repeated
+        if not kept and not repeated:
+            # out of budget
+            continue
+        lines.append(
+            f"[{result['id']}]: {' '.join(kept) if kept else ALREADY_PROVIDED}"
+        )
+        lines.append(SEPARATOR)
+    if not lines:
+        return NO_RESULTS, duplicates
+    return "\n".join(lines), duplicates
@@ -5,6 +5,7 @@ from azure.core.credentials import AzureKeyCredential
 from azure.identity import DefaultAzureCredential
 from azure.search.documents.aio import SearchClient
 from azure.search.documents.models import VectorizableTextQuery
+from helpers.search_cache import get_search_cache
 
 load_dotenv(find_dotenv())
 
@@ -15,51 +16,108 @@ content_field = os.environ.get("AZURE_OPENAI_CONTENTFIELD") or "chunk"
 embedding_field = os.environ.get("AZURE_OPENAI_EMBEDDINGFIELD") or "text_vector"
 title_field = os.environ.get("AZURE_OPENAI_TITLEFIELD") or "title"
 user_vector_query = (os.environ.get("AZURE_OPENAI_USERVECTORQUERY") == "true") or True
+search_cache_enabled = os.environ.get("SEARCH_CACHE_ENABLED", "true") == "true"
+# "azure" queries Azure AI Search, "local" an in-process index built with helpers/local_index.py
+search_backend = os.environ.get("SEARCH_BACKEND", "azure")
+local_index_path = os.environ.get("LOCAL_INDEX_PATH", "data/knowledge_base")
+local_index_hybrid_weight = float(os.environ.get("LOCAL_INDEX_HYBRID_WEIGHT", "0.3"))
+# size of one formatted search result in the LLM context, see helpers/rag_results.py
+result_token_budget = int(os.environ.get("RAG_RESULT_TOKEN_BUDGET", "300"))
 
-async def _search_tool(
-    search_client: SearchClient, 
-    args: Any) -> Any:
+
+async def _search_tool(search_client: SearchClient, args: Any) -> Any:
     print(f"Searching for '{args['query']}' in the knowledge base.")
     # Focus on retrieving minimal yet accurate information.
     vector_queries = []
     if user_vector_query:
         # Reduce the number of neighbors to limit the impact of less relevant results.
-        vector_queries.append(VectorizableTextQuery(text=args['query'], k_nearest_neighbors=5, fields=embedding_field))
-    
-    semantic_configuration = args.get("search_config").get("SEARCH_SEMANTIC_CONFIGURATION")
+        vector_queries.append(
+            VectorizableTextQuery(
+                text=args["query"], k_nearest_neighbors=5, fields=embedding_field
+            )
+        )
+
+    semantic_configuration = args.get("search_config").get(
+        "SEARCH_SEMANTIC_CONFIGURATION"
+    )
     search_results = await search_client.search(
-        search_text=args['query'], 
+        search_text=args["query"],
         query_type="semantic",
         semantic_configuration_name=semantic_configuration,
         top=3,  # Retrieve only the top result.
         vector_queries=vector_queries,
-        select=", ".join([identifier_field, content_field])# type: ignore
+        select=", ".join([identifier_field, content_field]),  # type: ignore
     )
-    result = ""
-    async for r in search_results:
-        result += f"[{r[identifier_field]}]: {r[content_field]}"
-    return result
+    # raw hits, best first; formatting for the LLM happens per call
+    return [
+        {"id": r[identifier_field], "content": r[content_field]}
+        async for r in search_results
+    ]
+
+
+async def _local_search_tool(args: Any) -> list:
+    print(f"Searching for '{args['query']}' in the local knowledge base.")
+    return [
+        {"id": r[identifier_field], "content": r[content_field]}
+        for r in get_local_index().search(args["query"], top=3)
+    ]
+
 
 _cached_search_client = None
+_local_index = None
+
+
+def get_local_index():
+    global _local_index
+    if _local_index is None:
+        # Imported on first use; the index files only exist for the local backend
+        from helpers.local_index import LocalVectorIndex
+
+        _local_index = LocalVectorIndex(
+            local_index_path,
+            content_field=content_field,
+            hybrid_weight=local_index_hybrid_weight,
+        )
+    return _local_index
+
 
 async def get_cached_search_client(args: Any) -> SearchClient:
     global _cached_search_client
     if _cached_search_client is None:
-        credentials = AzureKeyCredential(search_key) if search_key else DefaultAzureCredential()
+        credentials = (
+            AzureKeyCredential(search_key) if search_key else DefaultAzureCredential()
+        )
         if not isinstance(credentials, AzureKeyCredential):
             credentials.get_token("https://search.azure.com/.default")
         search_index = args.get("search_config").get("SEARCH_INDEX")
-        _cached_search_client = SearchClient(search_endpoint, search_index, credentials)# type: ignore
+        _cached_search_client = SearchClient(search_endpoint, search_index, credentials)  # type: ignore
     return _cached_search_client
 
-async def get_search_response(args: Any) -> str:
+
+async def get_search_response(args: Any) -> list:
     try:
+        if search_backend == "local":
+            # Local lookups are cheaper than the cache's own similarity scan
+            return await _local_search_tool(args)
+
         if not args.get("search_config"):
             raise ValueError("Search configuration is missing for this request.")
-        
+
+        search_config = args.get("search_config")
+        namespace = (
+            search_config.get("SEARCH_INDEX"),
+            search_config.get("SEARCH_SEMANTIC_CONFIGURATION"),
+        )
+        if search_cache_enabled:
+            cached = get_search_cache().get(args["query"], namespace)
+            if cached is not None:
+                print(f"Search cache hit for '{args['query']}'")
+                return cached
+
         search_client = await get_cached_search_client(args)
         response = await _search_tool(search_client, args)
+        if search_cache_enabled and response:
+            get_search_cache().put(args["query"], namespace, response)
         return response
     except Exception as e:
         raise Exception(f"Error while getting search response: {e}") from e
-
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+import wave
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+
+from loguru import logger
+
+
+class StreamingRecorder:
+    """Streams call audio into a WAV file as it arrives.
+
+    Only the current chunk is ever held in memory; the RIFF header sizes are
+    patched once, when the recorder is closed. Pass an executor to keep file
+    I/O off the event loop.
+    """
+
+    def __init__(self, filename: str, executor: Optional[Executor] = None):
+        self.filename = filename
+        self._executor = executor
+        self._wav = None
+        self._closed = False
+
+    async def write(self, audio: bytes, sample_rate: int, num_channels: int):
+        if self._closed or not audio:
+            return
+        await self._run(self._write, audio, sample_rate, num_channels)
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._wav is not None:
+            await self._run(self._wav.close)
+            logger.info(f"Recording saved to {self.filename}")
+        else:
+            logger.info("No audio data to save")
+
+    def _write(self, audio: bytes, sample_rate: int, num_channels: int):
+        if self._wav is None:
+            self._wav = wave.open(self.filename, "wb")
+            self._wav.setsampwidth(2)
+            self._wav.setnchannels(num_channels)
+            self._wav.setframerate(sample_rate)
+        # writeframesraw skips rewriting the header on every chunk
+        self._wav.writeframesraw(audio)
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+
+# Shared executor for recording I/O
+_executor = None
+_lock = threading.Lock()
+
+
+def get_recording_executor():
+    """Returns a bounded thread pool shared by all call recorders."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("RECORDING_THREADS", "2")),
+                    thread_name_prefix="recorder",
+                )
+    return _executor
@@ -0,0 +1,108 @@
+import os
+import threading
+
+import numpy as np
+from cachetools import TTLCache
+
+from helpers.embeddings import content_words, get_embedder, normalize_text
+from helpers.metrics import get_metrics
+
+
+class SearchResultCache:
+    """Two-level cache for knowledge-base search results.
+
+    Level one is an exact LRU keyed by the normalised query plus the search
+    namespace (index and semantic configuration). Level two reuses a result
+    when a new query has the same content words as a cached one in the same
+    namespace (see :func:`~helpers.embeddings.content_words`) and its
+    embedding is within ``similarity`` cosine of it, so rephrasings hit but
+    "plan a" never gets the answer for "plan b". Both levels expire entries
+    after ``ttl`` seconds and hold at most ``maxsize`` of them. Lookups are
+    counted in ``search_cache_lookups_total`` by outcome, and lookups that
+    a near query would have answered wrongly in
+    ``search_cache_false_hits_total``.
+    """
+
+    def __init__(self, maxsize=512, ttl=600, similarity=0.9, embedder=None):
+        self.similarity = similarity
+        self._embedder = embedder or get_embedder()
+        self._exact = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._semantic = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        # false_hits: close enough by cosine, but about something else
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "false_hits": 0,
+            "misses": 0,
+        }
+
+    def get(self, query: str, namespace: tuple):
+        key = (normalize_text(query), namespace)
+        with self._lock:
+            result = self._exact.get(key)
+            if result is not None:
+                self._count("exact_hits", "exact_hit")
+                return result
+
+            self._semantic.expire()
+            candidates = [
+                (vector, words, value)
+                for (_, entry_namespace), (vector, words, value) in list(
+                    self._semantic.items()
+                )
+                if entry_namespace == namespace
+            ]
+            if candidates:
+                scores = np.stack(
+                    [vector for vector, _, _ in candidates]
+                ) @ self._embedder.embed(query)
+                words = content_words(query)
+                rejected = False
+                for best in np.argsort(-scores):
+                    if scores[best] < self.similarity:
+                        break
+                    if candidates[best][1] == words:
+                        self._count("semantic_hits", "semantic_hit")
+                        return candidates[best][2]
+                    rejected = True
+                if rejected:
+                    self._stats["false_hits"] += 1
+                    get_metrics().inc("search_cache_false_hits_total")
+
+            self._count("misses", "miss")
+            return None
+
+    def _count(self, stat: str, outcome: str):
+        self._stats[stat] += 1
+        get_metrics().inc("search_cache_lookups_total", outcome=outcome)
+
+    def put(self, query: str, namespace: tuple, result):
+        key = (normalize_text(query), namespace)
+        vector = self._embedder.embed(query)
+        with self._lock:
+            self._exact[key] = result
+            self._semantic[key] = (vector, content_words(query), result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "size": len(self._exact)}
+
+
+# Global search cache instance
+_search_cache = None
+_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Returns the process-wide search result cache."""
+    global _search_cache
+    if _search_cache is None:
+        with _lock:
+            if _search_cache is None:
+                _search_cache = SearchResultCache(
+                    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+                    ttl=int(os.getenv("SEARCH_CACHE_TTL", "600")),
+                    similarity=float(os.getenv("SEARCH_CACHE_SIMILARITY", "0.9")),
+                )
+    return _search_cache
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import time
+
+from cachetools import TTLCache
+from loguru import logger
+
+from helpers.metrics import get_metrics
+
+
+class IncomingCallQueue:
+    """Answers incoming calls in the background with bounded concurrency.
+
+    The EventGrid webhook only validates and enqueues, so it can acknowledge
+    a batch right away instead of answering its calls one by one while
+    EventGrid waits (and eventually retries). Events are deduplicated by
+    their ``incomingCallContext``, locally and, given a cache, across workers,
+    so a redelivered event is never answered twice.
+    """
+
+    def __init__(self, answer, workers=16, maxsize=1000, dedupe_ttl=600, cache=None):
+        self._answer = answer
+        self._workers = workers
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._seen = TTLCache(maxsize=10000, ttl=dedupe_ttl)
+        self._dedupe_ttl = dedupe_ttl
+        self._cache = cache
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run()) for _ in range(self._workers)
+            ]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def has_room(self, count: int) -> bool:
+        return self._queue.maxsize - self._queue.qsize() >= count
+
+    @staticmethod
+    def validate(event_data) -> str | None:
+        """Returns why an IncomingCall event can't be answered, or None if it can."""
+        if not isinstance(event_data, dict):
+            return "event data is not an object"
+        context = event_data.get("incomingCallContext")
+        if not isinstance(context, str) or not context:
+            return "missing incomingCallContext"
+        return None
+
+    async def submit(self, event_id: str, event_data: dict) -> bool:
+        """Queues a call to be answered; returns False for a duplicate event.
+
+        Raises ValueError for an event that fails :meth:`validate` and
+        asyncio.QueueFull when there is no room, in which case the event is
+        not remembered, so EventGrid's retry is answered.
+        """
+        error = self.validate(event_data)
+        if error is not None:
+            raise ValueError(f"Incoming call event {event_id}: {error}")
+        key = hashlib.sha1(event_data["incomingCallContext"].encode()).hexdigest()
+        if key in self._seen:
+            return False
+        # claimed before the await below, so a concurrent delivery sees it
+        self._seen[key] = event_id
+        claimed = False
+        if self._cache is not None:
+            try:
+                # another worker may already have taken this delivery
+                if not await self._cache.add(
+                    f"incoming_call:{key}", event_id, ex=self._dedupe_ttl
+                ):
+                    return False
+                claimed = True
+            except Exception as e:
+                logger.warning(f"Incoming call dedupe is local only: {e}")
+        try:
+            self._queue.put_nowait((time.perf_counter(), event_id, event_data))
+        except asyncio.QueueFull:
+            self._seen.pop(key, None)
+            if claimed:
+                try:
+                    await self._cache.delete(f"incoming_call:{key}")
+                except Exception as e:
+                    logger.warning(f"Failed to release incoming call {event_id}: {e}")
+            raise
+        return True
+
+    async def _run(self):
+        metrics = get_metrics()
+        while True:
+            received_at, event_id, event_data = await self._queue.get()
+            metrics.observe(
+                "incoming_call_queue_ms", (time.perf_counter() - received_at) * 1000
+            )
+            try:
+                if await self._answer(event_data):
+                    metrics.observe(
+                        "call_answer_ms", (time.perf_counter() - received_at) * 1000
+                    )
+            except Exception as e:
+                logger.error(f"Failed to answer incoming call {event_id}: {e}")
+                metrics.inc("call_answer_errors_total")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,332 @@
+import asyncio
+import dataclasses
+import json
+import os
+import threading
+
+from loguru import logger
+from pipecat.processors.audio.audio_buffer_processor import AudioBufferProcessor
+
+from acshandler.serializers.acs import ACSFrameSerializerParams
+from call_control import CallControl
+from helpers import rag_searcher
+from helpers.audio_format import negotiate_audio_format
+from helpers.recorder import StreamingRecorder, get_recording_executor
+from services.context_service import OpenAILLMContextService
+from services.context_window import ContextWindowProcessor, llm_summarizer
+from services.greeting_service import DEFAULT_GREETING, GreetingPlayer, GreetingService
+from services.llm_router import LLMRouter
+from services.llm_service import DEFAULT_FILLER, GROQ_BASE_URL, LLMService, ToolEngine
+from services.prefetch_service import RAGPrefetchProcessor, SearchPrefetcher
+from services.speculative_llm import SpeculationProcessor
+from services.stt_service import STTService
+from services.stubs import use_stub_services
+from services.tts_cache import CachedElevenLabsTTSService
+from services.tts_service import TTSService
+from services.vad_service import get_vad_service
+
+
+@dataclasses.dataclass(frozen=True)
+class BotConfig:
+    """Immutable per-process bot configuration, read from the environment once."""
+
+    deepgram_api_key: str
+    elevenlabs_api_key: str
+    elevenlabs_voice_id: str
+    openai_api_key: str
+    openai_model: str
+    # any OpenAI-compatible endpoint; Groq unless set
+    openai_base_url: str = GROQ_BASE_URL
+    # several OpenAI-compatible backends to route between instead, as a JSON
+    # list of {"name", "base_url", "model", "api_key" or "api_key_env"}
+    llm_backends: tuple = ()
+    # repeat a request on the next backend when its first token is later
+    # than the backend's llm_hedge_percentile time to first token
+    llm_hedge: bool = True
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_ms: int = 250
+    # ACS stream rate (16000 or 24000); every other stage follows from it
+    sample_rate: int = 16000
+    outbound_frame_ms: int = 40
+    jitter_buffer_ms: int = 60
+    # "stream" writes the recording as the call goes, "buffer" keeps the
+    # whole call in memory and writes it at the end
+    recording_mode: str = "stream"
+    recording_window_secs: int = 5
+    recording_offload: bool = True
+    # start knowledge-base searches from interim transcripts
+    rag_prefetch: bool = False
+    rag_prefetch_similarity: float = 0.75
+    # start the LLM on stable interim transcripts, kept if the final matches
+    speculative_llm: bool = False
+    speculative_llm_similarity: float = 0.9
+    # play a greeting rendered at startup instead of generating one per call
+    fast_greeting: bool = False
+    greeting_text: str = DEFAULT_GREETING
+    # JSON file mapping acsPhoneNumber to its greeting
+    greetings_file: str | None = None
+    # compact older turns once the context passes this many tokens (0 = never)
+    context_token_budget: int = 3000
+    context_keep_turns: int = 4
+    # model writing the summaries, defaults to openai_model
+    context_summary_model: str | None = None
+    # tool calls are answered with a fallback after this long, per function
+    # overrides in tool_deadlines ("search:3,transfer_call:2")
+    tool_timeout_secs: float = 4.0
+    tool_deadlines: dict = dataclasses.field(default_factory=dict)
+    # spoken once tool calls run this long (0 = never)
+    tool_filler_secs: float = 1.0
+    tool_filler_phrase: str = DEFAULT_FILLER
+    # where transfer_call sends the caller; unset, the LLM is told it can't
+    transfer_agent_number: str | None = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            deepgram_api_key=os.getenv("DEEPGRAM_API_KEY", ""),
+            elevenlabs_api_key=os.getenv("ELEVENLABS_API_KEY", ""),
+            elevenlabs_voice_id=os.getenv("ELEVENLABS_VOICE_ID", ""),
+            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+            openai_model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+            openai_base_url=os.getenv("OPENAI_BASE_URL", GROQ_BASE_URL),
+            llm_backends=tuple(json.loads(os.getenv("LLM_BACKENDS") or "[]")),
+            llm_hedge=os.getenv("LLM_HEDGE", "true") == "true",
+            llm_hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+            llm_hedge_min_ms=int(os.getenv("LLM_HEDGE_MIN_MS", "250")),
+            sample_rate=int(os.getenv("ACS_SAMPLE_RATE", "16000")),
+            outbound_frame_ms=int(os.getenv("ACS_OUTBOUND_FRAME_MS", "40")),
+            jitter_buffer_ms=int(os.getenv("ACS_JITTER_BUFFER_MS", "60")),
+            recording_mode=os.getenv("RECORDING_MODE", "stream"),
+            recording_window_secs=int(os.getenv("RECORDING_WINDOW_SECS", "5")),
+            recording_offload=os.getenv("RECORDING_OFFLOAD", "true") == "true",
+            rag_prefetch=os.getenv("RAG_PREFETCH", "false") == "true",
+            rag_prefetch_similarity=float(os.getenv("RAG_PREFETCH_SIMILARITY", "0.75")),
+            speculative_llm=os.getenv("SPECULATIVE_LLM", "false") == "true",
+            speculative_llm_similarity=float(
+                os.getenv("SPECULATIVE_LLM_SIMILARITY", "0.9")
+            ),
+            fast_greeting=os.getenv("FAST_GREETING", "false") == "true",
+            greeting_text=os.getenv("GREETING_TEXT", DEFAULT_GREETING),
+            greetings_file=os.getenv("GREETINGS_FILE") or None,
+            context_token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000")),
+            context_keep_turns=int(os.getenv("CONTEXT_KEEP_TURNS", "4")),
+            context_summary_model=os.getenv("CONTEXT_SUMMARY_MODEL") or None,
+            tool_timeout_secs=float(os.getenv("TOOL_TIMEOUT_SECS", "4")),
+            tool_deadlines=_parse_deadlines(os.getenv("TOOL_DEADLINES", "")),
+            tool_filler_secs=float(os.getenv("TOOL_FILLER_SECS", "1")),
+            tool_filler_phrase=os.getenv("TOOL_FILLER_PHRASE", DEFAULT_FILLER),
+            transfer_agent_number=os.getenv("TRANSFER_AGENT_NUMBER") or None,
+        )
+
+
+def _parse_deadlines(value: str) -> dict:
+    deadlines = {}
+    for entry in value.split(","):
+        if ":" in entry:
+            name, secs = entry.split(":", 1)
+            deadlines[name.strip()] = float(secs)
+    return deadlines
+
+
+class PipelineFactory:
+    """Builds per-call services from state prepared once at server startup.
+
+    Config, parsed tools, TTS parameters, the VAD model, the LLM HTTP
+    connection pool and pre-rendered greetings are shared; each call only
+    gets its own service objects.
+    """
+
+    def __init__(self, config: BotConfig | None = None, tools_path=None):
+        self.config = config or BotConfig.from_env()
+        self.tools = LLMService.load_tools(tools_path)
+        self.tts_params = TTSService.default_params()
+        # the rate of every stage, chosen so audio is resampled as little as possible
+        self.audio_format = negotiate_audio_format(self.config.sample_rate)
+        if self.audio_format.resampled_stages:
+            logger.info(
+                f"Audio resampled for: {', '.join(self.audio_format.resampled_stages)}"
+            )
+        # validated once here, so a bad ACS frame size fails at startup
+        self.acs_params = ACSFrameSerializerParams(
+            sample_rate=self.config.sample_rate,
+            frame_size=self.config.sample_rate * self.config.outbound_frame_ms // 1000,
+            jitter_buffer_ms=self.config.jitter_buffer_ms,
+        )
+        self.greetings = None
+        if self.config.fast_greeting:
+            self.greetings = GreetingService.from_file(
+                self.config.greetings_file, default=self.config.greeting_text
+            )
+        self._llm_client = None
+
+    async def start(self):
+        """Loads shared models and indexes, opens the LLM client and warms its pool."""
+        get_vad_service()
+        if rag_searcher.search_backend == "local":
+            rag_searcher.get_local_index()
+        if self.config.llm_backends:
+            # shared by every call, so what it learns about the backends is too
+            self._llm_client = LLMService.create_router(
+                self.config.llm_backends,
+                hedge=self.config.llm_hedge,
+                hedge_percentile=self.config.llm_hedge_percentile,
+                min_hedge_delay=self.config.llm_hedge_min_ms / 1000,
+            )
+        else:
+            self._llm_client = LLMService.create_client(
+                self.config.openai_api_key, self.config.openai_base_url
+            )
+        if use_stub_services():
+            logger.info("Pipeline factory ready (stub services)")
+            return
+        try:
+            # one cheap request so the first call skips the TLS handshake
+            if isinstance(self._llm_client, LLMRouter):
+                await asyncio.wait_for(self._llm_client.warm_up(), timeout=5)
+            else:
+                await asyncio.wait_for(self._llm_client.models.list(), timeout=5)
+        except Exception as e:
+            logger.warning(f"LLM connection warm-up failed: {e}")
+        if self.greetings is not None:
+            await self._prerender_greetings()
+        logger.info("Pipeline factory ready")
+
+    async def _prerender_greetings(self):
+        tts = self.create_tts()
+        if not isinstance(tts, CachedElevenLabsTTSService):
+            logger.warning(
+                "Fast greeting needs the TTS cache (TTS_CACHE_ENABLED), greeting with the LLM"
+            )
+            return
+        await self.greetings.prerender(tts)
+
+    async def close(self):
+        if self._llm_client is not None:
+            await self._llm_client.close()
+            self._llm_client = None
+
+    def create_vad(self):
+        return get_vad_service().get_vad()
+
+    def create_stt(self):
+        return STTService(
+            api_key=self.config.deepgram_api_key,
+            sample_rate=self.audio_format.stt_sample_rate,
+        ).get_stt()
+
+    def create_tts(self):
+        return TTSService(
+            api_key=self.config.elevenlabs_api_key,
+            voice_id=self.config.elevenlabs_voice_id,
+            sample_rate=self.audio_format.tts_sample_rate,
+            params=self.tts_params,
+        ).get_tts()
+
+    def create_llm_service(self):
+        llm_service = LLMService(
+            api_key=self.config.openai_api_key,
+            model=self.config.openai_model,
+            client=self._llm_client,
+            tool_engine=ToolEngine(
+                timeout=self.config.tool_timeout_secs,
+                deadlines=self.config.tool_deadlines,
+                filler_after=self.config.tool_filler_secs,
+                filler_phrase=self.config.tool_filler_phrase,
+            ),
+            speculation_similarity=self.config.speculative_llm_similarity
+            if self.config.speculative_llm
+            else None,
+        )
+        llm_service.register_functions_from_tools(tools=self.tools)
+        return llm_service
+
+    def create_call_control(self, context_id: str, acs_phone_number: str, task):
+        call_control = CallControl(
+            context_id,
+            acs_phone_number,
+            task,
+            agent_phone_number=self.config.transfer_agent_number,
+        )
+        # watches for the caller interrupting the goodbye or transfer notice
+        task.add_observer(call_control)
+        return call_control
+
+    def create_rag_prefetch(self, llm_service: LLMService):
+        """Returns a prefetch stage bound to ``llm_service``, or None when disabled."""
+        if not self.config.rag_prefetch or use_stub_services():
+            # stub transcripts would only send searches to the real index
+            return None
+        llm_service.prefetcher = SearchPrefetcher(
+            llm_service.search_knowledge_base,
+            similarity=self.config.rag_prefetch_similarity,
+        )
+        return RAGPrefetchProcessor(llm_service.prefetcher)
+
+    def create_audio_buffer(self):
+        if self.config.recording_mode != "stream":
+            # NOTE: Watch out! This will save all the conversation in memory.
+            return AudioBufferProcessor(user_continuous_stream=True)
+        # flush every few seconds so memory per call stays constant
+        window = self.config.sample_rate * 2 * self.config.recording_window_secs
+        return AudioBufferProcessor(buffer_size=window, user_continuous_stream=True)
+
+    def create_recorder(self, filename: str):
+        if self.config.recording_mode != "stream":
+            return None
+        executor = get_recording_executor() if self.config.recording_offload else None
+        return StreamingRecorder(filename, executor=executor)
+
+    def create_speculation(self, llm_service: LLMService, context):
+        """Returns a stage starting the LLM from interim transcripts, or None when disabled."""
+        if not self.config.speculative_llm:
+            return None
+        return SpeculationProcessor(llm_service.get_llm(), context)
+
+    def create_context(self):
+        return OpenAILLMContextService(tools=LLMService.chat_tools(self.tools))
+
+    def create_context_window(self, context_service: OpenAILLMContextService):
+        """Returns a stage keeping the call's context within budget, or None when disabled."""
+        if self.config.context_token_budget <= 0:
+            return None
+        summarize = None
+        if not use_stub_services():
+            # stubs fall back to an extractive summary instead of calling the LLM
+            model = self.config.context_summary_model or self.config.openai_model
+            summarize = llm_summarizer(self._llm_client, model)
+        window = context_service.createWindow(
+            self.config.context_token_budget,
+            keep_turns=self.config.context_keep_turns,
+            summarize=summarize,
+        )
+        return ContextWindowProcessor(window)
+
+    def get_greeting(self, acs_phone_number: str):
+        """Returns the pre-rendered ``(text, audio)`` greeting for a number, or None."""
+        if self.greetings is None:
+            return None
+        return self.greetings.get(acs_phone_number)
+
+    def create_greeting_player(self, websocket, serializer, audio: bytes):
+        return GreetingPlayer(
+            websocket,
+            serializer,
+            audio,
+            frame_bytes=self.acs_params.frame_bytes,
+            jitter_buffer_ms=self.acs_params.jitter_buffer_ms,
+        )
+
+
+# Global pipeline factory instance
+_factory = None
+_lock = threading.Lock()
+
+
+def get_pipeline_factory():
+    """Returns the process-wide pipeline factory."""
+    global _factory
+    if _factory is None:
+        with _lock:
+            if _factory is None:
+                _factory = PipelineFactory()
+    return _factory
@@ -1,12 +1,15 @@
 import argparse
+import asyncio
 import os
+import time
 import uuid
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
 
 import uvicorn
 from bot import run_bot
 from fastapi import FastAPI, WebSocket, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import HTMLResponse
 from dotenv import load_dotenv, find_dotenv
@@ -16,15 +19,22 @@ from azure.communication.callautomation import (
     MediaStreamingTransportType,
     MediaStreamingContentType,
     MediaStreamingAudioChannelType,
-    CallAutomationClient,
     PhoneNumberIdentifier,
+    CallRejectReason,
 )
 from urllib.parse import urlencode, urlparse, urlunparse
 from azure.eventgrid import EventGridEvent, SystemEventNames
 from logging import getLogger
 from bot import run_bot
 from acshandler.serializers.acs.acs_serializer import ACSFrameSerializer
-from cache import get_cache as get_cache_instance
+from cache import get_async_cache, close_async_cache
+from call_automation import get_call_automation, close_call_automation
+from call_bus import get_call_bus, close_call_bus
+from incoming_calls import IncomingCallQueue
+from callback_dispatcher import CallbackDispatcher
+from pipeline_factory import get_pipeline_factory
+from helpers.metrics import get_metrics
+from helpers.admission import get_admission
 
 load_dotenv(find_dotenv())
 
@@ -32,14 +42,34 @@ load_dotenv(find_dotenv())
 # for key, value in os.environ.items():
 #     print(f"{key}: {value}")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # prebuild everything calls share (VAD model, tools, LLM connection pool)
+    # before the first call arrives
+    await get_pipeline_factory().start()
+    # lets this worker receive control actions for calls whose media it owns
+    await get_call_bus().start()
+    incoming_calls.start()
+    # watch event-loop lag and publish this worker's load for balancing
+    await get_admission().start(
+        cache=get_async_cache() if os.getenv("AZURE_REDIS_CONNECTION_STRING") else None
+    )
+    yield
+    # release the pooled HTTP sessions and redis connections
+    await incoming_calls.close()
+    await callbacks.close()
+    await get_admission().stop()
+    await close_call_bus()
+    await get_pipeline_factory().close()
+    await close_call_automation()
+    await close_async_cache()
+
+
+app = FastAPI(lifespan=lifespan)
 # Set up logging
 logger = getLogger("pipecat.acs_chatbot")
 
-# Initialize Azure Communication Services client
-acs_client = CallAutomationClient.from_connection_string(
-    os.getenv("ACS_CONNECTION_STRING", "")
-)
 CALLBACK_EVENTS_URI = os.getenv(
     "CALLBACK_EVENTS_URI", "http://localhost:8000/api/callbacks"
 )
@@ -47,6 +77,17 @@ CALLBACK_EVENTS_URI = os.getenv(
 if "localhost" not in CALLBACK_EVENTS_URI:
     CALLBACK_EVENTS_URI = CALLBACK_EVENTS_URI + "/api/callbacks"
 
+# What to do with a call when this worker is at capacity: "reject" it as
+# busy, "redirect" it to ADMISSION_REDIRECT_NUMBER, or "queue" it (the caller
+# keeps hearing ringback) for up to ADMISSION_QUEUE_SECS before redirecting
+# or rejecting it.
+ADMISSION_POLICY = os.getenv("ADMISSION_POLICY", "reject")
+ADMISSION_REDIRECT_NUMBER = os.getenv("ADMISSION_REDIRECT_NUMBER")
+ADMISSION_QUEUE_SECS = float(os.getenv("ADMISSION_QUEUE_SECS", "10"))
+
+# ACS stream format per negotiated rate (ACS_SAMPLE_RATE), see helpers/audio_format.py
+ACS_AUDIO_FORMATS = {16000: AudioFormat.PCM16_K_MONO, 24000: AudioFormat.PCM24_K_MONO}
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allow all origins for testing
@@ -64,6 +105,52 @@ async def start_call():
     )
 
 
+@app.get("/load")
+async def load():
+    """Admitted load of this worker; 503 while saturated so balancers skip it."""
+    current = get_admission().load()
+    status_code = (
+        status.HTTP_503_SERVICE_UNAVAILABLE
+        if current["saturated"]
+        else status.HTTP_200_OK
+    )
+    return JSONResponse(content=current, status_code=status_code)
+
+
+async def admit_incoming_call(incoming_call_context: str) -> str | None:
+    """Reserves capacity for a new call, or sheds it according to ADMISSION_POLICY.
+
+    Returns the reservation token, or None if the call was shed.
+    """
+    admission = get_admission()
+    token = admission.try_admit()
+    if token is None and ADMISSION_POLICY == "queue":
+        token = await admission.admit(ADMISSION_QUEUE_SECS)
+    if token is not None:
+        return token
+
+    logger.warning(f"Worker saturated, shedding incoming call: {admission.load()}")
+    if ADMISSION_POLICY in ("redirect", "queue") and ADMISSION_REDIRECT_NUMBER:
+        await get_call_automation().redirect_call(
+            incoming_call_context, PhoneNumberIdentifier(ADMISSION_REDIRECT_NUMBER)
+        )
+        get_metrics().inc("calls_shed_total", action="redirect")
+    else:
+        await get_call_automation().reject_call(
+            incoming_call_context, call_reject_reason=CallRejectReason.BUSY
+        )
+        get_metrics().inc("calls_shed_total", action="reject")
+    return None
+
+
+@app.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """Latency histograms of this worker; ``?format=json`` returns p50/p95/p99."""
+    if format == "json":
+        return JSONResponse(content=get_metrics().snapshot())
+    return PlainTextResponse(get_metrics().render_prometheus())
+
+
 # @app.websocket("/ws")
 # async def websocket_endpoint(websocket: WebSocket):
 #     await websocket.accept()
@@ -77,11 +164,131 @@ async def start_call():
 #     await run_bot(websocket, stream_sid, call_sid, app.state.testing)
 
 
+async def answer_incoming_call(event_data: Dict[str, Any]) -> bool:
+    """Answers one IncomingCall event; returns False if the call was shed."""
+    # Extracting the caller ID mobile number who is calling
+    if event_data["from"]["kind"] == "phoneNumber":
+        caller_id = event_data["from"]["phoneNumber"]["value"]
+    else:
+        caller_id = event_data["from"]["rawId"]
+
+    # Fetching the mobile number from where the call is coming from
+    acs_mobile_number = event_data["to"]["phoneNumber"]["value"]
+
+    incoming_call_context = event_data["incomingCallContext"]
+    reservation = await admit_incoming_call(incoming_call_context)
+    if reservation is None:
+        return False
+    try:
+        answer_call_result = await answer_admitted_call(
+            incoming_call_context, caller_id, acs_mobile_number, reservation
+        )
+    except Exception:
+        # the call will never connect, so its slot must not wait out the TTL
+        get_admission().release(reservation)
+        raise
+
+    logger.info(
+        f"Answered call for connection id: {answer_call_result.call_connection_id}"
+    )
+    return True
+
+
+async def answer_admitted_call(
+    incoming_call_context: str, caller_id: str, acs_mobile_number: str, reservation: str
+):
+    """Answers an admitted call, streaming its media to a websocket on this app."""
+    guid = uuid.uuid4()
+    # Generated guid to be used as a unique identifier for the call
+    logger.info(f"GUID: {guid}")
+
+    query_parameters = urlencode({"callerId": caller_id})
+    callback_uri = f"{CALLBACK_EVENTS_URI}/{guid}?{query_parameters}"
+
+    parsed_url = urlparse(CALLBACK_EVENTS_URI)
+
+    # adding caller id to cache
+    await get_async_cache().set(
+        str(guid),
+        {"caller_id": caller_id, "acs_mobile_number": acs_mobile_number},
+    )
+
+    # Use the same query parameters for both callback and websocket URLs
+    query_parameters = urlencode(
+        {
+            "uuid": str(guid),
+            "acsPhoneNumber": acs_mobile_number,
+            "reservation": reservation,
+        }
+    )
+
+    websocket_url = urlunparse(
+        ("wss", parsed_url.netloc, "/ws", None, query_parameters, None)
+    )
+
+    logger.info(f"callback url: {callback_uri}")
+    logger.info(f"websocket url: {websocket_url}")
+
+    # Answer the incoming call
+    media_streaming_options = MediaStreamingOptions(
+        transport_url=websocket_url,
+        transport_type=MediaStreamingTransportType.WEBSOCKET,
+        content_type=MediaStreamingContentType.AUDIO,
+        audio_channel_type=MediaStreamingAudioChannelType.MIXED,
+        start_media_streaming=True,
+        enable_bidirectional=True,
+        audio_format=ACS_AUDIO_FORMATS[
+            get_pipeline_factory().audio_format.acs_sample_rate
+        ],
+    )
+
+    return await get_call_automation().answer_call(
+        incoming_call_context=incoming_call_context,
+        operation_context="incomingCall",
+        callback_url=callback_uri,
+        media_streaming=media_streaming_options,
+    )
+
+
+# Calls are answered by background workers so the webhook can ack at once
+incoming_calls = IncomingCallQueue(
+    answer_incoming_call,
+    workers=int(os.getenv("INCOMING_CALL_WORKERS", "16")),
+    cache=get_async_cache() if os.getenv("AZURE_REDIS_CONNECTION_STRING") else None,
+)
+
+
 @app.post("/api/incomingCall")
 async def incoming_call_handler(request: Request):
     logger.info("incoming event data")
-    for event_dict in await request.json():
-        event = EventGridEvent.from_dict(event_dict)
+    try:
+        events = [
+            EventGridEvent.from_dict(event_dict) for event_dict in await request.json()
+        ]
+    except Exception as e:
+        logger.error(f"Invalid EventGrid batch: {e}")
+        return JSONResponse(
+            content={"error": "invalid event batch"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    calls = []
+    for event in events:
+        if event.event_type != "Microsoft.Communication.IncomingCall":
+            continue
+        error = IncomingCallQueue.validate(event.data)
+        if error is not None:
+            # retrying would not fix it, so acknowledge and drop it
+            logger.error(f"Dropping incoming call event {event.id}: {error}")
+            continue
+        calls.append(event)
+    if not incoming_calls.has_room(len(calls)):
+        # nothing was taken, so EventGrid's retry is not a duplicate
+        return JSONResponse(
+            content={"error": "busy"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    for event in events:
         # logger.info("incoming event data --> %s", event.data)
         if (
             event.event_type
@@ -94,216 +301,167 @@ async def incoming_call_handler(request: Request):
             return JSONResponse(
                 content=validation_response, status_code=status.HTTP_200_OK
             )
-        elif event.event_type == "Microsoft.Communication.IncomingCall":
-            # logger.info("Incoming call event")
-            # logger.info(f"Event data: {event.data}")
-
-            # Extracting the caller ID mobile number who is calling
-            if event.data["from"]["kind"] == "phoneNumber":
-                caller_id = event.data["from"]["phoneNumber"]["value"]
-            else:
-                caller_id = event.data["from"]["rawId"]
 
-            # Fetching the mobile number from where the call is coming from
-            acs_mobile_number = event.data["to"]["phoneNumber"]["value"]
+    for event in calls:
+        try:
+            if not await incoming_calls.submit(event.id, event.data):
+                logger.info(f"Skipping duplicate incoming call event {event.id}")
+        except asyncio.QueueFull:
+            # concurrent batches filled the queue after has_room; the events
+            # taken so far are deduplicated when EventGrid retries the batch
+            return JSONResponse(
+                content={"error": "busy"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
 
-            incoming_call_context = event.data["incomingCallContext"]
-            guid = uuid.uuid4()
-            # Generated guid to be used as a unique identifier for the call
-            logger.info(f"GUID: {guid}")
+    return JSONResponse(content={}, status_code=status.HTTP_200_OK)
 
-            query_parameters = urlencode({"callerId": caller_id})
-            callback_uri = f"{CALLBACK_EVENTS_URI}/{guid}?{query_parameters}"
 
-            parsed_url = urlparse(CALLBACK_EVENTS_URI)
+# Callback handlers, registered once at import
+callbacks = CallbackDispatcher()
 
-            # adding caller id to cache
-            get_cache_instance().set(
-                str(guid),
-                {"caller_id": caller_id, "acs_mobile_number": acs_mobile_number},
-            )
 
-            # Use the same query parameters for both callback and websocket URLs
-            query_parameters = urlencode(
-                {"uuid": str(guid), "acsPhoneNumber": acs_mobile_number}
-            )
+@callbacks.on("Microsoft.Communication.CallConnected")
+async def handle_call_connected(contextId: str, event_data: Dict[str, Any]):
+    call_connection_id = event_data["callConnectionId"]
+    call_connection_properties = await get_call_automation().get_call_properties(
+        call_connection_id
+    )
+    media_streaming_subscription = (
+        call_connection_properties.media_streaming_subscription
+    )
+    # adding call connection id and corelation to cache
+    await get_async_cache().set(
+        contextId,
+        {
+            "callConnectionId": call_connection_id,
+            "correlationId": event_data["correlationId"],
+        },
+    )
+    logger.info(f"MediaStreamingSubscription:--> {media_streaming_subscription}")
+    logger.info(f"Received CallConnected event for connection id: {call_connection_id}")
+    logger.info(f"CORRELATION ID:--> { event_data['correlationId'] }")
+    logger.info(f"CALL CONNECTION ID:--> {event_data['callConnectionId']}")
 
-            websocket_url = urlunparse(
-                ("wss", parsed_url.netloc, "/ws", None, query_parameters, None)
-            )
 
-            logger.info(f"callback url: {callback_uri}")
-            logger.info(f"websocket url: {websocket_url}")
-
-            try:
-                # Answer the incoming call
-
-                media_streaming_options = MediaStreamingOptions(
-                    transport_url=websocket_url,
-                    transport_type=MediaStreamingTransportType.WEBSOCKET,
-                    content_type=MediaStreamingContentType.AUDIO,
-                    audio_channel_type=MediaStreamingAudioChannelType.MIXED,
-                    start_media_streaming=True,
-                    enable_bidirectional=True,
-                    audio_format=AudioFormat.PCM16_K_MONO,
-                )
-
-                answer_call_result = acs_client.answer_call(
-                    incoming_call_context=incoming_call_context,
-                    operation_context="incomingCall",
-                    callback_url=callback_uri,
-                    media_streaming=media_streaming_options,
-                )
-
-            except Exception as e:
-                raise e
-
-            logger.info(
-                f"Answered call for connection id: {answer_call_result.call_connection_id}"
-            )
+@callbacks.on("Microsoft.Communication.MediaStreamingStarted")
+async def handle_media_streaming_started(contextId: str, event_data: Dict[str, Any]):
+    logger.info(
+        f"Media streaming content type:--> {event_data['mediaStreamingUpdate']['contentType']}"
+    )
+    logger.info(
+        f"Media streaming status:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatus']}"
+    )
+    logger.info(
+        f"Media streaming status details:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatusDetails']}"
+    )
 
 
-@app.post("/api/callbacks/{contextId}")
-async def handle_callback_with_context(contextId: str, request: Request):
-    async def handle_call_connected(event_data: Dict[str, Any]):
-        call_connection_id = event_data["callConnectionId"]
-        call_connection_properties = acs_client.get_call_connection(
-            call_connection_id
-        ).get_call_properties()
-        media_streaming_subscription = (
-            call_connection_properties.media_streaming_subscription
-        )
-        # adding call connection id and corelation to cache
-        get_cache_instance().set(
-            contextId,
-            {
-                "callConnectionId": call_connection_id,
-                "correlationId": event_data["correlationId"],
-            },
-        )
-        logger.info(f"MediaStreamingSubscription:--> {media_streaming_subscription}")
-        logger.info(
-            f"Received CallConnected event for connection id: {call_connection_id}"
-        )
-        logger.info(f"CORRELATION ID:--> { event_data['correlationId'] }")
-        logger.info(f"CALL CONNECTION ID:--> {event_data['callConnectionId']}")
+@callbacks.on("Microsoft.Communication.MediaStreamingStopped")
+async def handle_media_streaming_stopped(contextId: str, event_data: Dict[str, Any]):
+    logger.info(
+        f"Media streaming content type:--> {event_data['mediaStreamingUpdate']['contentType']}"
+    )
+    logger.info(
+        f"Media streaming status:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatus']}"
+    )
+    logger.info(
+        f"Media streaming status details:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatusDetails']}"
+    )
 
-    async def handle_media_streaming_started(event_data: Dict[str, Any]):
-        logger.info(
-            f"Media streaming content type:--> {event_data['mediaStreamingUpdate']['contentType']}"
-        )
-        logger.info(
-            f"Media streaming status:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatus']}"
-        )
-        logger.info(
-            f"Media streaming status details:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatusDetails']}"
-        )
 
-    async def handle_media_streaming_stopped(event_data: Dict[str, Any]):
+@callbacks.on("Microsoft.Communication.MediaStreamingFailed")
+async def handle_media_streaming_failed(contextId: str, event_data: Dict[str, Any]):
+    logger.info(
+        f"Code:->{event_data['resultInformation']['code']}, Subcode:-> {event_data['resultInformation']['subCode']}"
+    )
+    logger.info(f"Message:->{event_data['resultInformation']['message']}")
+
+
+@callbacks.on("Microsoft.Communication.TerminateCall")
+async def handle_terminate_call(contextId: str, event_data: Dict[str, Any]):
+    call_connection_id = event_data["callConnectionId"]
+    try:
+        # stop the bot pipeline, on whichever worker holds its media socket
+        if not await get_call_bus().publish(contextId, "terminate"):
+            logger.info(f"No worker owns the media for {contextId}")
+        # stop media streaming
+        await get_call_automation().hang_up(call_connection_id, is_for_everyone=True)
+        logger.info(f"Terminated call for connection id: {call_connection_id}")
+    except Exception as e:
+        logger.error(f"Error stopping media streaming: {e}")
+    finally:
+        # evict the record from cache
+        await get_async_cache().delete(contextId)
+
+
+@callbacks.on("Microsoft.Communication.TransferCallToAgent")
+async def handle_transfer_call_to_agent(contextId: str, event_data: Dict[str, Any]):
+    call_connection_id = event_data["callConnectionId"]
+    try:
         logger.info(
-            f"Media streaming content type:--> {event_data['mediaStreamingUpdate']['contentType']}"
+            f"Transfer call to agent event received for connection id: {call_connection_id}"
         )
-        logger.info(
-            f"Media streaming status:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatus']}"
+        # Handle transfer call to agent event
+        agent_phone_number = event_data["agentPhoneNumber"]
+        acs_phone_number = event_data["acsPhoneNumber"]
+        transfer_destination = PhoneNumberIdentifier(agent_phone_number)
+        transferee = PhoneNumberIdentifier(acs_phone_number)
+        # waiting for 5 seconds before transferring the call
+        # This is to ensure that the media streaming is done before transferring the call
+        # time.sleep(5)
+        # Let the owning pipeline stop talking before the call moves
+        await get_call_bus().publish(
+            contextId, "transfer", {"agentPhoneNumber": agent_phone_number}
         )
-        logger.info(
-            f"Media streaming status details:--> {event_data['mediaStreamingUpdate']['mediaStreamingStatusDetails']}"
+        # Transfer the call to the agent
+        result = await get_call_automation().transfer_call_to_participant(
+            call_connection_id,
+            target_participant=transfer_destination,
+            source_caller_id_number=transferee,
+            operation_context="TransferCallToAgent",
+            operation_callback_url=CALLBACK_EVENTS_URI + f"/{contextId}",
         )
 
-    async def handle_media_streaming_failed(event_data: Dict[str, Any]):
         logger.info(
-            f"Code:->{event_data['resultInformation']['code']}, Subcode:-> {event_data['resultInformation']['subCode']}"
+            f"Transfer call to agent initiated for connection id: {call_connection_id}"
         )
-        logger.info(f"Message:->{event_data['resultInformation']['message']}")
+    except Exception as e:
+        logger.error(f"Error transferring call to agent: {e}")
 
-    async def handle_terminate_call(event_data: Dict[str, Any]):
-        call_connection_id = event_data["callConnectionId"]
-        try:
-            # stop media streaming
-            acs_client.get_call_connection(call_connection_id).hang_up(
-                is_for_everyone=True
-            )
-            logger.info(f"Terminated call for connection id: {call_connection_id}")
-        except Exception as e:
-            logger.error(f"Error stopping media streaming: {e}")
-        finally:
-            # evict the record from cache
-            get_cache_instance().delete(contextId)
-
-    async def handle_transfer_call_to_agent(event_data: Dict[str, Any]):
-        call_connection_id = event_data["callConnectionId"]
-        try:
-            logger.info(
-                f"Transfer call to agent event received for connection id: {call_connection_id}"
-            )
-            # Handle transfer call to agent event
-            agent_phone_number = event_data["agentPhoneNumber"]
-            acs_phone_number = event_data["acsPhoneNumber"]
-            transfer_destination = PhoneNumberIdentifier(agent_phone_number)
-            transferee = PhoneNumberIdentifier(acs_phone_number)
-            # waiting for 5 seconds before transferring the call
-            # This is to ensure that the media streaming is done before transferring the call
-            # time.sleep(5)
-            # Transfer the call to the agent
-            result = acs_client.get_call_connection(
-                call_connection_id
-            ).transfer_call_to_participant(
-                target_participant=transfer_destination,
-                source_caller_id_number=transferee,
-                operation_context="TransferCallToAgent",
-                operation_callback_url=CALLBACK_EVENTS_URI + f"/{contextId}",
-            )
 
-            logger.info(
-                f"Transfer call to agent initiated for connection id: {call_connection_id}"
-            )
-        except Exception as e:
-            logger.error(f"Error transferring call to agent: {e}")
-
-    event_handlers = {
-        "Microsoft.Communication.CallConnected": handle_call_connected,
-        "Microsoft.Communication.MediaStreamingStarted": handle_media_streaming_started,
-        "Microsoft.Communication.MediaStreamingStopped": handle_media_streaming_stopped,
-        "Microsoft.Communication.MediaStreamingFailed": handle_media_streaming_failed,
-        "Microsoft.Communication.TerminateCall": handle_terminate_call,
-        "Microsoft.Communication.TransferCallToAgent": handle_transfer_call_to_agent,
-    }
-
-    for event in await request.json():
+@app.post("/api/callbacks/{contextId}")
+async def handle_callback_with_context(contextId: str, request: Request):
+    events = await request.json()
+    for event in events:
         event_data = event["data"]
-        call_connection_id = event_data["callConnectionId"]
-        event_type = event["type"]
-
         logger.info(
-            f"Received Event:-> {event_type}, Correlation Id:-> {event_data['correlationId']}, CallConnectionId:-> {call_connection_id}"
+            f"Received Event:-> {event['type']}, Correlation Id:-> {event_data.get('correlationId')}, CallConnectionId:-> {event_data.get('callConnectionId')}"
         )
-
-        handler = event_handlers.get(event_type)
-        # setting contextId to event data
-        event_data["contextId"] = contextId
-
-        if handler:
-            await handler(event_data)
-        else:
-            logger.info(
-                f"Unhandled event type: {event_type}, CallConnectionId: {call_connection_id}"
-            )
+    # handled in the background, in order per call and concurrently across calls
+    callbacks.dispatch(contextId, events)
+    return JSONResponse(content={}, status_code=status.HTTP_200_OK)
 
 
 @app.websocket("/ws")
 async def acs_ws(websocket: WebSocket):
     # Accept the connection
     await websocket.accept()
+    accepted_at = time.perf_counter()
     query_params = dict(websocket.query_params)
     uuid = query_params.get("uuid", "")
     acs_phone_number = query_params.get("acsPhoneNumber", "")
     print(
         f"WebSocket connection accepted with UUID: {uuid} and ACS Phone Number: {acs_phone_number} and query params: {query_params} with websocket: {websocket}"
     )
-    # Run your bot pipeline
-    await run_bot(
-        websocket_client=websocket, stream_sid=uuid, call_sid=acs_phone_number
-    )
+    # Run your bot pipeline, counted against this worker's capacity
+    async with get_admission().session(query_params.get("reservation")):
+        await run_bot(
+            websocket_client=websocket,
+            stream_sid=uuid,
+            call_sid=acs_phone_number,
+            accepted_at=accepted_at,
+        )
 
 
 if __name__ == "__main__":
@@ -315,8 +473,20 @@ if __name__ == "__main__":
         default=False,
         help="set the server in testing mode",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "1")),
+        help="number of worker processes; more than one disables auto-reload",
+    )
     args, _ = parser.parse_known_args()
 
     app.state.testing = args.test
 
-    uvicorn.run("server:app", host="0.0.0.0", port=8765, reload=True)
+    if args.workers > 1:
+        # Production mode: calls are spread over the workers and control
+        # actions reach the owning worker through the call bus (Redis).
+        uvicorn.run("server:app", host="0.0.0.0", port=8765, workers=args.workers)
+    else:
+        uvicorn.run("server:app", host="0.0.0.0", port=8765, reload=True)
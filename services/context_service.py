@@ -1,6 +1,13 @@
-from openai.types.chat.chat_completion_system_message_param import ChatCompletionSystemMessageParam
+from openai.types.chat.chat_completion_assistant_message_param import (
+    ChatCompletionAssistantMessageParam,
+)
+from openai.types.chat.chat_completion_system_message_param import (
+    ChatCompletionSystemMessageParam,
+)
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 
+from services.context_window import ContextWindow
+
 _system_message = (
     "You are a helpful assistant. "
     "You will be provided with a context that includes the user's previous messages. "
@@ -10,24 +17,42 @@ _system_message = (
     "You should also maintain the context of the conversation to provide better responses in future interactions."
 )
 
+
 class OpenAILLMContextService:
-    def __init__(self):
+    def __init__(self, tools=None):
         self.__context = None
+        self.__llm_context = None
+        # chat completions tool definitions offered to the LLM
+        self.__tools = tools
 
     def get_OpenAILLMcontext(self):
         self.__context = [
-            ChatCompletionSystemMessageParam(
-                role="system",
-                content= _system_message
-            )
+            ChatCompletionSystemMessageParam(role="system", content=_system_message)
         ]
-        return OpenAILLMContext(messages=self.__context) # type: ignore
+        self.__llm_context = OpenAILLMContext(messages=self.__context)  # type: ignore
+        if self.__tools:
+            self.__llm_context.set_tools(self.__tools)  # type: ignore
+        return self.__llm_context
+
+    def createWindow(self, token_budget: int, keep_turns: int = 4, summarize=None):
+        """Returns a ContextWindow keeping this context within ``token_budget`` tokens."""
+        if self.__llm_context is None:
+            self.get_OpenAILLMcontext()
+        return ContextWindow(
+            self.__llm_context,
+            token_budget=token_budget,
+            keep_turns=keep_turns,
+            summarize=summarize,
+        )
+
+    def addAssistantMessage(self, content: str):
+        if self.__context is not None:
+            self.__context.append(
+                ChatCompletionAssistantMessageParam(role="assistant", content=content)
+            )
 
     def updateContext(self, content: str):
         if self.__context is not None:
             self.__context.append(
-                ChatCompletionSystemMessageParam(
-                    role = 'system',
-                    content = content
-                )
+                ChatCompletionSystemMessageParam(role="system", content=content)
             )
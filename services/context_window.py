@@ -0,0 +1,253 @@
+import asyncio
+import json
+import time
+
+from loguru import logger
+from pipecat.frames.frames import BotStoppedSpeakingFrame, Frame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from helpers.metrics import get_metrics
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+_SUMMARY_PROMPT = (
+    "Summarise this phone conversation between a caller and an assistant for the assistant's "
+    "own reference. Keep names, numbers, requests, answers given and anything still open. "
+    "Reply with the summary only, in at most 120 words."
+)
+
+
+def count_tokens(message: dict) -> int:
+    """Approximate token count of a chat message (about four characters a token).
+
+    The Groq models have no local tokenizer here; the budget only needs to be
+    roughly right, and this keeps counting free on the hot path.
+    """
+    chars = 0
+    content = message.get("content")
+    if isinstance(content, str):
+        chars += len(content)
+    elif content:
+        chars += sum(
+            len(part.get("text", "")) for part in content if isinstance(part, dict)
+        )
+    if message.get("tool_calls"):
+        chars += len(json.dumps(message["tool_calls"]))
+    # role, separators and the like
+    return chars // 4 + 4
+
+
+class ContextWindow:
+    """Keeps a call's LLM context within a token budget.
+
+    Leading system messages and the last ``keep_turns`` user turns stay
+    verbatim. Once the context exceeds ``token_budget``, tool results
+    older than that (retrieved knowledge-base chunks, mostly) are cut to
+    ``tool_result_tokens``, and if that is not enough the older turns are
+    replaced by a single summary message. The summary is written by
+    ``summarize`` in the background between turns; messages are only
+    swapped once it is ready, and only if they are still in place.
+    Token counts are cached per message, so each check only counts what was
+    added since the last one.
+    """
+
+    def __init__(
+        self,
+        context: OpenAILLMContext,
+        token_budget=3000,
+        keep_turns=4,
+        tool_result_tokens=150,
+        summarize=None,
+    ):
+        self._context = context
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.tool_result_tokens = tool_result_tokens
+        self._summarize = summarize
+        self._counts = {}  # id(message) -> (message, tokens)
+        self._task = None
+        self.stats = {"compactions": 0, "trimmed_tool_results": 0}
+
+    def tokens(self, messages=None) -> int:
+        messages = self._context.get_messages() if messages is None else messages
+        total = 0
+        for message in messages:
+            entry = self._counts.get(id(message))
+            if entry is None or entry[0] is not message:
+                entry = self._counts[id(message)] = (message, count_tokens(message))
+            total += entry[1]
+        return total
+
+    def schedule(self):
+        """Starts a compaction in the background unless one is running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.compact())
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def compact(self):
+        messages = self._context.get_messages()
+        tokens = self.tokens(messages)
+        get_metrics().observe("context_tokens", tokens)
+        if tokens <= self.token_budget:
+            return
+
+        start, end = self._compactable_span(messages)
+        if start >= end:
+            return
+        self._trim_tool_results(messages[start:end])
+        if self.tokens() <= self.token_budget:
+            return
+
+        started = time.perf_counter()
+        span = list(messages[start:end])
+        summary = await self._summary(span)
+        messages = self._context.get_messages()
+        # the aggregators only append, but make sure nothing moved meanwhile
+        if len(messages) < end or any(
+            a is not b for a, b in zip(messages[start:end], span)
+        ):
+            logger.debug("Context changed during compaction, retrying next turn")
+            return
+        messages[start:end] = [{"role": "system", "content": SUMMARY_PREFIX + summary}]
+        self._counts = {
+            id(m): self._counts[id(m)] for m in messages if id(m) in self._counts
+        }
+        self.stats["compactions"] += 1
+        get_metrics().inc("context_compactions_total")
+        get_metrics().observe(
+            "context_compaction_ms", (time.perf_counter() - started) * 1000
+        )
+        logger.debug(
+            f"Compacted {len(span)} messages: {tokens} -> {self.tokens()} tokens"
+        )
+
+    def _compactable_span(self, messages):
+        """Returns the ``[start, end)`` slice between the system prompt and the recent turns."""
+        start = 0
+        while (
+            start < len(messages)
+            and messages[start]["role"] == "system"
+            and not self._is_summary(messages[start])
+        ):
+            start += 1
+        # a previous summary is folded into the next one
+        end, turns = len(messages), 0
+        for i in range(len(messages) - 1, start - 1, -1):
+            if messages[i]["role"] == "user":
+                turns += 1
+                if turns == self.keep_turns:
+                    end = i
+                    break
+        else:
+            end = start
+        return start, end
+
+    def _trim_tool_results(self, messages):
+        limit = self.tool_result_tokens * 4
+        for message in messages:
+            content = message.get("content")
+            if (
+                message["role"] == "tool"
+                and isinstance(content, str)
+                and len(content) > limit
+            ):
+                message["content"] = content[:limit] + " [...]"
+                self._counts.pop(id(message), None)
+                self.stats["trimmed_tool_results"] += 1
+
+    async def _summary(self, messages) -> str:
+        if self._summarize is not None:
+            try:
+                return await self._summarize(self._transcript(messages))
+            except Exception as e:
+                logger.warning(
+                    f"Context summary failed, keeping an extract instead: {e}"
+                )
+        return self._extract(messages)
+
+    @staticmethod
+    def _is_summary(message) -> bool:
+        content = message.get("content")
+        return isinstance(content, str) and content.startswith(SUMMARY_PREFIX)
+
+    @classmethod
+    def _transcript(cls, messages) -> str:
+        lines = []
+        for message in messages:
+            content = message.get("content")
+            if not isinstance(content, str) or not content:
+                continue
+            if cls._is_summary(message):
+                content = content[len(SUMMARY_PREFIX) :]
+                lines.append(f"earlier: {content}")
+            else:
+                lines.append(f"{message['role']}: {content}")
+        return "\n".join(lines)
+
+    @classmethod
+    def _extract(cls, messages, sentence_chars=160) -> str:
+        # no summariser: keep the opening of each caller and assistant message
+        parts = []
+        for message in messages:
+            content = message.get("content")
+            if (
+                message["role"] in ("user", "assistant")
+                and isinstance(content, str)
+                and content
+            ):
+                parts.append(f"{message['role']}: {content[:sentence_chars]}")
+            elif cls._is_summary(message):
+                parts.append(content[len(SUMMARY_PREFIX) :])
+        return " | ".join(parts)
+
+
+def llm_summarizer(client, model: str, max_tokens=200):
+    """Returns a ``summarize(transcript)`` coroutine backed by a chat completions client."""
+
+    async def summarize(transcript: str) -> str:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": _SUMMARY_PROMPT},
+                {"role": "user", "content": transcript},
+            ],
+            max_tokens=max_tokens,
+            temperature=0,
+        )
+        return response.choices[0].message.content.strip()
+
+    return summarize
+
+
+class ContextWindowProcessor(FrameProcessor):
+    """Compacts the context once the bot has finished speaking.
+
+    That is the quiet point of a turn: the response is in the context and
+    the caller has only just started answering, so the summary is usually
+    ready before the next LLM request. Place it after the assistant
+    aggregator.
+    """
+
+    def __init__(self, window: ContextWindow, **kwargs):
+        super().__init__(**kwargs)
+        self._window = window
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, BotStoppedSpeakingFrame):
+            self._window.schedule()
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        await self._window.close()
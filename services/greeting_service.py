@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+
+from loguru import logger
+from pipecat.frames.frames import (
+    OutputAudioRawFrame,
+    StartInterruptionFrame,
+    UserStartedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+DEFAULT_GREETING = "Hello, thanks for calling. How can I help you today?"
+
+
+class GreetingService:
+    """Greeting text per ACS phone number, with its audio rendered ahead of time.
+
+    ``greetings`` maps an ``acsPhoneNumber`` to the text callers of that
+    number hear first; any other number gets ``default``. :meth:`prerender`
+    synthesises every greeting once at startup, so a call can start playing
+    one the moment its media websocket connects.
+    """
+
+    def __init__(self, default: str = DEFAULT_GREETING, greetings: dict | None = None):
+        self.default = default
+        self.greetings = greetings or {}
+        self._audio = {}
+
+    @classmethod
+    def from_file(cls, path: str | None, default: str = DEFAULT_GREETING):
+        """Loads ``{"<acsPhoneNumber>": "<greeting>", "default": "<greeting>"}``."""
+        greetings = {}
+        if path:
+            with open(path, "r") as f:
+                greetings = json.load(f)
+        return cls(default=greetings.pop("default", default), greetings=greetings)
+
+    def text_for(self, acs_phone_number: str) -> str:
+        return self.greetings.get(acs_phone_number, self.default)
+
+    def get(self, acs_phone_number: str):
+        """Returns ``(text, audio)`` for a number, or None if it wasn't rendered."""
+        text = self.text_for(acs_phone_number)
+        audio = self._audio.get(text)
+        if audio is None:
+            return None
+        return text, audio
+
+    async def prerender(self, tts):
+        """Renders each distinct greeting with ``tts.prerender``; failures fall back to the LLM."""
+        for text in {self.default, *self.greetings.values()}:
+            try:
+                self._audio[text] = await tts.prerender(text)
+            except Exception as e:
+                logger.warning(f"Failed to pre-render greeting [{text}]: {e}")
+        logger.info(f"Pre-rendered {len(self._audio)} greeting(s)")
+
+
+class GreetingPlayer(BaseObserver):
+    """Plays pre-rendered greeting audio straight to the ACS websocket.
+
+    The pipeline's services connect one after another as the StartFrame
+    travels down it, so audio queued through the pipeline would wait for
+    Deepgram and ElevenLabs. The player serialises the greeting with the
+    call's serializer and paces it to real time itself, starting as soon as
+    the caller connects. As an observer of the call's pipeline it stops the
+    moment the caller starts talking.
+    """
+
+    def __init__(
+        self,
+        websocket,
+        serializer,
+        audio: bytes,
+        frame_bytes: int,
+        jitter_buffer_ms: int,
+    ):
+        self._websocket = websocket
+        self._serializer = serializer
+        self._audio = audio
+        self._frame_bytes = frame_bytes
+        self._jitter_buffer = jitter_buffer_ms / 1000
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._play())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def on_push_frame(self, data: FramePushed):
+        if self._task is not None and isinstance(
+            data.frame, (UserStartedSpeakingFrame, StartInterruptionFrame)
+        ):
+            # the interruption's StopAudio clears the frame or two ACS has queued
+            self._task.cancel()
+
+    async def _play(self):
+        sample_rate = self._serializer.sample_rate
+        frame_duration = self._frame_bytes / (2 * sample_rate)
+        next_send_time = time.monotonic()
+        try:
+            for offset in range(0, len(self._audio), self._frame_bytes):
+                chunk = self._audio[offset : offset + self._frame_bytes]
+                frame = OutputAudioRawFrame(
+                    audio=chunk, sample_rate=sample_rate, num_channels=1
+                )
+                await self._websocket.send_text(await self._serializer.serialize(frame))
+                next_send_time += frame_duration
+                lead = next_send_time - time.monotonic()
+                if lead > self._jitter_buffer:
+                    await asyncio.sleep(lead - self._jitter_buffer)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # the caller hung up during the greeting
+            logger.debug(f"Greeting playback stopped: {e}")
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from loguru import logger
+
+from helpers.metrics import Histogram, get_metrics
+
+
+class LLMBackend:
+    """One OpenAI-compatible endpoint and the time to first token it has shown."""
+
+    def __init__(self, name: str, client, model: str):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.ewma = None  # seconds
+        self.ttft = Histogram(window=200)
+        self.failed_at = None
+
+    def healthy(self, cooldown: float) -> bool:
+        return self.failed_at is None or time.monotonic() - self.failed_at > cooldown
+
+    def observe(self, ttft: float, alpha: float):
+        self.ewma = (
+            ttft if self.ewma is None else alpha * ttft + (1 - alpha) * self.ewma
+        )
+        self.ttft.observe(ttft)
+        self.failed_at = None
+
+
+class LLMRouter:
+    """Sends each chat completion to the fastest healthy of several backends.
+
+    Backends are ranked by an EWMA of their time to first token; one not
+    measured yet goes first so it gets measured, and one that failed sits
+    out for ``cooldown`` seconds. A streaming request that has no first
+    token by its backend's p95 (``hedge_percentile``, and at least
+    ``min_hedge_delay``) is hedged: the same request goes to the next
+    backend, the first to stream a token wins and the other is closed. A
+    backend that fails before streaming anything is replaced by the next.
+
+    It has the ``chat.completions.create`` of an AsyncOpenAI client, so it
+    can stand in for the shared client of the LLM services and summaries.
+    """
+
+    def __init__(
+        self,
+        backends: list[LLMBackend],
+        alpha=0.2,
+        hedge=True,
+        hedge_percentile=0.95,
+        min_hedge_delay=0.25,
+        initial_hedge_delay=1.0,
+        cooldown=30.0,
+    ):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.alpha = alpha
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.initial_hedge_delay = initial_hedge_delay
+        self.cooldown = cooldown
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def ranked(self) -> list[LLMBackend]:
+        return sorted(
+            self.backends,
+            key=lambda b: (
+                not b.healthy(self.cooldown),
+                b.ewma is not None,
+                b.ewma or 0.0,
+            ),
+        )
+
+    def hedge_delay(self, backend: LLMBackend) -> float:
+        # too few samples for a percentile yet
+        if backend.ttft.count < 20:
+            return max(self.min_hedge_delay, self.initial_hedge_delay)
+        return max(
+            self.min_hedge_delay,
+            backend.ttft.percentiles((self.hedge_percentile,))[self.hedge_percentile],
+        )
+
+    def stats(self) -> dict:
+        return {
+            b.name: {
+                "ewma_ms": round(b.ewma * 1000) if b.ewma is not None else None,
+                "healthy": b.healthy(self.cooldown),
+            }
+            for b in self.backends
+        }
+
+    async def create(self, **params):
+        if not params.get("stream"):
+            return await self._complete(params)
+        return await self._stream(params)
+
+    async def warm_up(self):
+        results = await asyncio.gather(
+            *(b.client.models.list() for b in self.backends), return_exceptions=True
+        )
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, Exception):
+                logger.warning(f"LLM backend {backend.name} warm-up failed: {result}")
+
+    async def close(self):
+        for backend in self.backends:
+            await backend.client.close()
+
+    async def _complete(self, params):
+        error = None
+        for backend in self.ranked():
+            try:
+                return await backend.client.chat.completions.create(
+                    **{**params, "model": backend.model}
+                )
+            except Exception as e:
+                self._failed(backend, e)
+                error = e
+        raise error
+
+    async def _stream(self, params):
+        queue = self.ranked()
+        tasks = {}  # task -> (backend, launched at)
+        started = time.perf_counter()
+        error = None
+
+        def launch():
+            backend = queue.pop(0)
+            tasks[asyncio.create_task(self._first_chunk(backend, params))] = (
+                backend,
+                time.perf_counter(),
+            )
+            return backend
+
+        primary = launch()
+        deadline = self.hedge_delay(primary) if self.hedge else None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=deadline, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # no first token by the deadline, so ask the next backend too
+                    deadline = None
+                    if queue:
+                        backend = launch()
+                        logger.debug(
+                            f"Hedging LLM request from {primary.name} to {backend.name}"
+                        )
+                        get_metrics().inc("llm_hedges_total", backend=backend.name)
+                    continue
+                for task in done:
+                    backend, launched = tasks.pop(task)
+                    try:
+                        stream, first = task.result()
+                    except Exception as e:
+                        self._failed(backend, e)
+                        error = e
+                        continue
+                    now = time.perf_counter()
+                    backend.observe(now - launched, self.alpha)
+                    get_metrics().observe(
+                        "llm_ttft_ms", (now - started) * 1000, backend=backend.name
+                    )
+                    if backend is not primary:
+                        get_metrics().inc("llm_hedge_wins_total", backend=backend.name)
+                    for other, other_launched in tasks.values():
+                        # the loser was at least this slow
+                        other.ewma = max(other.ewma or 0.0, now - other_launched)
+                    return self._relay(stream, first)
+                if not tasks and queue:
+                    launch()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+                task.add_done_callback(self._close_loser)
+
+    @staticmethod
+    async def _first_chunk(backend: LLMBackend, params):
+        stream = await backend.client.chat.completions.create(
+            **{**params, "model": backend.model}
+        )
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await stream.close()
+            raise
+        return stream, first
+
+    @staticmethod
+    async def _relay(stream, first):
+        try:
+            if first is not None:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+        finally:
+            await stream.close()
+
+    @staticmethod
+    def _close_loser(task: asyncio.Task):
+        # a loser that streamed its first token just as it was cancelled
+        if not task.cancelled() and task.exception() is None:
+            stream, _ = task.result()
+            asyncio.ensure_future(stream.close())
+
+    def _failed(self, backend: LLMBackend, error: Exception):
+        backend.failed_at = time.monotonic()
+        get_metrics().inc("llm_backend_errors_total", backend=backend.name)
+        logger.warning(f"LLM backend {backend.name} failed: {error}")
@@ -1,60 +1,333 @@
+import asyncio
+
+import httpx
+from loguru import logger
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pipecat.frames.frames import FunctionCallResultProperties, TTSSpeakFrame
 from pipecat.services.groq.llm import GroqLLMService
-from helpers.rag_searcher import get_search_response
+from pipecat.services.llm_service import FunctionCallParams
+from helpers.metrics import get_metrics
+from helpers.rag_results import context_sentences, format_search_results
+from helpers.rag_searcher import get_search_response, result_token_budget
+from services.llm_router import LLMBackend, LLMRouter
+from services.speculative_llm import SpeculativeLLMMixin
+from services.stubs import StubLLMService, use_stub_services
+import dataclasses
 import json
 import os
+import time
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+DEFAULT_FILLER = "One moment, let me check that."
+DEFAULT_FALLBACK = "The {name} function did not answer in time. Tell the caller you could not get that right now."
+FALLBACKS = {
+    "search": "The knowledge base did not answer in time. Tell the caller you could not look that up right now and offer to help otherwise.",
+}
+
+
+class PooledGroqLLMService(GroqLLMService):
+    """GroqLLMService that can reuse an existing client and its connection pool."""
+
+    def __init__(self, *, client=None, **kwargs):
+        self._shared_client = client
+        super().__init__(**kwargs)
+
+    def create_client(self, api_key=None, base_url=None, **kwargs):
+        if self._shared_client is not None:
+            return self._shared_client
+        return super().create_client(api_key, base_url, **kwargs)
+
+
+class SpeculativeGroqLLMService(SpeculativeLLMMixin, PooledGroqLLMService):
+    """PooledGroqLLMService that can start a turn's completion from interim transcripts."""
+
+
+class SpeculativeStubLLMService(SpeculativeLLMMixin, StubLLMService):
+    """StubLLMService with speculation, to load-test it offline."""
+
+
+class ToolEngine:
+    """Runs the LLM's function calls with deadlines and filler speech.
+
+    pipecat already runs the calls of one LLM turn as concurrent tasks
+    (``run_in_parallel``); the engine wraps each handler so that a call
+    missing its deadline is cancelled and answered with a fallback result,
+    and the LLM can tell the caller instead of leaving them in silence.
+    ``deadlines`` overrides ``timeout`` per function. Once calls have been
+    running for ``filler_after`` seconds the caller hears
+    ``filler_phrase``, once per batch of concurrent calls.
+    """
+
+    def __init__(
+        self,
+        timeout=4.0,
+        deadlines=None,
+        filler_after=1.0,
+        filler_phrase=DEFAULT_FILLER,
+    ):
+        self.timeout = timeout
+        self.deadlines = deadlines or {}
+        self.filler_after = filler_after
+        self.filler_phrase = filler_phrase
+        self._running = 0
+        self._filler_played = False
+
+    def wrap(self, name, handler, filler=True):
+        async def run(params: FunctionCallParams):
+            await self.run(name, handler, params, filler)
+
+        return run
+
+    async def run(self, name, handler, params: FunctionCallParams, filler=True):
+        answered = False
+
+        async def result_callback(result, *, properties=None):
+            nonlocal answered
+            # a handler answering after its deadline has already been covered
+            if not answered:
+                answered = True
+                await params.result_callback(result, properties=properties)
+
+        if self._running == 0:
+            self._filler_played = False
+        self._running += 1
+        filler_task = None
+        if filler and self.filler_phrase and self.filler_after > 0:
+            filler_task = asyncio.create_task(self._filler(params.llm))
+        try:
+            deadline = self.deadlines.get(name, self.timeout)
+            await asyncio.wait_for(
+                handler(dataclasses.replace(params, result_callback=result_callback)),
+                deadline,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Function {name} missed its {deadline}s deadline")
+            get_metrics().inc("tool_timeouts_total", function=name)
+            await result_callback(
+                FALLBACKS.get(name, DEFAULT_FALLBACK.format(name=name))
+            )
+        finally:
+            self._running -= 1
+            if filler_task is not None:
+                filler_task.cancel()
+
+    async def _filler(self, llm):
+        await asyncio.sleep(self.filler_after)
+        if not self._filler_played:
+            self._filler_played = True
+            get_metrics().inc("tool_fillers_total")
+            await llm.push_frame(TTSSpeakFrame(self.filler_phrase))
+
 
 class LLMService:
-    def __init__(self, api_key: str, model: str):
-        self.llm = GroqLLMService(
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        client=None,
+        prefetcher=None,
+        tool_engine=None,
+        speculation_similarity=None,
+    ):
+        # with a speculation_similarity, turns can start from interim transcripts
+        speculation = {}
+        if speculation_similarity is not None:
+            speculation = {"speculation_similarity": speculation_similarity}
+        if use_stub_services():
+            stub_class = SpeculativeStubLLMService if speculation else StubLLMService
+            self.llm = stub_class(model=model, **speculation)
+        else:
+            llm_class = (
+                SpeculativeGroqLLMService if speculation else PooledGroqLLMService
+            )
+            self.llm = llm_class(
+                api_key=api_key,
+                model=model,
+                client=client,
+                **speculation,
+            )
+        # Per-call SearchPrefetcher fed from interim transcripts, if enabled
+        self.prefetcher = prefetcher
+        self.tool_engine = tool_engine or ToolEngine()
+        # CallControl for end_call and transfer_call, bound once the call's task exists
+        self.call_control = None
+
+    @staticmethod
+    def create_client(api_key: str, base_url: str = GROQ_BASE_URL):
+        """Create an OpenAI-compatible client whose connections can be shared across calls."""
+        return AsyncOpenAI(
             api_key=api_key,
-            model=model,
+            base_url=base_url,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=100,
+                    max_connections=1000,
+                    keepalive_expiry=None,
+                )
+            ),
         )
 
+    @staticmethod
+    def create_router(backends, **kwargs):
+        """Create an LLMRouter over OpenAI-compatible backends.
+
+        Each backend is ``{"name", "base_url", "model"}`` plus ``api_key`` or
+        ``api_key_env``, the environment variable holding it; ``kwargs`` go to
+        :class:`LLMRouter`.
+        """
+        return LLMRouter(
+            [
+                LLMBackend(
+                    backend.get("name", backend["base_url"]),
+                    LLMService.create_client(
+                        backend.get("api_key")
+                        or os.getenv(backend.get("api_key_env", ""), ""),
+                        backend["base_url"],
+                    ),
+                    backend["model"],
+                )
+                for backend in backends
+            ],
+            **kwargs,
+        )
+
+    @staticmethod
+    def load_tools(tools_path=None):
+        """Parse tools.json, defaulting to helpers/tools.json."""
+        if not tools_path:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            default_tools_path = os.path.join(
+                current_dir, "..", "helpers", "tools.json"
+            )
+            tools_path = os.path.normpath(default_tools_path)
+        print(f"Using tools.json from: {tools_path}")
+        with open(tools_path, "r") as file:
+            return json.load(file)
+
+    @staticmethod
+    def chat_tools(tools):
+        """Converts tools.json entries to the chat completions ``tools`` format."""
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool["name"],
+                    "description": tool["description"],
+                    "parameters": tool["parameters"],
+                },
+            }
+            for tool in tools
+        ]
+
     def get_llm(self):
         return self.llm
-    
-    def add_functions(self, functions):
+
+    def add_functions(self, functions, filler=True):
         for function_name, function_handler in functions.items():
-            self.llm.register_function(function_name, function_handler)
+            self.llm.register_function(
+                function_name,
+                self.tool_engine.wrap(function_name, function_handler, filler),
+            )
 
-    async def azure_rag_search(self, query: str):
+    async def search_knowledge_base(self, query: str):
         """Perform a search using Azure RAG searcher."""
         args = {
             "query": query,
             "search_config": {
                 "SEARCH_INDEX": "sfs-vector",
-                "SEARCH_SEMANTIC_CONFIGURATION": "sfs-vector-semantic-configuration"
-            }
+                "SEARCH_SEMANTIC_CONFIGURATION": "sfs-vector-semantic-configuration",
+            },
         }
         return await get_search_response(args)
 
+    async def azure_rag_search(self, params: FunctionCallParams):
+        """Handle the LLM's search function call, reusing a prefetched result if one matches."""
+        started = time.perf_counter()
+        query = params.arguments["query"]
+        result = None
+        source = "prefetch"
+        if self.prefetcher is not None:
+            result = await self.prefetcher.lookup(query)
+        if result is None:
+            source = "search"
+            result = await self.search_knowledge_base(query)
+        # only what the context doesn't already hold, cut to the budget
+        text, duplicates = format_search_results(
+            result,
+            context_sentences(params.context.get_messages()),
+            result_token_budget,
+        )
+        metrics = get_metrics()
+        metrics.observe(
+            "tool_call_ms",
+            (time.perf_counter() - started) * 1000,
+            function="search",
+            source=source,
+        )
+        metrics.observe("rag_result_tokens", len(text) / 4)
+        if duplicates:
+            metrics.inc("rag_duplicate_sentences_total", duplicates)
+        await params.result_callback(text)
+
+    async def end_call(self, params: FunctionCallParams):
+        """Handle the LLM's end_call function call."""
+        if self.call_control is None:
+            await params.result_callback("Ending the call is not available.")
+            return
+        # the goodbye is spoken by call control, so the LLM does not answer again
+        await params.result_callback(
+            await self.call_control.end_call(params.arguments.get("reason", "")),
+            properties=FunctionCallResultProperties(run_llm=False),
+        )
+
+    async def transfer_call(self, params: FunctionCallParams):
+        """Handle the LLM's transfer_call function call."""
+        if self.call_control is None:
+            await params.result_callback("Transferring the call is not available.")
+            return
+        result = await self.call_control.transfer_call()
+        # run the LLM again only if the transfer was refused
+        await params.result_callback(
+            result,
+            properties=FunctionCallResultProperties(
+                run_llm=self.call_control.action is None
+            ),
+        )
+
     def register_rag_search(self):
         """Register the Azure RAG search function with the LLM."""
         self.add_functions({"search": self.azure_rag_search})
 
-    def register_functions_from_tools(self, tools_path = None) -> None:
-        """Register functions dynamically based on tools.json."""
+    def register_functions_from_tools(self, tools_path=None, tools=None) -> None:
+        """Register functions dynamically based on tools.json.
+
+        Pass already parsed ``tools`` to skip reading the file again.
+        """
         print("Registering functions from tools.json")
-        if not tools_path:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            default_tools_path = os.path.join(current_dir, "..", "helpers", "tools.json")
-            tools_path = os.path.normpath(default_tools_path)
-        print(f"Using tools.json from: {tools_path}")
         try:
-            with open(tools_path, "r") as file:
-                tools = json.load(file)
+            if tools is None:
+                tools = self.load_tools(tools_path)
 
             function_map = {
                 "search": self.azure_rag_search,
                 # more mappings here if needed
             }
+            # call control speaks for itself, no filler needed
+            call_control_map = {
+                "end_call": self.end_call,
+                "transfer_call": self.transfer_call,
+            }
 
             for tool in tools:
                 function_name = tool["name"]
                 if function_name in function_map:
                     self.add_functions({function_name: function_map[function_name]})
-            
+                elif function_name in call_control_map:
+                    self.add_functions(
+                        {function_name: call_control_map[function_name]}, filler=False
+                    )
+
             print("Functions registered successfully from tools.json")
         except Exception as e:
             raise Exception(f"Error registering functions from tools.json: {e}")
-
@@ -0,0 +1,143 @@
+import time
+from collections import OrderedDict
+
+from pipecat.frames.frames import (
+    LLMTextFrame,
+    MetricsFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.metrics.metrics import ProcessingMetricsData, TTFBMetricsData
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+from helpers.metrics import get_metrics
+
+_TRACKED_FRAMES = (
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+    TranscriptionFrame,
+    MetricsFrame,
+)
+
+
+class CallMetricsObserver(BaseObserver):
+    """Records per-turn latency breakdowns and service metrics for one call.
+
+    A turn starts when the caller stops speaking. Its milestones are the first
+    final transcript, the first LLM token, the first TTS audio and the first
+    audio frame the serializer sends; each is recorded as milliseconds since
+    end of speech, the last one as ``turn_voice_to_voice_ms``. A barge-in is
+    timed from the caller starting to speak to the ``StopAudio`` that cuts
+    the bot off, as ``barge_in_ms``. Wire the serializer's ``on_audio_sent``,
+    ``on_audio_received`` and ``on_audio_stopped`` callbacks to the methods
+    of the same name.
+    """
+
+    def __init__(self, metrics=None, **kwargs):
+        super().__init__(**kwargs)
+        self._metrics = metrics or get_metrics()
+        # observers see a frame once per hop, so remember what was handled
+        self._seen = OrderedDict()
+        self._speech_ended_at = None
+        self._speech_started_at = None
+        self._transcribed_while_speaking = False
+        self._marks = set()
+        self._received_secs = 0.0
+        self._received_frames = 0
+        self._min_offset = None
+
+    async def on_push_frame(self, data: FramePushed):
+        frame = data.frame
+        # only the first token and audio chunk of a turn count, so these
+        # frequent frames need no dedupe
+        if isinstance(frame, LLMTextFrame):
+            self._mark("turn_llm_ttft_ms")
+            return
+        if isinstance(frame, TTSAudioRawFrame):
+            self._mark("turn_tts_ttfb_ms")
+            return
+        if not isinstance(frame, _TRACKED_FRAMES) or frame.id in self._seen:
+            return
+        self._seen[frame.id] = None
+        if len(self._seen) > 256:
+            self._seen.popitem(last=False)
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            if self._speech_ended_at is not None:
+                # barged in before the bot answered
+                self._metrics.inc("turns_interrupted_total")
+            self._speech_ended_at = None
+            self._speech_started_at = time.perf_counter()
+            self._transcribed_while_speaking = False
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._speech_ended_at = time.perf_counter()
+            self._speech_started_at = None
+            self._marks = set()
+            if self._transcribed_while_speaking:
+                # Deepgram finalised before VAD noticed the silence
+                self._mark("turn_stt_ms")
+        elif isinstance(frame, TranscriptionFrame):
+            if self._speech_ended_at is None:
+                self._transcribed_while_speaking = True
+            else:
+                self._mark("turn_stt_ms")
+        elif isinstance(frame, MetricsFrame):
+            for metric in frame.data:
+                if isinstance(metric, TTFBMetricsData) and metric.value > 0:
+                    self._metrics.observe(
+                        "service_ttfb_ms",
+                        metric.value * 1000,
+                        processor=metric.processor,
+                    )
+                elif isinstance(metric, ProcessingMetricsData):
+                    self._metrics.observe(
+                        "service_processing_ms",
+                        metric.value * 1000,
+                        processor=metric.processor,
+                    )
+
+    def on_audio_received(self, frame):
+        """Tracks how far inbound audio falls behind the pace it was sent at.
+
+        ACS sends media in real time, so frame n should arrive ``n`` frame
+        durations after the first one; any extra delay is time the frame
+        spent waiting for this worker's event loop or network.
+        """
+        offset = time.perf_counter() - self._received_secs
+        self._received_secs += len(frame.audio) / (
+            frame.sample_rate * 2 * frame.num_channels
+        )
+        if self._min_offset is None or offset < self._min_offset:
+            self._min_offset = offset
+        self._received_frames += 1
+        # every 10th frame is plenty for the percentiles
+        if self._received_frames % 10 == 0:
+            self._metrics.observe(
+                "inbound_audio_lag_ms", (offset - self._min_offset) * 1000
+            )
+
+    def on_audio_sent(self, frame=None):
+        if self._speech_ended_at is None:
+            return
+        self._mark("turn_voice_to_voice_ms")
+        self._metrics.inc("turns_total")
+        self._speech_ended_at = None
+
+    def on_audio_stopped(self):
+        if self._speech_started_at is None:
+            return
+        self._metrics.observe(
+            "barge_in_ms", (time.perf_counter() - self._speech_started_at) * 1000
+        )
+        self._metrics.inc("barge_ins_total")
+        self._speech_started_at = None
+
+    def _mark(self, name: str):
+        if self._speech_ended_at is None or name in self._marks:
+            return
+        self._marks.add(name)
+        self._metrics.observe(
+            name, (time.perf_counter() - self._speech_ended_at) * 1000
+        )
@@ -0,0 +1,137 @@
+import asyncio
+from collections import OrderedDict
+
+from loguru import logger
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from helpers.embeddings import content_words, get_embedder, normalize_text
+
+
+class SearchPrefetcher:
+    """Per-call store of knowledge-base searches started ahead of the LLM.
+
+    ``start`` launches a search for what the caller has said so far and
+    cancels any earlier one for the same turn that has not finished yet.
+    ``lookup`` hands the LLM's search query the result of the closest
+    prefetch, waiting for it if it is still in flight. A prefetch only
+    counts when every content word of the LLM's query was said by the
+    caller (see :func:`~helpers.embeddings.content_words`) and the two are
+    within ``similarity`` cosine; "deliver to munich" never gets the
+    prefetch for "deliver to berlin". Entries only live for the current
+    turn, :meth:`new_turn` drops them.
+    """
+
+    def __init__(self, search, similarity=0.75, maxsize=4, embedder=None):
+        self._search = search
+        self.similarity = similarity
+        self._maxsize = maxsize
+        self._embedder = embedder or get_embedder()
+        # normalised query -> (vector, content words, task)
+        self._entries = OrderedDict()
+        self._pending = None
+        self.stats = {"started": 0, "superseded": 0, "hits": 0, "misses": 0}
+
+    def start(self, query: str):
+        key = normalize_text(query)
+        if not key or key in self._entries:
+            return
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+            self.stats["superseded"] += 1
+        self._pending = asyncio.create_task(self._search(query))
+        self._entries[key] = (
+            self._embedder.embed(query),
+            content_words(query),
+            self._pending,
+        )
+        self.stats["started"] += 1
+        while len(self._entries) > self._maxsize:
+            _, (_, _, task) = self._entries.popitem(last=False)
+            task.cancel()
+
+    def new_turn(self):
+        """Drops the previous turn's prefetches; they answer another question."""
+        for _, _, task in self._entries.values():
+            task.cancel()
+        self._entries.clear()
+        self._pending = None
+
+    async def lookup(self, query: str):
+        """Returns the prefetched result for ``query`` or None on a miss."""
+        vector = self._embedder.embed(query)
+        words = content_words(query)
+        best, best_score = None, self.similarity
+        for entry_vector, entry_words, task in self._entries.values():
+            if task.cancelled() or not words <= entry_words:
+                continue
+            score = float(entry_vector @ vector)
+            if score >= best_score:
+                best, best_score = task, score
+        if best is None:
+            self.stats["misses"] += 1
+            return None
+        try:
+            # shielded so an interrupted function call does not cancel the prefetch
+            result = await asyncio.shield(best)
+        except asyncio.CancelledError:
+            if not best.cancelled():
+                raise
+            result = None
+        except Exception as e:
+            logger.warning(f"Prefetched search failed: {e}")
+            result = None
+        self.stats["hits" if result else "misses"] += 1
+        return result or None
+
+    def close(self):
+        self.new_turn()
+        logger.debug(f"Search prefetch stats: {self.stats}")
+
+
+class RAGPrefetchProcessor(FrameProcessor):
+    """Starts knowledge-base searches from transcripts before the LLM asks.
+
+    An interim transcript counts as stable once Deepgram repeats it; finals
+    are always used. The query is the speech segment's finals plus the
+    current interim, and needs at least ``min_words`` words.
+    """
+
+    def __init__(self, prefetcher: SearchPrefetcher, min_words: int = 3, **kwargs):
+        super().__init__(**kwargs)
+        self._prefetcher = prefetcher
+        self._min_words = min_words
+        self._finals = []
+        self._last_interim = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._prefetcher.new_turn()
+            self._finals = []
+            self._last_interim = None
+        elif isinstance(frame, TranscriptionFrame):
+            self._finals.append(frame.text)
+            self._last_interim = None
+            self._prefetch(" ".join(self._finals))
+        elif isinstance(frame, InterimTranscriptionFrame):
+            text = normalize_text(frame.text)
+            if text and text == self._last_interim:
+                self._prefetch(" ".join(self._finals + [frame.text]))
+            self._last_interim = text
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        self._prefetcher.close()
+
+    def _prefetch(self, query: str):
+        if len(query.split()) >= self._min_words:
+            self._prefetcher.start(query)
@@ -0,0 +1,260 @@
+import asyncio
+import difflib
+
+from loguru import logger
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from helpers.embeddings import normalize_text
+from helpers.metrics import get_metrics
+
+
+class _Speculation:
+    """A completion requested ahead of the turn, buffered as it streams in."""
+
+    def __init__(self, prefix: list, transcript: str):
+        self.prefix = prefix
+        self.transcript = transcript
+        self.chunks = []
+        self.tokens = 0
+        self.replayed = 0  # tokens handed on by replay()
+        self.error = None
+        self.done = False
+        self._arrived = asyncio.Event()
+        self.task = None
+
+    async def fill(self, stream):
+        try:
+            async for chunk in stream:
+                self.chunks.append(chunk)
+                self.tokens = self._count(self.tokens, chunk)
+                self._arrived.set()
+        except Exception as e:
+            self.fail(e)
+        else:
+            self.done = True
+            self._arrived.set()
+
+    @staticmethod
+    def _count(tokens: int, chunk) -> int:
+        if chunk.usage:
+            return chunk.usage.completion_tokens
+        if chunk.choices:
+            # Groq streams about a token a chunk
+            return tokens + 1
+        return tokens
+
+    def fail(self, error: Exception):
+        self.error = error
+        self.done = True
+        self._arrived.set()
+
+    async def replay(self):
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                self.replayed = self._count(self.replayed, self.chunks[i])
+                yield self.chunks[i]
+                i += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            self._arrived.clear()
+            await self._arrived.wait()
+
+
+class SpeculativeLLMMixin:
+    """Starts a turn's completion from the interim transcript, before the turn ends.
+
+    :meth:`speculate` requests a completion for the context plus what the
+    caller has said so far and buffers it. When the user aggregator then
+    sends the real turn, the buffered completion is replayed if the context
+    is unchanged apart from the new user message and that message matches
+    the speculated transcript within ``speculation_similarity`` (a word-level
+    ratio). Otherwise it is cancelled and a fresh request goes out as usual.
+    Replaying goes through the normal response handling, so text and tool
+    calls are only acted on once the turn is real. A replay that is not read
+    to the end, because the caller barged in, stops the request behind it
+    and counts what it did not hand on as wasted.
+    """
+
+    def __init__(self, *, speculation_similarity: float = 0.9, **kwargs):
+        super().__init__(**kwargs)
+        self.speculation_similarity = speculation_similarity
+        self._speculation = None
+        self._replaying = None
+        self.speculation_stats = {
+            "started": 0,
+            "hits": 0,
+            "misses": 0,
+            "wasted_tokens": 0,
+        }
+
+    def speculate(self, context: OpenAILLMContext, transcript: str):
+        speculation = self._speculation
+        if speculation is not None:
+            if normalize_text(speculation.transcript) == normalize_text(transcript):
+                return
+            self._discard()
+        prefix = list(context.get_messages())
+        messages = prefix + [{"role": "user", "content": transcript}]
+        speculation = _Speculation(prefix, transcript)
+        speculation.task = asyncio.create_task(
+            self._speculate(speculation, context, messages)
+        )
+        self._speculation = speculation
+        self.speculation_stats["started"] += 1
+
+    def cancel_speculation(self):
+        if self._speculation is not None:
+            self._discard()
+
+    async def _speculate(self, speculation, context, messages):
+        try:
+            stream = await self.get_chat_completions(context, messages)
+        except Exception as e:
+            logger.debug(f"{self}: Speculative completion failed: {e}")
+            speculation.fail(e)
+            return
+        await speculation.fill(stream)
+
+    async def _stream_chat_completions(self, context: OpenAILLMContext):
+        speculation = self._take(context)
+        if speculation is not None:
+            logger.debug(
+                f"{self}: Replaying speculative completion [{speculation.transcript}]"
+            )
+            return self._replay(speculation)
+        return await super()._stream_chat_completions(context)
+
+    async def _replay(self, speculation: _Speculation):
+        if self._replaying is not None:
+            # an interrupted replay whose generator has not been closed yet
+            self._abandon(self._replaying)
+        self._replaying = speculation
+        finished = False
+        try:
+            async for chunk in speculation.replay():
+                yield chunk
+            finished = True
+        finally:
+            if self._replaying is speculation:
+                if finished:
+                    self._replaying = None
+                else:
+                    self._abandon(speculation)
+
+    def _abandon(self, speculation: _Speculation):
+        self._replaying = None
+        speculation.task.cancel()
+        self._count_wasted(speculation.tokens - speculation.replayed)
+
+    def _take(self, context):
+        speculation = self._speculation
+        if speculation is None:
+            return None
+        self._speculation = None
+        messages = context.get_messages()
+        matches = (
+            len(messages) == len(speculation.prefix) + 1
+            and all(a is b for a, b in zip(messages, speculation.prefix))
+            and messages[-1].get("role") == "user"
+            and self._similar(messages[-1].get("content"), speculation.transcript)
+            # a request that failed before streaming anything is simply retried
+            and not (
+                speculation.done
+                and speculation.error is not None
+                and not speculation.chunks
+            )
+        )
+        if not matches:
+            self._waste(speculation)
+            return None
+        self.speculation_stats["hits"] += 1
+        get_metrics().inc("llm_speculations_total", outcome="hit")
+        return speculation
+
+    def _similar(self, content, transcript) -> bool:
+        if not isinstance(content, str):
+            return False
+        a, b = normalize_text(content).split(), normalize_text(transcript).split()
+        return (
+            a == b
+            or difflib.SequenceMatcher(None, a, b).ratio()
+            >= self.speculation_similarity
+        )
+
+    def _discard(self):
+        speculation, self._speculation = self._speculation, None
+        self._waste(speculation)
+
+    def _waste(self, speculation):
+        speculation.task.cancel()
+        self.speculation_stats["misses"] += 1
+        get_metrics().inc("llm_speculations_total", outcome="miss")
+        self._count_wasted(speculation.tokens)
+
+    def _count_wasted(self, tokens: int):
+        if tokens > 0:
+            self.speculation_stats["wasted_tokens"] += tokens
+            get_metrics().inc("llm_speculation_wasted_tokens_total", tokens)
+
+    async def cleanup(self):
+        await super().cleanup()
+        self.cancel_speculation()
+        if self._replaying is not None:
+            self._abandon(self._replaying)
+        logger.debug(f"{self}: Speculation stats: {self.speculation_stats}")
+
+
+class SpeculationProcessor(FrameProcessor):
+    """Feeds the caller's words so far to a :class:`SpeculativeLLMMixin` LLM.
+
+    Like the search prefetch, an interim transcript counts as stable once
+    Deepgram repeats it, and finals are always used. The transcript is the
+    speech segment's finals plus the current interim, with at least
+    ``min_words`` words. Place it before the user aggregator.
+    """
+
+    def __init__(
+        self,
+        llm: SpeculativeLLMMixin,
+        context: OpenAILLMContext,
+        min_words: int = 3,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._llm = llm
+        self._context = context
+        self._min_words = min_words
+        self._finals = []
+        self._last_interim = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._finals = []
+            self._last_interim = None
+        elif isinstance(frame, TranscriptionFrame):
+            self._finals.append(frame.text)
+            self._last_interim = None
+            self._speculate(" ".join(self._finals))
+        elif isinstance(frame, InterimTranscriptionFrame):
+            text = normalize_text(frame.text)
+            if text and text == self._last_interim:
+                self._speculate(" ".join(self._finals + [frame.text]))
+            self._last_interim = text
+
+        await self.push_frame(frame, direction)
+
+    def _speculate(self, transcript: str):
+        if len(transcript.split()) >= self._min_words:
+            self._llm.speculate(self._context, transcript)
@@ -1,10 +1,15 @@
 from pipecat.services.deepgram.stt import DeepgramSTTService
+from services.stubs import StubSTTService, use_stub_services
+
 
 class STTService:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, sample_rate: int | None = None):
+        if use_stub_services():
+            self.stt = StubSTTService(sample_rate=sample_rate)
+            return
+        # linear16 at the call's own rate, so audio reaches Deepgram as received
         self.stt = DeepgramSTTService(
-            api_key=api_key,
-            audio_passthrough=True
+            api_key=api_key, sample_rate=sample_rate, audio_passthrough=True
         )
 
     def get_stt(self):
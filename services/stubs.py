@@ -0,0 +1,149 @@
+"""Offline stand-ins for Deepgram, Groq and ElevenLabs.
+
+Enabled with ``STUB_SERVICES=true``; the ``services/*`` wrappers then build
+these instead of the real services, so a worker can be load-tested with no
+network access. Each one imitates its service's latency profile with
+configurable delays and produces the same frames, so everything between
+them (VAD, aggregators, serializer, transport pacing) runs for real.
+"""
+
+import asyncio
+import math
+import os
+import struct
+import time
+from typing import AsyncGenerator
+
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+from pipecat.frames.frames import (
+    Frame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.groq.llm import GroqLLMService
+from pipecat.services.stt_service import STTService
+from pipecat.services.tts_service import TTSService
+from pipecat.utils.time import time_now_iso8601
+
+STUB_TRANSCRIPT = "what are your opening hours on the weekend"
+STUB_RESPONSE = (
+    "We are open from nine in the morning until five in the afternoon on "
+    "Saturdays, and from ten until four on Sundays. Is there anything else "
+    "I can help you with today?"
+)
+
+
+def use_stub_services() -> bool:
+    return os.getenv("STUB_SERVICES", "false") == "true"
+
+
+class StubSTTService(STTService):
+    """Emits a fixed final transcript ``delay`` seconds after VAD end of speech."""
+
+    def __init__(
+        self, transcript: str = STUB_TRANSCRIPT, delay: float = 0.15, **kwargs
+    ):
+        super().__init__(audio_passthrough=True, **kwargs)
+        self._transcript = transcript
+        self._delay = delay
+
+    async def run_stt(self, audio: bytes) -> AsyncGenerator[Frame, None]:
+        # the real service streams audio out; there is nothing to do per frame
+        return
+        yield
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, UserStoppedSpeakingFrame):
+            self.create_task(self._transcribe())
+
+    async def _transcribe(self):
+        await asyncio.sleep(self._delay)
+        await self.push_frame(
+            TranscriptionFrame(self._transcript, "", time_now_iso8601())
+        )
+
+
+class StubLLMService(GroqLLMService):
+    """Streams a canned reply with a fixed time to first token and token rate."""
+
+    def __init__(
+        self,
+        *,
+        response: str = STUB_RESPONSE,
+        ttft: float = 0.3,
+        token_interval: float = 0.01,
+        **kwargs,
+    ):
+        kwargs.setdefault("api_key", "stub")
+        super().__init__(**kwargs)
+        self._tokens = [word + " " for word in response.split()]
+        self._ttft = ttft
+        self._token_interval = token_interval
+
+    async def get_chat_completions(self, context, messages):
+        return self._stream()
+
+    async def _stream(self):
+        await asyncio.sleep(self._ttft)
+        created = int(time.time())
+        for token in self._tokens:
+            yield ChatCompletionChunk(
+                id="stub",
+                object="chat.completion.chunk",
+                created=created,
+                model=self.model_name,
+                choices=[Choice(index=0, delta=ChoiceDelta(content=token))],
+            )
+            await asyncio.sleep(self._token_interval)
+
+
+class StubTTSService(TTSService):
+    """Synthesises a quiet tone, ``secs_per_word`` long per word, after ``ttfb`` seconds.
+
+    Audio is produced faster than real time, as the real service does.
+    """
+
+    def __init__(
+        self,
+        ttfb: float = 0.2,
+        secs_per_word: float = 0.3,
+        chunk_secs: float = 0.05,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._ttfb = ttfb
+        self._secs_per_word = secs_per_word
+        self._chunk_secs = chunk_secs
+        self._tone = b""
+
+    def _tone_chunk(self) -> bytes:
+        if not self._tone:
+            samples = int(self.sample_rate * self._chunk_secs)
+            self._tone = struct.pack(
+                f"<{samples}h",
+                *(
+                    int(1000 * math.sin(2 * math.pi * 220 * i / self.sample_rate))
+                    for i in range(samples)
+                ),
+            )
+        return self._tone
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        await self.start_ttfb_metrics()
+        await asyncio.sleep(self._ttfb)
+        yield TTSStartedFrame()
+        chunks = max(
+            1, round(len(text.split()) * self._secs_per_word / self._chunk_secs)
+        )
+        for _ in range(chunks):
+            await self.stop_ttfb_metrics()
+            yield TTSAudioRawFrame(self._tone_chunk(), self.sample_rate, 1)
+            # let the rest of the pipeline run between chunks
+            await asyncio.sleep(0)
+        yield TTSStoppedFrame()
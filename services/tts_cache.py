@@ -0,0 +1,302 @@
+import asyncio
+import functools
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import uuid
+from typing import AsyncGenerator
+
+import aiohttp
+from cachetools import LRUCache, TTLCache
+from loguru import logger
+from pipecat.frames.frames import (
+    Frame,
+    StartInterruptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.elevenlabs.tts import (
+    ELEVENLABS_MULTILINGUAL_MODELS,
+    ElevenLabsTTSService,
+    output_format_from_sample_rate,
+)
+
+from helpers.metrics import get_metrics
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    # punctuation and case change the prosody, so only whitespace is folded
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class TTSAudioCache:
+    """Process-wide store of synthesised PCM, keyed per voice and sentence.
+
+    Audio lives in an LRU bounded by ``max_bytes`` and, given ``directory``,
+    in one raw ``.pcm`` file per key that is memory-mapped back in on a
+    memory miss, so the cache survives restarts and is shared by workers on
+    the same host. A sentence is only worth synthesising for the cache once
+    it has been spoken ``min_repeats`` times; :meth:`seen` counts that.
+    """
+
+    def __init__(
+        self, max_bytes=64 * 1024 * 1024, directory=None, min_repeats=2, max_chars=200
+    ):
+        self.directory = directory
+        self.min_repeats = min_repeats
+        self.max_chars = max_chars
+        self._memory = LRUCache(maxsize=max_bytes, getsizeof=len)
+        self._counts = TTLCache(maxsize=10000, ttl=24 * 3600)
+        self._pending = {}
+        self._stats = {"hits": 0, "misses": 0, "stored": 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(text: str, *params) -> str:
+        payload = json.dumps(
+            [normalize_utterance(text), *params], sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def get(self, key: str):
+        audio = self._memory.get(key)
+        if audio is None and self.directory:
+            audio = self._read(key)
+            if audio is not None:
+                self._remember(key, audio)
+        self._stats["hits" if audio is not None else "misses"] += 1
+        return audio
+
+    def seen(self, key: str) -> bool:
+        """Counts a miss; True once the sentence has repeated often enough to fetch."""
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        return count >= self.min_repeats
+
+    def schedule(self, key: str, synthesize):
+        """Stores ``await synthesize()`` under ``key`` in the background.
+
+        The task belongs to the cache rather than the call that missed, so it
+        finishes even if that call hangs up, and runs once however many calls
+        miss on the same sentence meanwhile.
+        """
+        if key in self._pending:
+            return
+        task = asyncio.create_task(self._store(key, synthesize))
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def put(self, key: str, audio: bytes):
+        self._remember(key, audio)
+        self._stats["stored"] += 1
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write, key, audio)
+            except OSError as e:
+                logger.warning(f"Failed to persist cached TTS audio {key}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "size": len(self._memory),
+            "bytes": self._memory.currsize,
+        }
+
+    async def _store(self, key, synthesize):
+        try:
+            audio = await synthesize()
+        except Exception as e:
+            logger.warning(f"Failed to synthesise audio for the TTS cache: {e}")
+            return
+        if audio:
+            await self.put(key, audio)
+
+    def _remember(self, key, audio):
+        if len(audio) <= self._memory.maxsize:
+            self._memory[key] = audio
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                return data[:]
+        except (FileNotFoundError, ValueError):
+            # ValueError: an empty file cannot be mapped
+            return None
+
+    def _write(self, key, audio):
+        # write then rename, so another worker never maps a half-written file
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, self._path(key))
+
+
+class CachedElevenLabsTTSService(ElevenLabsTTSService):
+    """ElevenLabs TTS that plays repeated sentences from :class:`TTSAudioCache`.
+
+    Only the first sentence of a response is served from the cache: later
+    sentences join an ElevenLabs context whose audio is still streaming, and
+    splicing cached audio in between would play it out of order. A hit opens
+    the response's audio context locally and the rest of the response keeps
+    streaming into it, so the cached audio and the live audio play back to
+    back. Misses are counted, and a sentence that keeps coming back is
+    synthesised once over the HTTP API in the background and stored.
+    """
+
+    def __init__(self, *, cache: TTSAudioCache, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+        # a context opened for cached audio that ElevenLabs has not seen yet
+        self._cached_context_id = None
+
+    @property
+    def cache_sample_rate(self) -> int:
+        # the output rate is only settled in start(), so fall back to the configured one
+        return self.sample_rate or self._init_sample_rate
+
+    def cache_key(self, text: str) -> str:
+        return TTSAudioCache.key(
+            text,
+            self._voice_id,
+            self.cache_sample_rate,
+            self.model_name,
+            self._voice_settings,
+            self._settings["language"],
+        )
+
+    async def prerender(self, text: str) -> bytes:
+        """Returns the audio for ``text``, synthesising and caching it if needed.
+
+        Works before the service is started, e.g. to render greetings at
+        startup.
+        """
+        key = self.cache_key(text)
+        audio = self._cache.get(key)
+        if audio is None:
+            audio = await self._synthesize(text)
+            await self._cache.put(key, audio)
+        return audio
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        if self._cached_context_id and not self._started:
+            # the response that opened it is over (TTSStoppedFrame went out)
+            await self._release_cached_context()
+
+        if not self._started and len(text) <= self._cache.max_chars:
+            key = self.cache_key(text)
+            audio = self._cache.get(key)
+            if audio is not None:
+                get_metrics().inc("tts_cache_hits_total")
+                logger.debug(f"{self}: Playing cached TTS [{text}]")
+                async for frame in self._play_cached(text, audio):
+                    yield frame
+                return
+            get_metrics().inc("tts_cache_misses_total")
+            if self._cache.seen(key):
+                self._cache.schedule(key, functools.partial(self._synthesize, text))
+
+        # ElevenLabs takes over the context from here on
+        self._cached_context_id = None
+        async for frame in super().run_tts(text):
+            yield frame
+
+    async def flush_audio(self):
+        if self._cached_context_id and self._context_id == self._cached_context_id:
+            # nothing was sent to ElevenLabs, so no isFinal will close it
+            await self._release_cached_context()
+            self._started = False
+            return
+        await super().flush_audio()
+
+    async def _handle_interruption(
+        self, frame: StartInterruptionFrame, direction: FrameDirection
+    ):
+        if self._cached_context_id and self._context_id == self._cached_context_id:
+            # don't ask ElevenLabs to close a context it never opened
+            self._context_id = None
+        self._cached_context_id = None
+        await super()._handle_interruption(frame, direction)
+
+    async def _play_cached(self, text, audio):
+        await self.start_ttfb_metrics()
+        yield TTSStartedFrame()
+        self._started = True
+        self._context_id = self._cached_context_id = str(uuid.uuid4())
+        await self.create_audio_context(self._context_id)
+        await self.append_to_audio_context(
+            self._context_id, TTSAudioRawFrame(audio, self.sample_rate, 1)
+        )
+        await self.stop_ttfb_metrics()
+
+        # no alignment for cached audio, so spread the words over its duration
+        duration = len(audio) / (2 * self.sample_rate)
+        words = text.split()
+        self.start_word_timestamps()
+        await self.add_word_timestamps(
+            [(word, duration * i / len(words)) for i, word in enumerate(words)]
+        )
+        self._cumulative_time = duration
+
+    async def _release_cached_context(self):
+        if self._context_id == self._cached_context_id:
+            await self.remove_audio_context(self._context_id)
+            self._context_id = None
+        self._cached_context_id = None
+
+    async def _synthesize(self, text):
+        base_url = self._url.replace("wss://", "https://", 1).replace(
+            "ws://", "http://", 1
+        )
+        payload = {"text": text, "model_id": self.model_name}
+        if self._voice_settings:
+            payload["voice_settings"] = self._voice_settings
+        language = self._settings["language"]
+        if self.model_name in ELEVENLABS_MULTILINGUAL_MODELS and language is not None:
+            payload["language_code"] = language
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                f"{base_url}/v1/text-to-speech/{self._voice_id}",
+                params={
+                    "output_format": output_format_from_sample_rate(
+                        self.cache_sample_rate
+                    )
+                },
+                headers={"xi-api-key": self._api_key},
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as response:
+                response.raise_for_status()
+                audio = await response.read()
+        logger.debug(f"{self}: Cached TTS audio for [{text}] ({len(audio)} bytes)")
+        return audio
+
+
+# Global TTS audio cache instance
+_tts_cache = None
+_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """Returns the process-wide TTS audio cache."""
+    global _tts_cache
+    if _tts_cache is None:
+        with _lock:
+            if _tts_cache is None:
+                _tts_cache = TTSAudioCache(
+                    max_bytes=int(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024,
+                    directory=os.getenv("TTS_CACHE_DIR") or None,
+                    min_repeats=int(os.getenv("TTS_CACHE_MIN_REPEATS", "2")),
+                )
+    return _tts_cache
@@ -1,16 +1,34 @@
+import os
+
 from pipecat.services.elevenlabs.tts import ElevenLabsTTSService
+from services.stubs import StubTTSService, use_stub_services
+from services.tts_cache import CachedElevenLabsTTSService, get_tts_cache
+
 
 class TTSService:
-    def __init__(self, api_key: str, voice_id: str, sample_rate: int):
+    def __init__(self, api_key: str, voice_id: str, sample_rate: int, params=None):
+        if use_stub_services():
+            self.tts = StubTTSService(sample_rate=sample_rate)
+            return
+        if os.getenv("TTS_CACHE_ENABLED", "true") == "true":
+            self.tts = CachedElevenLabsTTSService(
+                cache=get_tts_cache(),
+                api_key=api_key,
+                voice_id=voice_id,
+                sample_rate=sample_rate,
+                params=params or TTSService.default_params(),
+            )
+            return
         self.tts = ElevenLabsTTSService(
             api_key=api_key,
             voice_id=voice_id,
             sample_rate=sample_rate,
-            params=ElevenLabsTTSService.InputParams(
-                auto_mode=True,
-                use_speaker_boost=True
-            ),
+            params=params or TTSService.default_params(),
         )
 
+    @staticmethod
+    def default_params():
+        return ElevenLabsTTSService.InputParams(auto_mode=True, use_speaker_boost=True)
+
     def get_tts(self):
         return self.tts
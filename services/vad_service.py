@@ -0,0 +1,81 @@
+import threading
+from typing import Optional
+
+from loguru import logger
+from pipecat.audio.vad.silero import SileroOnnxModel, SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+from helpers.audio_format import SILERO_SAMPLE_RATES, StreamingResampler
+
+
+class SileroCallState(SileroOnnxModel):
+    """Per-call Silero recurrent state and audio context over a shared ONNX session.
+
+    onnxruntime sessions can be run from several threads at once, so only the
+    few KB of state below has to exist per call.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.sample_rates = [8000, 16000]
+        self.reset_states()
+
+
+class PooledSileroVADAnalyzer(SileroVADAnalyzer):
+    """SileroVADAnalyzer that borrows the process-wide model instead of loading its own.
+
+    Silero only runs at 8 or 16 kHz; on a 24 kHz call the analyzer keeps a
+    streaming resampler and analyses a 16 kHz copy of the input.
+    """
+
+    def __init__(
+        self,
+        session,
+        *,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+    ):
+        # skip SileroVADAnalyzer.__init__, which loads a new inference session
+        VADAnalyzer.__init__(self, sample_rate=sample_rate, params=params)
+        self._model = SileroCallState(session)
+        self._last_reset_time = 0
+        self._resampler = None
+
+    def set_sample_rate(self, sample_rate: int):
+        if self._init_sample_rate or sample_rate in SILERO_SAMPLE_RATES:
+            super().set_sample_rate(sample_rate)
+            return
+        self._resampler = StreamingResampler(sample_rate, 16000)
+        super().set_sample_rate(16000)
+
+    def analyze_audio(self, buffer):
+        if self._resampler is not None:
+            buffer = self._resampler.process(buffer)
+        return super().analyze_audio(buffer)
+
+
+class VADService:
+    """Loads the Silero VAD model once and hands lightweight analyzers to each call."""
+
+    def __init__(self, params: Optional[VADParams] = None):
+        self._session = SileroVADAnalyzer()._model.session
+        self._params = params
+        logger.info("Shared Silero VAD model loaded")
+
+    def get_vad(self):
+        return PooledSileroVADAnalyzer(self._session, params=self._params)
+
+
+# Global VAD service instance
+_vad_service = None
+_lock = threading.Lock()
+
+
+def get_vad_service():
+    """Returns the process-wide VAD service, loading the model on first use."""
+    global _vad_service
+    if _vad_service is None:
+        with _lock:
+            if _vad_service is None:
+                _vad_service = VADService()
+    return _vad_service
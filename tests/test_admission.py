@@ -0,0 +1,44 @@
+import asyncio
+
+from helpers.admission import AdmissionController
+
+
+def test_session_consumes_its_own_reservation():
+    async def run():
+        admission = AdmissionController(max_calls=2)
+        first = admission.try_admit()
+        second = admission.try_admit()
+        assert first and second and first != second
+        assert admission.try_admit() is None
+
+        async with admission.session(second):
+            assert admission.active == 1
+            assert list(admission._reservations) == [first]
+        assert admission.reserved == 1
+
+    asyncio.run(run())
+
+
+def test_released_reservation_frees_its_slot():
+    async def run():
+        admission = AdmissionController(max_calls=1)
+        token = admission.try_admit()
+        assert admission.saturated()
+        admission.release(token)
+        assert admission.reserved == 0
+        assert await admission.admit(timeout=0.1) is not None
+
+    asyncio.run(run())
+
+
+def test_unknown_token_consumes_nothing():
+    async def run():
+        admission = AdmissionController(max_calls=2)
+        token = admission.try_admit()
+        async with admission.session("from-another-worker"):
+            assert admission.reserved == 1
+        async with admission.session():
+            assert admission.reserved == 1
+        assert token in admission._reservations
+
+    asyncio.run(run())
@@ -0,0 +1,106 @@
+import asyncio
+
+from pipecat.frames.frames import (
+    BotStoppedSpeakingFrame,
+    EndFrame,
+    StartInterruptionFrame,
+    TTSSpeakFrame,
+)
+from pipecat.observers.base_observer import FramePushed
+from pipecat.processors.frame_processor import FrameDirection
+
+import call_control
+from call_control import CallControl
+
+
+class FakeTask:
+    """Stands in for a PipelineTask; ``queued`` is what the pipeline still holds."""
+
+    def __init__(self):
+        self.queued = []
+        self.finished = False
+        self.cancelled = False
+
+    async def queue_frame(self, frame):
+        self.queued.append(frame)
+
+    async def queue_frames(self, frames):
+        self.queued.extend(frames)
+
+    def has_finished(self):
+        return self.finished
+
+    async def cancel(self):
+        self.cancelled = True
+        self.finished = True
+
+
+class FakeCache:
+    async def get(self, key):
+        return {"callConnectionId": "connection"}
+
+    async def delete(self, key):
+        pass
+
+
+class FakeCallAutomation:
+    def __init__(self):
+        self.hung_up = []
+
+    async def hang_up(self, call_connection_id, is_for_everyone):
+        self.hung_up.append(call_connection_id)
+
+
+def pushed(frame):
+    return FramePushed(None, None, frame, FrameDirection.DOWNSTREAM, 0)
+
+
+def test_interrupted_goodbye_still_ends_the_call(monkeypatch):
+    automation = FakeCallAutomation()
+    monkeypatch.setattr(call_control, "get_async_cache", FakeCache)
+    monkeypatch.setattr(call_control, "get_call_automation", lambda: automation)
+
+    async def run():
+        task = FakeTask()
+        control = CallControl("context", "+15550100", task)
+        await control.end_call("caller said goodbye")
+        assert [type(f) for f in task.queued] == [TTSSpeakFrame, EndFrame]
+
+        # the caller talks over the goodbye: the interruption drops both frames
+        task.queued.clear()
+        await control.on_push_frame(pushed(StartInterruptionFrame()))
+        await control.on_push_frame(pushed(BotStoppedSpeakingFrame()))
+        await control.on_push_frame(pushed(BotStoppedSpeakingFrame()))
+        assert [type(f) for f in task.queued] == [EndFrame]
+
+        task.finished = True
+        await control.finish()
+        assert automation.hung_up == ["connection"]
+        assert not task.cancelled
+
+    asyncio.run(run())
+
+
+def test_uninterrupted_goodbye_queues_one_end_frame():
+    async def run():
+        task = FakeTask()
+        control = CallControl("context", "+15550100", task)
+        await control.on_push_frame(pushed(StartInterruptionFrame()))
+        await control.end_call()
+        await control.on_push_frame(pushed(BotStoppedSpeakingFrame()))
+        assert [type(f) for f in task.queued] == [TTSSpeakFrame, EndFrame]
+        assert await control.end_call() == "The call is already ending."
+
+    asyncio.run(run())
+
+
+def test_call_that_does_not_end_is_cancelled():
+    async def run():
+        task = FakeTask()
+        control = CallControl("context", "+15550100", task, end_timeout=0.01)
+        await control.end_call()
+        task.queued.clear()
+        await asyncio.sleep(0.05)
+        assert task.cancelled
+
+    asyncio.run(run())
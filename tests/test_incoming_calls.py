@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from incoming_calls import IncomingCallQueue
+
+
+class FakeCache:
+    def __init__(self):
+        self.keys = {}
+
+    async def add(self, key, value, ex=None):
+        if key in self.keys:
+            return False
+        self.keys[key] = value
+        return True
+
+    async def delete(self, key):
+        self.keys.pop(key, None)
+
+
+async def answer(event_data):
+    return True
+
+
+def test_full_queue_does_not_mark_the_event_seen():
+    async def run():
+        cache = FakeCache()
+        calls = IncomingCallQueue(answer, maxsize=1, cache=cache)
+        assert await calls.submit("1", {"incomingCallContext": "first"})
+        with pytest.raises(asyncio.QueueFull):
+            await calls.submit("2", {"incomingCallContext": "second"})
+        assert len(cache.keys) == 1
+
+        # EventGrid's retry of the rejected event is answered
+        calls._queue.get_nowait()
+        assert await calls.submit("2", {"incomingCallContext": "second"})
+        assert not await calls.submit("1", {"incomingCallContext": "first"})
+
+    asyncio.run(run())
+
+
+def test_invalid_event_is_rejected_before_state_changes():
+    async def run():
+        cache = FakeCache()
+        calls = IncomingCallQueue(answer, cache=cache)
+        with pytest.raises(ValueError):
+            await calls.submit("1", {"callerId": "x"})
+        assert IncomingCallQueue.validate({}) is not None
+        assert not cache.keys and calls._queue.empty()
+
+    asyncio.run(run())
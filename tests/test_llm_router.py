@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+
+from aiohttp import web
+from openai import AsyncOpenAI
+
+from helpers.metrics import get_metrics
+from services.llm_router import LLMBackend, LLMRouter
+
+
+class StubBackend:
+    """A local OpenAI-compatible server that streams its own name.
+
+    The first token comes after ``delay`` seconds; with ``fail`` every
+    request gets a 500. ``closed`` counts streams the client hung up on.
+    """
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.served = 0
+        self.closed = 0
+        self._runner = None
+        self.url = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._completions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+        return self
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def backend(self):
+        client = AsyncOpenAI(api_key="stub", base_url=self.url, max_retries=0)
+        return LLMBackend(self.name, client, "stub")
+
+    async def _completions(self, request):
+        body = await request.json()
+        self.served += 1
+        if self.fail:
+            return web.json_response({"error": {"message": "down"}}, status=500)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self.delay)
+        try:
+            for _ in range(20):
+                chunk = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": self.name},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                await asyncio.sleep(0.01)
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            self.closed += 1
+        return response
+
+
+async def first_token(router):
+    stream = await router.create(
+        model="stub",
+        stream=True,
+        messages=[{"role": "user", "content": "What are your opening hours?"}],
+    )
+    async for chunk in stream:
+        await stream.aclose()
+        return chunk.choices[0].delta.content
+
+
+def hedges_to(name):
+    counters = get_metrics().snapshot()["counters"]
+    return counters.get(f'llm_hedges_total{{backend="{name}"}}', 0)
+
+
+async def start(*stubs):
+    return [await stub.start() for stub in stubs]
+
+
+def test_backend_with_lower_ewma_is_picked():
+    async def run():
+        fast, slow = await start(StubBackend("fast"), StubBackend("slow"))
+        router = LLMRouter([slow.backend(), fast.backend()], hedge=False)
+        router.backends[0].ewma, router.backends[1].ewma = 0.8, 0.1
+
+        assert [await first_token(router) for _ in range(3)] == ["fast"] * 3
+        assert (fast.served, slow.served) == (3, 0)
+
+        await router.close()
+        await fast.stop()
+        await slow.stop()
+
+    asyncio.run(run())
+
+
+def test_request_past_p95_is_hedged_and_loser_closed():
+    async def run():
+        primary, secondary = await start(
+            StubBackend("primary", delay=1.0), StubBackend("secondary")
+        )
+        router = LLMRouter(
+            [primary.backend(), secondary.backend()], min_hedge_delay=0.01
+        )
+        for _ in range(20):
+            router.backends[0].observe(0.1, router.alpha)
+        router.backends[1].ewma = 0.5
+        assert abs(router.hedge_delay(router.backends[0]) - 0.1) < 1e-6
+        hedges = hedges_to("secondary")
+
+        started = time.perf_counter()
+        assert await first_token(router) == "secondary"
+        assert time.perf_counter() - started < 0.9
+        assert hedges_to("secondary") == hedges + 1
+
+        # the primary notices the closed stream once its first token is due
+        for _ in range(40):
+            if primary.closed:
+                break
+            await asyncio.sleep(0.05)
+        assert (primary.served, primary.closed) == (1, 1)
+
+        await router.close()
+        await primary.stop()
+        await secondary.stop()
+
+    asyncio.run(run())
+
+
+def test_failing_backend_sits_out_the_cooldown():
+    async def run():
+        broken, healthy = await start(
+            StubBackend("broken", fail=True), StubBackend("healthy")
+        )
+        router = LLMRouter([broken.backend(), healthy.backend()], cooldown=0.3)
+
+        assert await first_token(router) == "healthy"
+        assert await first_token(router) == "healthy"
+        assert (broken.served, healthy.served) == (1, 2)
+        assert not router.stats()["broken"]["healthy"]
+
+        # after the cooldown the unmeasured backend is tried again
+        await asyncio.sleep(0.35)
+        assert await first_token(router) == "healthy"
+        assert broken.served == 2
+
+        await router.close()
+        await broken.stop()
+        await healthy.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+from helpers.embeddings import content_words, get_embedder
+from helpers.metrics import get_metrics
+from helpers.search_cache import SearchResultCache
+
+NAMESPACE = ("sfs-vector", "sfs-vector-semantic-configuration")
+
+
+def test_single_letters_are_content_words():
+    assert content_words("What is the price of plan A?") == {"price", "plan", "a"}
+    assert content_words("what is the price of plan A") != content_words(
+        "what is the price of plan B"
+    )
+
+
+def test_plan_a_does_not_get_the_answer_for_plan_b():
+    cache = SearchResultCache()
+    cache.put("what is the price of plan A", NAMESPACE, ["plan a costs 10"])
+
+    assert cache.get("what is the price of plan B", NAMESPACE) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_entities_with_similar_embeddings_miss():
+    cache = SearchResultCache(similarity=0.5)
+    cache.put("are you open on saturday", NAMESPACE, ["saturday hours"])
+    cache.put("how much is the basic plan", NAMESPACE, ["basic price"])
+
+    assert cache.get("are you open on sunday", NAMESPACE) is None
+    assert cache.get("how much is the premium plan", NAMESPACE) is None
+    assert cache.stats()["false_hits"] == 2
+
+
+def test_rephrasing_with_the_same_content_words_hits():
+    cache = SearchResultCache()
+    cache.put("what is the price of plan A", NAMESPACE, ["plan a costs 10"])
+
+    assert cache.get("The price of plan A?", NAMESPACE) == ["plan a costs 10"]
+    assert cache.get("what is the price of plan A", NAMESPACE) == ["plan a costs 10"]
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["exact_hits"]) == (1, 1)
+
+
+def test_plan_pair_still_scores_close_by_cosine():
+    # the embedding alone cannot tell them apart; content words must
+    embedder = get_embedder()
+    a = embedder.embed("what is the price of plan A")
+    b = embedder.embed("what is the price of plan B")
+    assert float(a @ b) > 0.5
+
+
+def test_lookups_are_exported_to_the_metrics():
+    metrics = get_metrics()
+    before = metrics.snapshot()["counters"]
+    cache = SearchResultCache(similarity=0.5)
+    cache.put("are you open on saturday", NAMESPACE, ["saturday hours"])
+    cache.get("are you open on saturday", NAMESPACE)
+    cache.get("are you open on sunday", NAMESPACE)
+
+    counters = metrics.snapshot()["counters"]
+    for series in (
+        'search_cache_lookups_total{outcome="exact_hit"}',
+        'search_cache_lookups_total{outcome="miss"}',
+        "search_cache_false_hits_total",
+    ):
+        assert counters[series] == before.get(series, 0) + 1
+    assert "search_cache_false_hits_total" in metrics.render_prometheus()
@@ -0,0 +1,116 @@
+import asyncio
+from types import SimpleNamespace
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from services.speculative_llm import SpeculativeLLMMixin
+
+TRANSCRIPT = "what are your opening hours"
+
+
+def chunk(text):
+    return SimpleNamespace(
+        usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))]
+    )
+
+
+class FakeLLM:
+    """The base LLM service: streams ``words``, then hangs unless ``complete``."""
+
+    def __init__(self, words, complete=True):
+        self.words = words
+        self.complete = complete
+        self.fresh_requests = 0
+
+    async def get_chat_completions(self, context, messages):
+        async def stream():
+            for word in self.words:
+                yield chunk(word)
+            if not self.complete:
+                await asyncio.Event().wait()
+
+        return stream()
+
+    async def _stream_chat_completions(self, context):
+        self.fresh_requests += 1
+        return await self.get_chat_completions(context, context.get_messages())
+
+    async def cleanup(self):
+        pass
+
+
+class SpeculativeFakeLLM(SpeculativeLLMMixin, FakeLLM):
+    pass
+
+
+async def speculate(llm, text):
+    context = OpenAILLMContext([{"role": "system", "content": "Be brief."}])
+    llm.speculate(context, TRANSCRIPT)
+    # let the speculative request stream what it has
+    await asyncio.sleep(0.01)
+    context.add_message({"role": "user", "content": text})
+    return context, llm._speculation
+
+
+def test_hit_replays_the_speculative_response():
+    async def run():
+        llm = SpeculativeFakeLLM(words=["nine", "to", "five"])
+        context, _ = await speculate(llm, TRANSCRIPT)
+        stream = await llm._stream_chat_completions(context)
+        words = [c.choices[0].delta.content async for c in stream]
+
+        assert words == ["nine", "to", "five"]
+        assert llm.fresh_requests == 0
+        assert llm.speculation_stats["hits"] == 1
+        assert llm.speculation_stats["wasted_tokens"] == 0
+
+    asyncio.run(run())
+
+
+def test_miss_makes_a_fresh_request_and_wastes_the_speculation():
+    async def run():
+        llm = SpeculativeFakeLLM(words=["nine", "to", "five"], complete=False)
+        context, speculation = await speculate(llm, "can i talk to an agent")
+        await llm._stream_chat_completions(context)
+        await asyncio.sleep(0)
+
+        assert llm.fresh_requests == 1
+        assert speculation.task.cancelled()
+        assert llm.speculation_stats["misses"] == 1
+        assert llm.speculation_stats["wasted_tokens"] == 3
+
+    asyncio.run(run())
+
+
+def test_interrupted_replay_stops_the_request():
+    async def run():
+        llm = SpeculativeFakeLLM(words=["nine", "to", "five"], complete=False)
+        context, speculation = await speculate(llm, TRANSCRIPT)
+        stream = await llm._stream_chat_completions(context)
+        await stream.__anext__()
+        # the caller barges in after the first token was spoken
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+        assert speculation.task.cancelled()
+        assert llm.speculation_stats["hits"] == 1
+        assert llm.speculation_stats["wasted_tokens"] == 2
+
+    asyncio.run(run())
+
+
+def test_cleanup_stops_a_replay_in_progress():
+    async def run():
+        llm = SpeculativeFakeLLM(words=["nine"], complete=False)
+        context, speculation = await speculate(llm, TRANSCRIPT)
+        stream = await llm._stream_chat_completions(context)
+        await stream.__anext__()
+        await llm.cleanup()
+        await asyncio.sleep(0)
+
+        assert speculation.task.cancelled()
+        # closing the abandoned replay later does not count it twice
+        await stream.aclose()
+        assert llm.speculation_stats["wasted_tokens"] == 0
+
+    asyncio.run(run())